@@ -1,39 +1,76 @@
 """
-Audio Analysis Module - Placeholder Implementation
+Audio Analysis Module
 Analyzes audio to detect baby cries and classify cry reasons.
-Replace with production models (YAMNet, Wav2Vec2, etc.) later.
+Uses an ONNX cry model when MODEL_BACKEND=onnx, otherwise placeholder heuristics.
 """
 
 import librosa
 import numpy as np
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
+
+from ai_modules.feature_cache import FeatureCache, get_feature_cache, hash_file
+from ai_modules.model_backend import CRY_CLASSES, ModelBackend, get_model_backend
+
+# Bump when feature extraction changes so stale cache entries are ignored
+FEATURE_VERSION = 1
 
 class AudioAnalyzer:
-    def __init__(self):
-        """Initialize placeholder audio analyzer."""
+    def __init__(
+        self,
+        feature_cache: Optional[FeatureCache] = None,
+        model_backend: Optional[ModelBackend] = None
+    ):
+        """Initialize audio analyzer with the configured model backend."""
         self.sample_rate = 16000
         self.cry_threshold = 0.15  # Energy threshold for cry detection
+        self.model_cry_threshold = 0.5  # Cry probability threshold when a model is loaded
+        self.gate_margin = 0.8  # Reduced analysis skips clips scoring below this fraction of cry_threshold
+        self.n_mels = 64
+        self.feature_cache = feature_cache or get_feature_cache()
+        self.model_backend = model_backend or get_model_backend()
 
-    def analyze(self, audio_path: str) -> Dict:
+    def analyze(self, audio_path: str, reduced: bool = False) -> Dict:
         """
         Analyze audio file for baby cry detection.
 
         Args:
             audio_path: Path to audio file
+            reduced: Run only the energy/ZCR gate, escalating to full analysis
+                when the clip could possibly score as a cry
 
         Returns:
             Dict with status, reason (if crying), and confidence
         """
         try:
-            # Load audio file
-            audio, sr = librosa.load(audio_path, sr=self.sample_rate, duration=4.0)
+            cache_key = f"audio:v{FEATURE_VERSION}:{self.model_backend.model_tag}:{hash_file(audio_path)}"
+            features = self.feature_cache.get(cache_key)
+            audio = None
+
+            # The gate mirrors the heuristic only; a cry model always sees the clip
+            if features is None and reduced and not self.model_backend.has_cry_model:
+                gate_result = self._energy_gate(audio_path)
+                if gate_result is not None:
+                    return gate_result
 
-            # Extract features
-            is_crying, confidence = self._detect_cry(audio)
+            if features is None:
+                audio = self._load_audio(audio_path)
+                features = self._extract_features(audio)
+                if self.model_backend.has_cry_model:
+                    features.update(self._extract_model_features(audio))
+                self.feature_cache.put(cache_key, features)
+
+            is_crying, confidence = self._detect_cry(features)
 
             if is_crying:
+                # Pitch features are only extracted once a clip scores as a cry
+                if 'avg_pitch' not in features and 'reason_probs' not in features:
+                    if audio is None:
+                        audio = self._load_audio(audio_path)
+                    features.update(self._extract_pitch_features(audio))
+                    self.feature_cache.put(cache_key, features)
+
                 # Classify cry reason based on audio features
-                cry_reason = self._classify_cry_reason(audio)
+                cry_reason = self._classify_cry_reason(features)
                 return {
                     "status": "cry",
                     "reason": cry_reason,
@@ -55,14 +92,96 @@ class AudioAnalyzer:
                 "error": str(e)
             }
 
-    def _detect_cry(self, audio: np.ndarray) -> Tuple[bool, float]:
+    def analyze_samples(self, audio: np.ndarray) -> Dict:
+        """
+        Analyze PCM samples that were already decoded, e.g. by another process.
+
+        Runs the full pipeline without the feature cache, since there is no
+        file to hash.
+
+        Args:
+            audio: Mono float samples at self.sample_rate
+
+        Returns:
+            Dict with status, reason (if crying), and confidence
+        """
+        try:
+            features = self._extract_features(audio)
+            if self.model_backend.has_cry_model:
+                features.update(self._extract_model_features(audio))
+
+            is_crying, confidence = self._detect_cry(features)
+
+            if not is_crying:
+                return {
+                    "status": "no_cry",
+                    "reason": None,
+                    "confidence": float(confidence)
+                }
+
+            if 'reason_probs' not in features:
+                features.update(self._extract_pitch_features(audio))
+
+            return {
+                "status": "cry",
+                "reason": self._classify_cry_reason(features),
+                "confidence": float(confidence)
+            }
+
+        except Exception as e:
+            print(f"Error analyzing audio samples: {e}")
+            return {
+                "status": "error",
+                "reason": None,
+                "confidence": 0.0,
+                "error": str(e)
+            }
+
+    def _energy_gate(self, audio_path: str) -> Optional[Dict]:
+        """
+        Cheap energy and zero-crossing check for stable periods.
+
+        Decodes at the native sample rate (no resampling) and skips spectral
+        features. Native RMS and the zero-crossing rate rescaled to
+        self.sample_rate over-estimate the full-fidelity values (resampling
+        only removes content), so a clip is only passed as no_cry when the
+        full heuristic score is below cry_threshold with gate_margin to spare.
+
+        Returns:
+            Quiet no_cry result, or None when the clip needs full analysis
+        """
+        audio, sr = librosa.load(audio_path, sr=None, duration=4.0)
+        if len(audio) < 2:
+            return None
+
+        rms_energy = np.sqrt(np.mean(audio ** 2))
+        zcr = np.mean(np.signbit(audio[1:]) != np.signbit(audio[:-1])) * sr / self.sample_rate
+
+        energy_score = min(rms_energy / 0.3, 1.0)
+        zcr_score = min(zcr / 0.2, 1.0)
+        combined_score = energy_score * 0.6 + zcr_score * 0.4
+
+        if combined_score >= self.cry_threshold * self.gate_margin:
+            return None
+
+        return {
+            "status": "no_cry",
+            "reason": None,
+            "confidence": float(min(max(1.0 - combined_score, 0.5), 0.95)),
+            "fidelity": "reduced"
+        }
+
+    def _load_audio(self, audio_path: str) -> np.ndarray:
+        """Decode the first 4 seconds of an audio file at the analysis rate."""
+        audio, sr = librosa.load(audio_path, sr=self.sample_rate, duration=4.0)
+        return audio
+
+    def _extract_features(self, audio: np.ndarray) -> Dict:
         """
-        Placeholder cry detection using energy and spectral features.
+        Extract the energy and spectral features used for cry detection.
 
-        Replace with trained model inference:
-        - Load model: self.model = tf.keras.models.load_model('audio_model.h5')
-        - Extract mel-spectrogram
-        - Run inference: predictions = self.model.predict(mel_spec)
+        Returns:
+            JSON-serializable feature dict suitable for caching
         """
         # Calculate energy
         rms_energy = np.sqrt(np.mean(audio ** 2))
@@ -73,26 +192,18 @@ class AudioAnalyzer:
         # Calculate spectral centroid (brightness of sound)
         spectral_centroid = np.mean(librosa.feature.spectral_centroid(y=audio, sr=self.sample_rate))
 
-        # Normalize features
-        energy_score = min(rms_energy / 0.3, 1.0)
-        zcr_score = min(zcr / 0.2, 1.0)
-
-        # Combined score (placeholder heuristic)
-        combined_score = (energy_score * 0.6 + zcr_score * 0.4)
-
-        # Determine if crying
-        is_crying = combined_score > self.cry_threshold
-        confidence = combined_score if is_crying else (1.0 - combined_score)
-
-        return is_crying, min(max(confidence, 0.5), 0.95)
+        return {
+            "rms_energy": float(rms_energy),
+            "zcr": float(zcr),
+            "spectral_centroid": float(spectral_centroid)
+        }
 
-    def _classify_cry_reason(self, audio: np.ndarray) -> str:
+    def _extract_pitch_features(self, audio: np.ndarray) -> Dict:
         """
-        Placeholder cry reason classification.
+        Extract the pitch and rolloff features used for cry reason classification.
 
-        Replace with trained classifier:
-        - Extract advanced features (MFCC, pitch, formants)
-        - Use model to classify into {hunger, pain, attention, gas}
+        Returns:
+            JSON-serializable feature dict suitable for caching
         """
         # Extract pitch and spectral features
         pitches, magnitudes = librosa.piptrack(y=audio, sr=self.sample_rate)
@@ -105,15 +216,79 @@ class AudioAnalyzer:
             if pitch > 0:
                 pitch_values.append(pitch)
 
-        if len(pitch_values) == 0:
-            return "attention"
-
-        avg_pitch = np.mean(pitch_values)
-        pitch_variance = np.var(pitch_values)
-
         # Calculate spectral rolloff (energy distribution)
         spectral_rolloff = np.mean(librosa.feature.spectral_rolloff(y=audio, sr=self.sample_rate))
 
+        return {
+            "pitch_count": len(pitch_values),
+            "avg_pitch": float(np.mean(pitch_values)) if pitch_values else 0.0,
+            "pitch_variance": float(np.var(pitch_values)) if pitch_values else 0.0,
+            "spectral_rolloff": float(spectral_rolloff)
+        }
+
+    def _extract_model_features(self, audio: np.ndarray) -> Dict:
+        """
+        Run the cry model on the clip's log-mel spectrogram.
+
+        Returns:
+            JSON-serializable dict with cry probability and reason probabilities
+        """
+        mel_spec = librosa.feature.melspectrogram(y=audio, sr=self.sample_rate, n_mels=self.n_mels)
+        log_mel = librosa.power_to_db(mel_spec, ref=np.max)
+
+        probabilities = self.model_backend.predict_cry(log_mel[np.newaxis, np.newaxis])[0]
+
+        return {
+            "cry_prob": float(1.0 - probabilities[0]),
+            "reason_probs": {
+                reason: float(probability)
+                for reason, probability in zip(CRY_CLASSES[1:], probabilities[1:])
+            }
+        }
+
+    def _detect_cry(self, features: Dict) -> Tuple[bool, float]:
+        """
+        Cry detection from cached features.
+
+        Uses the cry model probability when a model backend is loaded,
+        otherwise the placeholder energy and spectral heuristic below.
+        """
+        if "cry_prob" in features:
+            is_crying = features["cry_prob"] > self.model_cry_threshold
+            confidence = features["cry_prob"] if is_crying else (1.0 - features["cry_prob"])
+            return is_crying, min(max(confidence, 0.5), 0.95)
+
+        # Normalize features
+        energy_score = min(features["rms_energy"] / 0.3, 1.0)
+        zcr_score = min(features["zcr"] / 0.2, 1.0)
+
+        # Combined score (placeholder heuristic)
+        combined_score = (energy_score * 0.6 + zcr_score * 0.4)
+
+        # Determine if crying
+        is_crying = combined_score > self.cry_threshold
+        confidence = combined_score if is_crying else (1.0 - combined_score)
+
+        return is_crying, min(max(confidence, 0.5), 0.95)
+
+    def _classify_cry_reason(self, features: Dict) -> str:
+        """
+        Cry reason classification into {hunger, pain, attention, gas}.
+
+        Uses the cry model's reason probabilities when available, otherwise
+        the placeholder pitch heuristic below.
+        """
+        if "reason_probs" in features:
+            reason_probs = features["reason_probs"]
+            return max(reason_probs, key=reason_probs.get)
+
+        if features["pitch_count"] == 0:
+            return "attention"
+
+        avg_pitch = features["avg_pitch"]
+        pitch_variance = features["pitch_variance"]
+        spectral_rolloff = features["spectral_rolloff"]
+
         # Placeholder classification logic (replace with ML model)
         if avg_pitch > 400 and pitch_variance > 1000:
             return "pain"  # High pitch, variable = pain
@@ -0,0 +1,214 @@
+"""
+Feature Cache - Content-addressed cache for extracted analysis features
+Stores audio features and video motion/presence statistics keyed by a
+hash of the uploaded bytes, so retried or re-scored clips skip decoding.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+HASH_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+def hash_file(file_path: str) -> str:
+    """
+    Compute a fast content hash of a file.
+
+    Args:
+        file_path: Path to file
+
+    Returns:
+        Hex digest of the file contents
+    """
+    digest = hashlib.blake2b(digest_size=20)
+
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        cache_dir: Optional[str] = None,
+        max_disk_entries: Optional[int] = None
+    ):
+        """
+        Initialize feature cache.
+
+        Args:
+            max_entries: Size of the in-memory LRU tier
+            cache_dir: Directory for the optional on-disk tier
+            max_disk_entries: Files kept in the disk tier (0 for no limit)
+        """
+        if max_entries is None:
+            max_entries = int(os.getenv('FEATURE_CACHE_SIZE', 512))
+        if cache_dir is None:
+            cache_dir = os.getenv('FEATURE_CACHE_DIR') or None
+        if max_disk_entries is None:
+            max_disk_entries = int(os.getenv('FEATURE_CACHE_DISK_SIZE', 10000))
+
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._disk_entries = 0
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._disk_entries = len(self._disk_files())
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up cached features, promoting disk hits into memory.
+
+        Args:
+            key: Cache key (namespace and content hash)
+
+        Returns:
+            Copy of the cached feature dict or None
+        """
+        with self._lock:
+            features = self._entries.get(key)
+            if features is not None:
+                self._entries.move_to_end(key)
+                return dict(features)
+
+        features = self._read_disk(key)
+        if features is not None:
+            self._remember(key, features)
+            return dict(features)
+
+        return None
+
+    def put(self, key: str, features: Dict):
+        """
+        Store features in memory and, if configured, on disk.
+
+        Args:
+            key: Cache key (namespace and content hash)
+            features: JSON-serializable feature dict
+        """
+        features = dict(features)
+        self._remember(key, features)
+        self._write_disk(key, features)
+
+    def _remember(self, key: str, features: Dict):
+        """Insert into the memory tier, evicting least recently used entries."""
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = features
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _disk_path(self, key: str) -> str:
+        """Map a cache key to its file in the disk tier."""
+        return os.path.join(self.cache_dir, key.replace(':', '_') + '.json')
+
+    def _read_disk(self, key: str) -> Optional[Dict]:
+        """Read an entry from the disk tier."""
+        if not self.cache_dir:
+            return None
+
+        path = self._disk_path(key)
+
+        try:
+            with open(path, 'r') as f:
+                features = json.load(f)
+            # Hits count as recent use, so eviction by mtime keeps them
+            os.utime(path)
+            return features
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading feature cache entry {key}: {e}")
+            return None
+
+    def _write_disk(self, key: str, features: Dict):
+        """Atomically write an entry to the disk tier."""
+        if not self.cache_dir:
+            return
+
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        try:
+            existed = os.path.exists(path)
+            with open(tmp_path, 'w') as f:
+                json.dump(features, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error writing feature cache entry {key}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        if existed or self.max_disk_entries <= 0:
+            return
+
+        with self._disk_lock:
+            self._disk_entries += 1
+            if self._disk_entries > self.max_disk_entries:
+                self._evict_disk()
+
+    def _disk_files(self) -> List[str]:
+        """Paths of the entries in the disk tier."""
+        return [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir)
+            if name.endswith('.json')
+        ]
+
+    def _evict_disk(self):
+        """
+        Remove the least recently used files down to 90% of max_disk_entries.
+
+        The headroom means the directory is listed once per tenth of the limit
+        in new entries rather than on every write. Called with _disk_lock held.
+        """
+        keep = int(self.max_disk_entries * 0.9)
+        entries = []
+
+        for path in self._disk_files():
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+
+        entries.sort(reverse=True)
+        for _, path in entries[keep:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+        self._disk_entries = min(len(entries), keep)
+
+
+_shared_cache: Optional[FeatureCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_feature_cache() -> FeatureCache:
+    """Return the process-wide feature cache shared by the analyzers."""
+    global _shared_cache
+
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = FeatureCache()
+        return _shared_cache
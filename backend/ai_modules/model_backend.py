@@ -0,0 +1,256 @@
+"""
+Model Backend - Pluggable inference backends for cry and presence models
+The heuristic backend keeps the placeholder logic in the analyzers; the
+ONNX Runtime backend runs real models on CPU with shared, pre-loaded sessions.
+"""
+
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    import onnxruntime as ort
+except ImportError:  # Optional dependency, only needed for MODEL_BACKEND=onnx
+    ort = None
+
+# Output order of the cry model: index 0 is "no cry", the rest are reasons
+CRY_CLASSES = ("no_cry", "hunger", "pain", "attention", "gas")
+
+
+class ModelBackend:
+    """
+    Capabilities the analyzers check before choosing model or heuristic paths.
+
+    Backends that report has_cry_model or has_presence_model must be
+    InferenceBackend subclasses, which provide the predict methods.
+    """
+    name = 'base'
+
+    @property
+    def has_cry_model(self) -> bool:
+        return False
+
+    @property
+    def has_presence_model(self) -> bool:
+        return False
+
+    @property
+    def model_tag(self) -> str:
+        """Identifies the loaded models, so cached outputs match the deployment."""
+        return self.name
+
+    def presence_input_size(self) -> Tuple[int, int]:
+        """(width, height) expected by the presence model."""
+        return 224, 224
+
+
+class InferenceBackend(ModelBackend, ABC):
+    """
+    Backend that runs trained models.
+
+    Cry model contract:
+    - Input: float32 log-mel spectrograms, shape (N, 1, n_mels, frames)
+    - Output: class probabilities in CRY_CLASSES order, shape (N, 5)
+
+    Presence model contract:
+    - Input: float32 RGB frames scaled to [0, 1], shape (N, 3, H, W)
+    - Output: presence probability per frame, shape (N,)
+    """
+
+    @abstractmethod
+    def predict_cry(self, batch: np.ndarray) -> np.ndarray:
+        """Cry class probabilities for a batch of log-mel spectrograms."""
+
+    @abstractmethod
+    def predict_presence(self, batch: np.ndarray) -> np.ndarray:
+        """Presence probability per frame for a batch of RGB frames."""
+
+
+class HeuristicBackend(ModelBackend):
+    """
+    No models loaded; the analyzers use their built-in heuristics.
+
+    The heuristics stay in the analyzers rather than behind predict methods:
+    they score the same extracted features the analyzers cache, and a
+    deployment may load only one of the two models, so each analyzer picks
+    model or heuristic scoring per signal from has_cry_model and
+    has_presence_model.
+    """
+    name = 'heuristic'
+
+
+_sessions: Dict[Tuple, 'ort.InferenceSession'] = {}
+_sessions_lock = threading.Lock()
+
+
+def _get_session(model_path: str, intra_op_threads: int, inter_op_threads: int):
+    """Load an ONNX Runtime session once per process and reuse it across requests."""
+    key = (os.path.abspath(model_path), intra_op_threads, inter_op_threads)
+
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = intra_op_threads
+            options.inter_op_num_threads = inter_op_threads
+            options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+            session = ort.InferenceSession(
+                model_path,
+                sess_options=options,
+                providers=['CPUExecutionProvider']
+            )
+            _sessions[key] = session
+
+        return session
+
+
+def quantized_path(model_path: str) -> str:
+    """Path of the int8 variant of a model (model.onnx -> model.int8.onnx)."""
+    root, ext = os.path.splitext(model_path)
+    return f"{root}.int8{ext}"
+
+
+def quantize_model(model_path: str) -> str:
+    """
+    Write a dynamically int8-quantized copy of a model next to it.
+
+    Returns:
+        Path of the quantized model
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    output_path = quantized_path(model_path)
+    quantize_dynamic(model_path, output_path, weight_type=QuantType.QInt8)
+    return output_path
+
+
+class OnnxBackend(InferenceBackend):
+    name = 'onnx'
+
+    def __init__(
+        self,
+        cry_model_path: Optional[str] = None,
+        presence_model_path: Optional[str] = None,
+        intra_op_threads: Optional[int] = None,
+        inter_op_threads: Optional[int] = None,
+        quantized: Optional[bool] = None
+    ):
+        """
+        Initialize ONNX Runtime CPU backend.
+
+        Args:
+            cry_model_path: Path to the cry classification model
+            presence_model_path: Path to the presence detection model
+            intra_op_threads: Threads used inside a single operator
+            inter_op_threads: Threads used across independent operators
+            quantized: Prefer the model.int8.onnx variant when it exists
+        """
+        if ort is None:
+            raise ImportError("onnxruntime is not installed")
+
+        if cry_model_path is None:
+            cry_model_path = os.getenv('CRY_MODEL_PATH') or None
+        if presence_model_path is None:
+            presence_model_path = os.getenv('PRESENCE_MODEL_PATH') or None
+        if intra_op_threads is None:
+            intra_op_threads = int(os.getenv('ONNX_INTRA_OP_THREADS', 2))
+        if inter_op_threads is None:
+            inter_op_threads = int(os.getenv('ONNX_INTER_OP_THREADS', 1))
+        if quantized is None:
+            quantized = os.getenv('ONNX_QUANTIZED', 'false').lower() in ('1', 'true', 'yes')
+
+        self.cry_model_path = self._resolve_path(cry_model_path, quantized)
+        self.presence_model_path = self._resolve_path(presence_model_path, quantized)
+
+        # Load sessions up front so no request pays the model load cost
+        self.cry_session = None
+        self.presence_session = None
+
+        if self.cry_model_path:
+            self.cry_session = _get_session(self.cry_model_path, intra_op_threads, inter_op_threads)
+        if self.presence_model_path:
+            self.presence_session = _get_session(self.presence_model_path, intra_op_threads, inter_op_threads)
+
+        # Part of every cache key, so built once from the files the sessions loaded
+        parts = []
+        for path in (self.cry_model_path, self.presence_model_path):
+            if path:
+                parts.append(f"{os.path.basename(path)}@{int(os.path.getmtime(path))}")
+        self._model_tag = f"{self.name}-" + "-".join(parts)
+
+    @staticmethod
+    def _resolve_path(model_path: Optional[str], quantized: bool) -> Optional[str]:
+        """Swap in the int8 model when requested and available."""
+        if model_path and quantized and os.path.exists(quantized_path(model_path)):
+            return quantized_path(model_path)
+        return model_path
+
+    @property
+    def has_cry_model(self) -> bool:
+        return self.cry_session is not None
+
+    @property
+    def has_presence_model(self) -> bool:
+        return self.presence_session is not None
+
+    @property
+    def model_tag(self) -> str:
+        return self._model_tag
+
+    def presence_input_size(self) -> Tuple[int, int]:
+        shape = self.presence_session.get_inputs()[0].shape
+        height, width = shape[2], shape[3]
+
+        # Dynamic axes are reported as strings or None; fall back to 224x224
+        if not isinstance(height, int) or not isinstance(width, int):
+            return 224, 224
+
+        return width, height
+
+    def _run(self, session, batch: np.ndarray) -> np.ndarray:
+        """Run a single-input, single-output model on a batch."""
+        if session is None:
+            raise RuntimeError("Model not loaded; check has_cry_model / has_presence_model first")
+
+        input_name = session.get_inputs()[0].name
+        outputs = session.run(None, {input_name: batch.astype(np.float32, copy=False)})
+        return outputs[0]
+
+    def predict_cry(self, batch: np.ndarray) -> np.ndarray:
+        return self._run(self.cry_session, batch)
+
+    def predict_presence(self, batch: np.ndarray) -> np.ndarray:
+        return self._run(self.presence_session, batch).reshape(len(batch))
+
+
+_shared_backend: Optional[ModelBackend] = None
+_shared_backend_lock = threading.Lock()
+
+
+def get_model_backend() -> ModelBackend:
+    """
+    Return the process-wide model backend selected by MODEL_BACKEND.
+
+    Falls back to the heuristic backend if the ONNX backend cannot load.
+    """
+    global _shared_backend
+
+    with _shared_backend_lock:
+        if _shared_backend is None:
+            backend_name = os.getenv('MODEL_BACKEND', 'heuristic').lower()
+
+            if backend_name == 'onnx':
+                try:
+                    _shared_backend = OnnxBackend()
+                except Exception as e:
+                    print(f"Failed to initialize ONNX backend, using heuristics: {e}")
+
+            if _shared_backend is None:
+                _shared_backend = HeuristicBackend()
+
+        return _shared_backend
@@ -1,56 +1,153 @@
 """
-Video Analysis Module - Placeholder Implementation
+Video Analysis Module
 Detects baby presence and activity (sleeping/sitting).
-Replace with production models (MediaPipe, CNN, ResNet) later.
+Uses an ONNX presence model when MODEL_BACKEND=onnx, otherwise a Haar face cascade.
 """
 
+import os
 import cv2
 import numpy as np
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Tuple
+
+from ai_modules.feature_cache import FeatureCache, get_feature_cache, hash_file
+from ai_modules.model_backend import ModelBackend, get_model_backend
+
+# Bump when feature extraction changes so stale cache entries are ignored
+FEATURE_VERSION = 3
 
 class VideoAnalyzer:
-    def __init__(self):
-        """Initialize placeholder video analyzer."""
+    def __init__(
+        self,
+        feature_cache: Optional[FeatureCache] = None,
+        model_backend: Optional[ModelBackend] = None
+    ):
+        """Initialize video analyzer with the configured model backend."""
         self.face_cascade = cv2.CascadeClassifier(
             cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
         )
         self.motion_threshold = 5.0
+        self.presence_threshold = 0.3  # Fraction of checked frames with a face
+        self.max_frames = 120  # ~4 seconds at 30fps
+        self.frame_step = 5  # Presence check on every 5th frame
+        self.reduced_max_frames = 30  # ~1 second for reduced analysis
+        self.reduced_frame_step = 10
+        # Reduced clips check only 3 frames, where one stray hit would already
+        # pass presence_threshold, so they need 2 of 3
+        self.reduced_presence_threshold = float(os.getenv('PRESENCE_REDUCED_THRESHOLD', 0.5))
+        self.feature_cache = feature_cache or get_feature_cache()
+        self.model_backend = model_backend or get_model_backend()
+        self.model_presence_threshold = 0.5  # Per-frame presence probability
+
+        # Multi-resolution presence detection: detect on a downscaled frame and
+        # confirm at full resolution only when the presence ratio is ambiguous
+        self.presence_scale = float(os.getenv('PRESENCE_SCALE', 0.5))
+        self.presence_ambiguity = float(os.getenv('PRESENCE_AMBIGUITY', 0.15))
+        self.cascade_scale_factor = float(os.getenv('PRESENCE_SCALE_FACTOR', 1.1))
+        self.cascade_min_neighbors = int(os.getenv('PRESENCE_MIN_NEIGHBORS', 5))
+        self.cascade_min_size = int(os.getenv('PRESENCE_MIN_SIZE', 30))
+
+        # Contrast normalization ('none', 'hist' or 'clahe') for low-contrast frames only
+        self.equalize_mode = os.getenv('PRESENCE_EQUALIZE', 'none')
+        self.low_contrast_std = float(os.getenv('PRESENCE_LOW_CONTRAST_STD', 40.0))
+        self.clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
 
-    def analyze(self, video_path: str) -> Dict:
+    def analyze(self, video_path: str, reduced: bool = False) -> Dict:
         """
         Analyze video file for baby presence and activity.
 
         Args:
             video_path: Path to video file
+            reduced: Check presence and motion on fewer frames
 
         Returns:
             Dict with presence, activity, and confidence
         """
         try:
-            cap = cv2.VideoCapture(video_path)
+            cache_key = f"video:v{FEATURE_VERSION}:{self._presence_config_tag()}:{hash_file(video_path)}"
+            features = self.feature_cache.get(cache_key)
+            frames = None
+
+            if features is None:
+                max_frames = self.reduced_max_frames if reduced else self.max_frames
+                frames = self._read_frames(video_path, max_frames)
+                if frames is None:
+                    return self._no_presence_result("Could not open video")
+
+                features = {"frame_count": len(frames)}
+                if len(frames) >= 10:
+                    frame_step = self.reduced_frame_step if reduced else self.frame_step
+                    features.update(self._extract_presence_features(frames, frame_step, self._threshold(reduced)))
+
+                    # Motion on the few reduced frames is cheap, so take it up front
+                    if reduced:
+                        features.update(self._extract_motion_features(frames))
+
+                # Reduced features are not comparable with full ones, so only cache full
+                if not reduced:
+                    self.feature_cache.put(cache_key, features)
+
+            if features["frame_count"] < 10:
+                return self._no_presence_result("Insufficient frames")
+
+            # Detect presence (cached features are always from a full analysis)
+            has_presence, presence_confidence = self._detect_presence(
+                features, self._threshold(reduced and frames is not None)
+            )
+
+            if not has_presence:
+                result = {
+                    "presence": False,
+                    "activity": None,
+                    "confidence": float(presence_confidence)
+                }
+                if reduced and frames is not None:
+                    result["fidelity"] = "reduced"
 
-            if not cap.isOpened():
-                return self._no_presence_result("Could not open video")
+                return result
 
-            frames = []
-            frame_count = 0
-            max_frames = 120  # ~4 seconds at 30fps
+            # Motion statistics are only extracted once presence is confirmed
+            if 'avg_motion' not in features:
+                if frames is None:
+                    frames = self._read_frames(video_path, self.max_frames) or []
+                features.update(self._extract_motion_features(frames))
+                self.feature_cache.put(cache_key, features)
 
-            # Read frames
-            while frame_count < max_frames:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                frames.append(frame)
-                frame_count += 1
+            # Classify activity
+            activity, activity_confidence = self._classify_activity(features)
 
-            cap.release()
+            result = {
+                "presence": True,
+                "activity": activity,
+                "confidence": float(activity_confidence)
+            }
+            if reduced and frames is not None:
+                result["fidelity"] = "reduced"
 
+            return result
+
+        except Exception as e:
+            print(f"Error analyzing video: {e}")
+            return self._no_presence_result(str(e))
+
+    def analyze_frames(self, frames) -> Dict:
+        """
+        Analyze frames that were already decoded, e.g. by another process.
+
+        Runs the full-fidelity pipeline without the feature cache, since
+        there is no file to hash.
+
+        Args:
+            frames: Sequence of BGR frames, or an (N, H, W, 3) uint8 array
+
+        Returns:
+            Dict with presence, activity, and confidence
+        """
+        try:
             if len(frames) < 10:
                 return self._no_presence_result("Insufficient frames")
 
-            # Detect presence
-            has_presence, presence_confidence = self._detect_presence(frames)
+            features = self._extract_presence_features(frames, self.frame_step)
+            has_presence, presence_confidence = self._detect_presence(features)
 
             if not has_presence:
                 return {
@@ -59,8 +156,8 @@ class VideoAnalyzer:
                     "confidence": float(presence_confidence)
                 }
 
-            # Classify activity
-            activity, activity_confidence = self._classify_activity(frames)
+            features.update(self._extract_motion_features(frames))
+            activity, activity_confidence = self._classify_activity(features)
 
             return {
                 "presence": True,
@@ -69,9 +166,29 @@ class VideoAnalyzer:
             }
 
         except Exception as e:
-            print(f"Error analyzing video: {e}")
+            print(f"Error analyzing video frames: {e}")
             return self._no_presence_result(str(e))
 
+    def _read_frames(self, video_path: str, max_frames: int) -> Optional[List[np.ndarray]]:
+        """Decode up to max_frames frames, or None if the video cannot be opened."""
+        cap = cv2.VideoCapture(video_path)
+
+        if not cap.isOpened():
+            return None
+
+        frames = []
+
+        # Read frames
+        while len(frames) < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+
+        cap.release()
+
+        return frames
+
     def _no_presence_result(self, reason: str = None) -> Dict:
         """Return standard no presence result."""
         return {
@@ -81,52 +198,136 @@ class VideoAnalyzer:
             "reason": reason
         }
 
-    def _detect_presence(self, frames: list) -> Tuple[bool, float]:
+    def _presence_config_tag(self) -> str:
         """
-        Placeholder presence detection using face detection.
+        Short tag of the detection settings, so cached ratios match the config.
 
-        Replace with trained model:
-        - Use MediaPipe Face/Pose detection
-        - Run baby detection CNN
-        - Check for baby-specific features (size, proportions)
+        The threshold is part of it because the full-resolution confirm only
+        runs within presence_ambiguity of it, so the ratio depends on both.
         """
-        face_count = 0
-        total_checked = 0
+        if self.model_backend.has_presence_model:
+            return f"{self.model_backend.model_tag}-{self.model_presence_threshold}"
 
-        # Check every 5th frame for efficiency
-        for i in range(0, len(frames), 5):
-            frame = frames[i]
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return "{}-{}-{}-{}-{}-{}-{}-{}".format(
+            self.presence_threshold,
+            self.presence_scale,
+            self.presence_ambiguity,
+            self.cascade_scale_factor,
+            self.cascade_min_neighbors,
+            self.cascade_min_size,
+            self.equalize_mode,
+            self.low_contrast_std
+        )
 
-            # Detect faces
-            faces = self.face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(30, 30)
-            )
+    def _normalize_contrast(self, gray: np.ndarray) -> np.ndarray:
+        """Equalize a grayscale frame only when its contrast is low."""
+        if self.equalize_mode == 'none' or gray.std() >= self.low_contrast_std:
+            return gray
 
-            if len(faces) > 0:
-                face_count += 1
-            total_checked += 1
+        if self.equalize_mode == 'hist':
+            return cv2.equalizeHist(gray)
 
-        # If faces detected in >30% of checked frames, consider baby present
-        presence_ratio = face_count / total_checked if total_checked > 0 else 0
-        has_presence = presence_ratio > 0.3
+        return self.clahe.apply(gray)
 
-        confidence = presence_ratio if has_presence else (1.0 - presence_ratio)
-        confidence = min(max(confidence, 0.6), 0.95)
+    def _has_face(self, gray: np.ndarray, scale: float) -> bool:
+        """Run the face cascade on a grayscale frame at the given scale."""
+        if scale < 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
 
-        return has_presence, confidence
+        gray = self._normalize_contrast(gray)
+        min_size = max(int(round(self.cascade_min_size * scale)), 1)
+
+        # Detect faces
+        faces = self.face_cascade.detectMultiScale(
+            gray,
+            scaleFactor=self.cascade_scale_factor,
+            minNeighbors=self.cascade_min_neighbors,
+            minSize=(min_size, min_size)
+        )
+
+        return len(faces) > 0
 
-    def _classify_activity(self, frames: list) -> Tuple[str, float]:
+    def _threshold(self, reduced: bool) -> float:
+        """Presence ratio a clip must exceed at the given fidelity."""
+        return self.reduced_presence_threshold if reduced else self.presence_threshold
+
+    def _extract_presence_features(self, frames: list, frame_step: int, threshold: Optional[float] = None) -> Dict:
         """
-        Placeholder activity classification.
+        Run face detection over sampled frames.
 
-        Replace with trained classifier:
-        - Use MediaPipe Pose landmarks
-        - Extract keypoint positions (eyes, limbs, torso)
-        - Classify: sleeping (closed eyes, horizontal), sitting (upright pose)
+        Detection runs on downscaled frames first. If the resulting presence
+        ratio lands within presence_ambiguity of threshold (presence_threshold
+        unless given), the sampled
+        frames are re-checked at full resolution, where small faces that fall
+        below the cascade window after downscaling can still be found and
+        downscaling artifacts are not counted as faces.
+
+        Returns:
+            JSON-serializable feature dict suitable for caching
+        """
+        if self.model_backend.has_presence_model:
+            return self._extract_model_presence_features(frames, frame_step)
+
+        scale = min(self.presence_scale, 1.0)
+        hits = []
+        grays = []
+
+        # Check every Nth frame for efficiency
+        for i in range(0, len(frames), frame_step):
+            gray = cv2.cvtColor(frames[i], cv2.COLOR_BGR2GRAY)
+            grays.append(gray)
+            hits.append(self._has_face(gray, scale))
+
+        total_checked = len(hits)
+        presence_ratio = sum(hits) / total_checked if total_checked > 0 else 0
+        full_res_checks = 0
+
+        # Near the threshold, both downscaled misses (small faces) and downscaled
+        # hits (false positives) can flip the decision, so every sampled frame
+        # is re-checked at full resolution
+        if threshold is None:
+            threshold = self.presence_threshold
+        ambiguous = abs(presence_ratio - threshold) <= self.presence_ambiguity
+        if scale < 1.0 and ambiguous:
+            hits = [self._has_face(gray, 1.0) for gray in grays]
+            full_res_checks = total_checked
+            presence_ratio = sum(hits) / total_checked
+
+        return {
+            "presence_ratio": float(presence_ratio),
+            "full_res_checks": full_res_checks
+        }
+
+    def _extract_model_presence_features(self, frames: list, frame_step: int) -> Dict:
+        """
+        Run the presence model on all sampled frames as one batch.
+
+        Returns:
+            JSON-serializable feature dict suitable for caching
+        """
+        width, height = self.model_backend.presence_input_size()
+        sampled = frames[::frame_step]
+
+        batch = np.empty((len(sampled), 3, height, width), dtype=np.float32)
+        for index, frame in enumerate(sampled):
+            resized = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+            rgb = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
+            batch[index] = rgb.transpose(2, 0, 1) / 255.0
+
+        probabilities = self.model_backend.predict_presence(batch)
+        presence_ratio = float(np.mean(probabilities > self.model_presence_threshold)) if len(sampled) else 0.0
+
+        return {
+            "presence_ratio": presence_ratio,
+            "full_res_checks": 0
+        }
+
+    def _extract_motion_features(self, frames: list) -> Dict:
+        """
+        Measure frame-to-frame motion.
+
+        Returns:
+            JSON-serializable feature dict suitable for caching
         """
         # Calculate motion between frames
         motion_scores = []
@@ -142,6 +343,37 @@ class VideoAnalyzer:
 
         avg_motion = np.mean(motion_scores) if motion_scores else 0
 
+        return {"avg_motion": float(avg_motion)}
+
+    def _detect_presence(self, features: Dict, threshold: Optional[float] = None) -> Tuple[bool, float]:
+        """
+        Presence decision from the fraction of sampled frames with a detection.
+
+        Detections come from the presence model when a model backend is
+        loaded, otherwise from the placeholder Haar face cascade.
+        """
+        # Baby present if faces were detected in more than threshold of checked frames
+        if threshold is None:
+            threshold = self.presence_threshold
+        presence_ratio = features["presence_ratio"]
+        has_presence = presence_ratio > threshold
+
+        confidence = presence_ratio if has_presence else (1.0 - presence_ratio)
+        confidence = min(max(confidence, 0.6), 0.95)
+
+        return has_presence, confidence
+
+    def _classify_activity(self, features: Dict) -> Tuple[str, float]:
+        """
+        Placeholder activity classification.
+
+        Replace with trained classifier:
+        - Use MediaPipe Pose landmarks
+        - Extract keypoint positions (eyes, limbs, torso)
+        - Classify: sleeping (closed eyes, horizontal), sitting (upright pose)
+        """
+        avg_motion = features["avg_motion"]
+
         # Simple heuristic: low motion = sleeping, high motion = sitting/active
         if avg_motion < self.motion_threshold:
             activity = "sleeping"
@@ -3,9 +3,11 @@ Flask Backend Server for Baby Monitor Application
 Provides REST API for audio/video analysis, notifications, and reporting
 """
 
+import atexit
 import os
 from datetime import datetime
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+from werkzeug.exceptions import HTTPException
 from flask_cors import CORS
 from dotenv import load_dotenv
 
@@ -13,17 +15,37 @@ from ai_modules.audio_analyzer import AudioAnalyzer
 from ai_modules.video_analyzer import VideoAnalyzer
 from services.notification_service import NotificationService
 from services.database_service import DatabaseService
+from services.admission_controller import AdmissionController, SUPERSEDED
+from services.analysis_scheduler import AnalysisScheduler, FULL, REDUCED
+from services.decision_engine import DecisionEngine
+from services.event_broadcaster import ALL_DEVICES, EventBroadcaster
+from services.report_codec import (
+    REPORT_SCHEMA_VERSION,
+    build_combined_message,
+    encode_report,
+    report_status,
+    summary_category,
+    summary_day
+)
+from services.retention_service import RetentionService
 from utils.file_handler import (
+    MAX_REQUEST_SIZE,
+    UploadBandwidthBudget,
+    UploadRequest,
+    UploadStream,
     init_upload_folder,
     save_uploaded_file,
     cleanup_file
 )
+from utils.response_encoding import encode_response
 
 # Load environment variables
 load_dotenv()
 
 # Initialize Flask app
 app = Flask(__name__)
+app.request_class = UploadRequest
+app.config['MAX_CONTENT_LENGTH'] = MAX_REQUEST_SIZE
 CORS(app)
 
 # Initialize services
@@ -31,10 +53,22 @@ audio_analyzer = AudioAnalyzer()
 video_analyzer = VideoAnalyzer()
 notification_service = NotificationService()
 database_service = DatabaseService()
+admission_controller = AdmissionController()
+analysis_scheduler = AnalysisScheduler()
+decision_engine = DecisionEngine()
+event_broadcaster = EventBroadcaster()
+upload_budget = UploadBandwidthBudget()
 
 # Initialize upload folder
 init_upload_folder()
 
+# Optionally run report retention in-process (or run services.retention_service from cron)
+retention_interval = float(os.getenv('RETENTION_JOB_INTERVAL', 0))
+if retention_interval > 0:
+    # The local store needs no service role key, and a second connection to its file would only contend
+    maintenance_service = database_service if database_service.local_store else DatabaseService(maintenance=True)
+    RetentionService(maintenance_service).start_background(retention_interval)
+
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -45,6 +79,118 @@ def health_check():
     })
 
 
+@app.route('/api/metrics/admission', methods=['GET'])
+def admission_metrics():
+    """Expose analysis admission state for monitoring and autoscaling."""
+    return jsonify(admission_controller.get_state()), 200
+
+
+@app.route('/api/metrics/scheduler', methods=['GET'])
+def scheduler_metrics():
+    """Expose per-device analysis scheduling state."""
+    return jsonify(analysis_scheduler.get_state()), 200
+
+
+@app.route('/api/metrics/decisions', methods=['GET'])
+def decision_metrics():
+    """Expose per-device smoothed scores and states."""
+    return jsonify(decision_engine.get_state()), 200
+
+
+@app.route('/api/metrics/events', methods=['GET'])
+def events_metrics():
+    """Expose dashboard event subscriber counts."""
+    return jsonify(event_broadcaster.get_state()), 200
+
+
+@app.route('/api/events', methods=['GET'])
+def events():
+    """
+    Server-sent event stream of new reports and daily summary deltas.
+
+    Query params:
+    - device_id: only events for this device (defaults to all devices)
+
+    Events: `report` (saved report), `summary_delta` (one detection to add to
+    the daily summary) and `resync` (the client fell behind and should refetch).
+    """
+    subscriber = event_broadcaster.subscribe(request.args.get('device_id', ALL_DEVICES))
+
+    response = Response(event_broadcaster.stream(subscriber), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def publish_detection(device_id: str, report: dict, timestamp: datetime):
+    """Push a saved report and its daily summary delta to dashboards."""
+    event_broadcaster.publish(device_id, 'report', report)
+
+    compact = encode_report(report)
+    category = summary_category(compact)
+    if category:
+        event_broadcaster.publish(device_id, 'summary_delta', {
+            "date": summary_day(timestamp),
+            "category": category,
+            "detections": 1,
+            "seconds": compact['duration_seconds']
+        })
+
+
+def save_segment(device_id: str, segment: dict, notification_result: dict = None) -> dict:
+    """
+    Save a state segment from the decision engine and push it to dashboards.
+
+    The stored confidences are the engine's smoothed scores, not a single
+    analyzer result, so they can fall outside the analyzers' clamp.
+    """
+    audio_result = segment['audio_result']
+    video_result = segment['video_result']
+
+    combined_message = None
+    if report_status(audio_result, video_result) == 'cry':
+        combined_message = build_combined_message(audio_result.get('reason'), video_result.get('activity'))
+
+    report_data = {
+        "timestamp": segment['timestamp'].isoformat(),
+        "device_id": device_id,
+        "audio_result": audio_result,
+        "video_result": video_result,
+        "combined_message": combined_message,
+        "duration_seconds": segment['duration_seconds'],
+        "notified": False,
+        "notification_status": None
+    }
+
+    if notification_result is not None:
+        report_data['notified'] = notification_result.get('delivered', False)
+        report_data['notification_status'] = notification_result
+
+    saved_report = database_service.save_report(report_data)
+    publish_detection(device_id, saved_report, segment['timestamp'])
+
+    return saved_report
+
+
+def flush_decision_segments():
+    """Save every device's unsaved state time, e.g. before the server exits."""
+    for device_id, segment in decision_engine.flush():
+        try:
+            save_segment(device_id, segment)
+        except Exception as e:
+            print(f"Error saving segment for {device_id}: {e}")
+
+
+# Devices that stop sending clips get their unsaved state time written out
+decision_engine.start_idle_flush(save_segment)
+atexit.register(flush_decision_segments)
+
+
+def get_device_id() -> str:
+    """Identify the sending device from the X-Device-Id header or device_id query arg."""
+    return request.headers.get('X-Device-Id') or request.args.get('device_id') or 'default'
+
+
 @app.route('/api/analyze', methods=['POST'])
 def analyze():
     """
@@ -58,12 +204,49 @@ def analyze():
     audio_path = None
     video_path = None
 
+    device_id = get_device_id()
+
+    # Enforce the declared size and per-device bandwidth before reading the body
+    if request.content_length is not None:
+        if request.content_length > MAX_REQUEST_SIZE:
+            return jsonify({"error": "Upload too large"}), 413
+
+        wait_seconds = upload_budget.try_consume(device_id, request.content_length)
+        if wait_seconds:
+            response = jsonify({"error": "Upload bandwidth budget exceeded for this device"})
+            response.status_code = 429
+            response.headers['Retry-After'] = str(wait_seconds)
+            return response
+
+    # Admit before touching the upload so a backlog never reaches the temp dir
+    outcome, ticket = admission_controller.admit(device_id)
+    if ticket is None:
+        # The body is not read, so a shed request does not count against the device
+        if request.content_length is not None:
+            upload_budget.refund(device_id, request.content_length)
+
+        if outcome == SUPERSEDED:
+            response = jsonify({"error": "Superseded by a newer clip from this device"})
+            response.status_code = 429
+        else:
+            response = jsonify({"error": "Server busy, retry later"})
+            response.status_code = 503
+        response.headers['Retry-After'] = str(admission_controller.retry_after())
+        return response
+
     try:
-        # Get files from request
+        # Get files from request (streamed to disk with size and type checks)
         audio_file = request.files.get('audio')
         video_file = request.files.get('video')
         timestamp_str = request.form.get('timestamp')
 
+        # Chunked uploads have no Content-Length, so charge what was received
+        if request.content_length is None:
+            upload_budget.charge(device_id, sum(
+                f.stream.bytes_written for f in request.files.values()
+                if isinstance(f.stream, UploadStream)
+            ))
+
         if not audio_file or not video_file:
             return jsonify({
                 "error": "Both audio and video files are required"
@@ -88,11 +271,14 @@ def analyze():
             cleanup_file(audio_path)
             return jsonify({"error": video_error}), 400
 
+        # Stable devices get a cheaper analysis; the analyzers escalate on energy spikes
+        fidelity = analysis_scheduler.plan(device_id)
+
         # Analyze audio
-        audio_result = audio_analyzer.analyze(audio_path)
+        audio_result = audio_analyzer.analyze(audio_path, reduced=fidelity == REDUCED)
 
         # Analyze video
-        video_result = video_analyzer.analyze(video_path)
+        video_result = video_analyzer.analyze(video_path, reduced=fidelity == REDUCED)
 
         # Combine results
         response = combine_results(
@@ -101,33 +287,48 @@ def analyze():
             timestamp
         )
 
-        # Save to database
-        report_data = {
-            "timestamp": timestamp.isoformat(),
-            "audio_result": audio_result,
-            "video_result": video_result,
-            "combined_message": response.get('combined_message'),
-            "notified": False,
-            "notification_status": None
-        }
-
-        # Send notification if crying detected
-        if response.get('status') == 'cry' and video_result.get('presence'):
-            notification_result = notification_service.send_cry_alert(
-                cry_reason=response.get('cry_reason'),
-                activity=response.get('activity'),
-                timestamp=timestamp
-            )
-
-            report_data['notified'] = notification_result.get('delivered', False)
-            report_data['notification_status'] = notification_result
-
-        # Save report
-        saved_report = database_service.save_report(report_data)
-        response['report_id'] = saved_report.get('id')
+        # Confirm a state change seen at reduced fidelity with a full analysis
+        if fidelity == REDUCED and analysis_scheduler.is_state_change(device_id, response):
+            fidelity = FULL
+            audio_result = audio_analyzer.analyze(audio_path)
+            video_result = video_analyzer.analyze(video_path)
+            response = combine_results(audio_result, video_result, timestamp)
+
+        analysis_scheduler.record(device_id, response, fidelity)
+
+        # Smooth over recent clips so a single noisy clip cannot flip the state
+        decision = decision_engine.update(device_id, audio_result, video_result, timestamp)
+        response = combine_results(decision['audio_result'], decision['video_result'], timestamp)
+        response['fidelity'] = fidelity
+        response['changed'] = decision['changed']
+        response['started_crying'] = decision['started_crying']
+        response['notified'] = False
+        response['report_id'] = None
+
+        # Only state changes and periodic heartbeats are saved and pushed
+        segments = decision['segments']
+        for index, segment in enumerate(segments):
+            notification_result = None
+
+            # Send notification only when the baby starts crying
+            if decision['started_crying'] and index == len(segments) - 1:
+                notification_result = notification_service.send_cry_alert(
+                    cry_reason=response.get('cry_reason'),
+                    activity=response.get('activity'),
+                    timestamp=timestamp
+                )
+                response['notified'] = notification_result.get('delivered', False)
+
+            saved_report = save_segment(device_id, segment, notification_result)
+            response['report_id'] = saved_report.get('id')
 
         return jsonify(response), 200
 
+    except HTTPException as e:
+        # Upload rejected while streaming (413 too large, 415 unknown container).
+        # Partial uploads are deleted when the request is closed.
+        return jsonify({"error": e.description}), e.code
+
     except Exception as e:
         print(f"Error in analyze endpoint: {e}")
         return jsonify({
@@ -139,6 +340,7 @@ def analyze():
         # Clean up temporary files
         cleanup_file(audio_path)
         cleanup_file(video_path)
+        ticket.release()
 
 
 def combine_results(audio_result: dict, video_result: dict, timestamp: datetime) -> dict:
@@ -167,10 +369,7 @@ def combine_results(audio_result: dict, video_result: dict, timestamp: datetime)
         cry_confidence = audio_result.get('confidence', 0)
 
         # Build combined message
-        combined_message = f"Baby crying due to {cry_reason}"
-        if activity:
-            combined_message += f" while {activity}"
-        combined_message += "."
+        combined_message = build_combined_message(cry_reason, activity)
 
         response['status'] = 'cry'
         response['cry_reason'] = cry_reason
@@ -188,21 +387,36 @@ def combine_results(audio_result: dict, video_result: dict, timestamp: datetime)
     return response
 
 
+def wants_compact() -> bool:
+    """Whether the client asked for compact report rows (?format=compact)."""
+    return request.args.get('format') == 'compact'
+
+
 @app.route('/api/reports', methods=['GET'])
 def get_reports():
-    """Get paginated list of reports."""
+    """
+    Get paginated list of reports.
+
+    Returns the legacy JSON shape unless ?format=compact is given. Honors
+    Accept: application/msgpack and Accept-Encoding: gzip.
+    """
     try:
         limit = int(request.args.get('limit', 50))
         offset = int(request.args.get('offset', 0))
+        compact = wants_compact()
 
-        reports = database_service.get_reports(limit=limit, offset=offset)
+        reports = database_service.get_reports(limit=limit, offset=offset, compact=compact)
 
-        return jsonify({
+        payload = {
             "reports": reports,
             "limit": limit,
             "offset": offset,
             "count": len(reports)
-        }), 200
+        }
+        if compact:
+            payload["schema"] = REPORT_SCHEMA_VERSION
+
+        return encode_response(payload)
 
     except Exception as e:
         return jsonify({
@@ -215,12 +429,12 @@ def get_reports():
 def get_report(report_id):
     """Get single report by ID."""
     try:
-        report = database_service.get_report_by_id(report_id)
+        report = database_service.get_report_by_id(report_id, compact=wants_compact())
 
         if not report:
             return jsonify({"error": "Report not found"}), 404
 
-        return jsonify(report), 200
+        return encode_response(report)
 
     except Exception as e:
         return jsonify({
@@ -0,0 +1,248 @@
+"""
+Presence Detection Benchmark - Accuracy vs CPU for multi-resolution settings
+
+Usage (from backend/):
+    python -m benchmarks.presence_benchmark
+    python -m benchmarks.presence_benchmark --face-image face.jpg
+    python -m benchmarks.presence_benchmark --data clips/
+
+The synthetic set is generated in memory: "absent" clips are noise and
+gradient textures, face clips paste a face at random sizes, positions and
+contrast levels, either in every frame or only in some (covered for part of
+the clip, or moving in and out of view) so that presence ratios also land
+near the threshold, where the full-resolution confirm runs. The face is a drawn frontal-face template (shaded oval,
+brows, eyes, nose bridge, mouth) unless --face-image gives a photo. --data
+points at a directory with present/ and absent/ subdirectories of recorded
+clips.
+"""
+
+import argparse
+import os
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+import cv2
+import numpy as np
+
+from ai_modules.feature_cache import FeatureCache
+from ai_modules.video_analyzer import VideoAnalyzer
+
+FRAME_WIDTH = 640
+FRAME_HEIGHT = 480
+FRAMES_PER_CLIP = 120
+PRESENCE_THRESHOLD = 0.3  # VideoAnalyzer.presence_threshold
+
+# static: in every frame; intermittent: one stretch of 10-60% of the frames;
+# moving: slides in and out of view; small: static at 30-200 px wide
+FACE_KINDS = ("static", "intermittent", "moving", "small")
+
+CONFIGS = [
+    {"name": "full-res", "presence_scale": 1.0, "equalize_mode": "none"},
+    {"name": "0.5x", "presence_scale": 0.5, "presence_ambiguity": -1.0, "equalize_mode": "none"},
+    {"name": "0.5x+confirm", "presence_scale": 0.5, "equalize_mode": "none"},
+    {"name": "0.5x+confirm+hist", "presence_scale": 0.5, "equalize_mode": "hist"},
+    {"name": "0.5x+confirm+clahe", "presence_scale": 0.5, "equalize_mode": "clahe"},
+    {"name": "0.375x+confirm+clahe", "presence_scale": 0.375, "equalize_mode": "clahe"},
+]
+
+
+def draw_face(size: int = 200) -> np.ndarray:
+    """Draw a frontal face template that the Haar face cascade detects."""
+    height, width = int(size * 1.25), size
+    face = np.full((height, width), 120, dtype=np.uint8)
+    center = (width // 2, height // 2)
+
+    cv2.ellipse(face, center, (int(width * 0.42), int(height * 0.45)), 0, 0, 360, 190, -1)
+
+    eye_y = int(height * 0.40)
+    for side in (-1, 1):
+        eye_x = center[0] + side * int(width * 0.20)
+        cv2.ellipse(face, (eye_x, int(height * 0.31)), (int(width * 0.13), int(height * 0.02)), 0, 0, 360, 70, -1)
+        cv2.ellipse(face, (eye_x, eye_y), (int(width * 0.11), int(height * 0.045)), 0, 0, 360, 50, -1)
+
+    cv2.rectangle(face, (center[0] - int(width * 0.05), eye_y),
+                  (center[0] + int(width * 0.05), int(height * 0.62)), 220, -1)
+    cv2.ellipse(face, (center[0], int(height * 0.64)), (int(width * 0.08), int(height * 0.02)), 0, 0, 360, 110, -1)
+    cv2.ellipse(face, (center[0], int(height * 0.75)), (int(width * 0.16), int(height * 0.035)), 0, 0, 360, 80, -1)
+
+    face = cv2.GaussianBlur(face, (0, 0), size / 60)
+    return cv2.cvtColor(face, cv2.COLOR_GRAY2BGR)
+
+
+def _background(rng: np.random.Generator) -> np.ndarray:
+    """Random noise or gradient background frame."""
+    if rng.random() < 0.5:
+        frame = rng.integers(0, 256, (FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8)
+        return cv2.GaussianBlur(frame, (9, 9), 0)
+
+    gradient = np.linspace(0, 255, FRAME_WIDTH, dtype=np.float32)
+    frame = np.tile(gradient, (FRAME_HEIGHT, 1))
+    frame = np.stack([frame] * 3, axis=-1)
+    return frame.astype(np.uint8)
+
+
+def _prepare_face(rng: np.random.Generator, face: np.ndarray, min_width: int = 40) -> np.ndarray:
+    """Resize a face to a random width and blend it toward gray at a random contrast."""
+    width = int(rng.integers(min_width, 200))
+    height = min(int(width * face.shape[0] / face.shape[1]), FRAME_HEIGHT - 1)
+    resized = cv2.resize(face, (width, height), interpolation=cv2.INTER_AREA)
+    contrast = float(rng.uniform(0.1, 1.0))
+    return (resized.astype(np.float32) * contrast + 128 * (1 - contrast)).astype(np.uint8)
+
+
+def _face_positions(rng: np.random.Generator, kind: str, width: int, height: int) -> List:
+    """Top-left corner of the face in each frame, or None where it is not fully visible."""
+    x = int(rng.integers(0, FRAME_WIDTH - width))
+    y = int(rng.integers(0, FRAME_HEIGHT - height))
+
+    if kind == "static":
+        return [(x, y)] * FRAMES_PER_CLIP
+
+    if kind == "intermittent":
+        # Visible for one stretch of the clip (the baby turns away or is covered)
+        visible = int(rng.uniform(0.1, 0.6) * FRAMES_PER_CLIP)
+        first = int(rng.integers(0, FRAMES_PER_CLIP - visible + 1))
+        return [(x, y) if first <= index < first + visible else None for index in range(FRAMES_PER_CLIP)]
+
+    # "moving": slides horizontally across the frame, entering and leaving it
+    travel = FRAME_WIDTH + width
+    speed = travel / FRAMES_PER_CLIP * float(rng.uniform(1.0, 3.0))
+    offset = float(rng.uniform(0, travel))
+    positions = []
+    for index in range(FRAMES_PER_CLIP):
+        left = int((offset + speed * index) % travel) - width
+        positions.append((left, y) if 0 <= left <= FRAME_WIDTH - width else None)
+    return positions
+
+
+def _synthetic_clip(rng: np.random.Generator, face: np.ndarray = None,
+                    kind: str = "static") -> Tuple[List[np.ndarray], bool]:
+    """
+    Build one clip, optionally with a face, and its label.
+
+    A face clip is labeled present when the face is fully visible in more
+    than presence_threshold of its frames, the decision a perfect per-frame
+    detector would make.
+    """
+    base = _background(rng)
+    positions = [None] * FRAMES_PER_CLIP
+
+    if face is not None:
+        face = _prepare_face(rng, face, min_width=30 if kind == "small" else 40)
+        positions = _face_positions(rng, "static" if kind == "small" else kind, face.shape[1], face.shape[0])
+
+    frames = []
+    for position in positions:
+        frame = base.copy()
+        if position is not None:
+            x, y = position
+            frame[y:y + face.shape[0], x:x + face.shape[1]] = face
+        noise = rng.integers(-3, 4, frame.shape, dtype=np.int16)
+        frames.append(np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8))
+
+    visible = sum(position is not None for position in positions) / FRAMES_PER_CLIP
+    return frames, visible > PRESENCE_THRESHOLD
+
+
+def synthetic_dataset(count: int, face_image: str = None, seed: int = 0) -> Iterator[Tuple[List, bool]]:
+    """
+    Generate labeled synthetic clips: count absent, and count of each face kind.
+
+    Clips are yielded one at a time (the same clips for the same seed), since
+    the whole set does not fit in memory.
+    """
+    rng = np.random.default_rng(seed)
+    face = cv2.imread(face_image) if face_image else draw_face()
+
+    if face is None:
+        raise ValueError(f"Could not read face image {face_image}")
+
+    for _ in range(count):
+        yield _synthetic_clip(rng)
+    for kind in FACE_KINDS:
+        for _ in range(count):
+            yield _synthetic_clip(rng, face, kind)
+
+
+def recorded_dataset(data_dir: str, analyzer: VideoAnalyzer) -> List[Tuple[List, bool]]:
+    """Load labeled clips from data_dir/present and data_dir/absent."""
+    dataset = []
+
+    for label, present in (("present", True), ("absent", False)):
+        label_dir = os.path.join(data_dir, label)
+        if not os.path.isdir(label_dir):
+            continue
+
+        for name in sorted(os.listdir(label_dir)):
+            frames = analyzer._read_frames(os.path.join(label_dir, name), analyzer.max_frames)
+            if frames and len(frames) >= 10:
+                dataset.append((frames, present))
+
+    return dataset
+
+
+def run_config(config: Dict, dataset: Callable[[], Iterable[Tuple[List, bool]]]) -> Dict:
+    """Score one configuration over a fresh pass of the dataset with a fresh analyzer."""
+    analyzer = VideoAnalyzer(feature_cache=FeatureCache(max_entries=0))
+    for key, value in config.items():
+        if key != "name":
+            setattr(analyzer, key, value)
+
+    clips = 0
+    correct = 0
+    full_res_checks = 0
+    cpu_seconds = 0.0
+
+    # Only detection is timed, not generating the synthetic clips
+    for frames, present in dataset():
+        cpu_start = time.process_time()
+        features = analyzer._extract_presence_features(frames, analyzer.frame_step)
+        has_presence, _ = analyzer._detect_presence(features)
+        cpu_seconds += time.process_time() - cpu_start
+
+        clips += 1
+        correct += int(has_presence == present)
+        full_res_checks += features["full_res_checks"]
+
+    return {
+        "name": config["name"],
+        "clips": clips,
+        "accuracy": correct / clips if clips else 0.0,
+        "cpu_ms_per_clip": 1000 * cpu_seconds / clips if clips else 0.0,
+        "full_res_checks": full_res_checks
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--data', help='Directory with present/ and absent/ clips')
+    parser.add_argument('--face-image', help='Face photo for synthetic present clips (default: drawn template)')
+    parser.add_argument('--clips', type=int, default=20, help='Synthetic clips per kind (absent and each face kind)')
+    args = parser.parse_args()
+
+    # Single-threaded OpenCV keeps CPU numbers comparable between configs
+    cv2.setNumThreads(1)
+
+    analyzer = VideoAnalyzer(feature_cache=FeatureCache(max_entries=0))
+
+    if args.data:
+        recorded = recorded_dataset(args.data, analyzer)
+        dataset = lambda: recorded
+        count = len(recorded)
+    else:
+        dataset = lambda: synthetic_dataset(args.clips, args.face_image)
+        count = args.clips * (1 + len(FACE_KINDS))
+
+    print(f"{count} clips, every {analyzer.frame_step}th frame checked")
+    print(f"{'config':<24}{'accuracy':>10}{'cpu ms/clip':>14}{'full-res checks':>18}")
+
+    for config in CONFIGS:
+        result = run_config(config, dataset)
+        print(
+            f"{result['name']:<24}{result['accuracy']:>10.3f}"
+            f"{result['cpu_ms_per_clip']:>14.1f}{result['full_res_checks']:>18}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Shared Frames Benchmark - Pickled queue transfer vs shared-memory descriptors
+
+Usage (from backend/):
+    python -m benchmarks.shared_frames_benchmark
+    python -m benchmarks.shared_frames_benchmark --clips 50 --frames 120
+
+Each clip (frames of 640x480x3 plus 4s of 16kHz float32 PCM) is handed to a
+worker process that touches every frame and replies with a checksum. The
+"pickle" path puts the arrays on a multiprocessing queue; the "shm" path
+copies them into a SharedFrameRing slot and sends only the descriptor.
+Timings are wall-clock round trips, so they include the copy into the slot.
+"""
+
+import argparse
+import multiprocessing
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from utils.shared_frames import SharedFrameRing
+
+FRAME_WIDTH = 640
+FRAME_HEIGHT = 480
+AUDIO_SAMPLES = 4 * 16000
+
+
+def _checksum(frames, audio) -> float:
+    """Read one pixel of every frame so the transfer cannot be skipped."""
+    return float(sum(int(frame[0, 0, 0]) for frame in frames) + float(audio[0]))
+
+
+def _pickle_worker(task_queue, result_queue):
+    """Receive whole arrays over the queue."""
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        frames, audio = task
+        result_queue.put(_checksum(frames, audio))
+
+
+def _shm_worker(task_queue, result_queue, video_name, audio_name, slots, video_bytes, audio_bytes):
+    """Receive descriptors and read the arrays from shared memory."""
+    video_ring = SharedFrameRing(slots, video_bytes, name=video_name)
+    audio_ring = SharedFrameRing(slots, audio_bytes, name=audio_name)
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        video_descriptor, audio_descriptor = task
+        frames = video_ring.view(video_descriptor)
+        audio = audio_ring.view(audio_descriptor)
+        result = _checksum(frames, audio)
+        del frames, audio
+        result_queue.put(result)
+
+    video_ring.close()
+    audio_ring.close()
+
+
+def _clip(rng: np.random.Generator, frame_count: int):
+    """One decoded clip as the decoder returns it: a list of frames and a PCM array."""
+    base = rng.integers(0, 256, (FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8)
+    frames = [np.roll(base, i, axis=1) for i in range(frame_count)]
+    audio = rng.standard_normal(AUDIO_SAMPLES).astype(np.float32)
+    return frames, audio
+
+
+def run_pickle(context, clips: List) -> Dict:
+    """Round-trip clips by pickling them through a queue."""
+    tasks, results = context.Queue(), context.Queue()
+    worker = context.Process(target=_pickle_worker, args=(tasks, results))
+    worker.start()
+
+    start = time.perf_counter()
+    for frames, audio in clips:
+        tasks.put((frames, audio))
+        results.get()
+    elapsed = time.perf_counter() - start
+
+    tasks.put(None)
+    worker.join()
+
+    return {"name": "pickle", "ms_per_clip": 1000 * elapsed / len(clips)}
+
+
+def run_shared(context, clips: List, frame_count: int) -> Dict:
+    """Round-trip clips through a shared-memory ring and descriptors."""
+    slots = 1
+    video_bytes = frame_count * FRAME_HEIGHT * FRAME_WIDTH * 3
+    audio_bytes = AUDIO_SAMPLES * 4
+    video_ring = SharedFrameRing(slots, video_bytes)
+    audio_ring = SharedFrameRing(slots, audio_bytes)
+
+    tasks, results = context.Queue(), context.Queue()
+    worker = context.Process(
+        target=_shm_worker,
+        args=(tasks, results, video_ring.name, audio_ring.name, slots, video_bytes, audio_bytes)
+    )
+    worker.start()
+
+    start = time.perf_counter()
+    for frames, audio in clips:
+        video_slot = video_ring.acquire()
+        audio_slot = audio_ring.acquire()
+
+        shape = (len(frames), FRAME_HEIGHT, FRAME_WIDTH, 3)
+        target = video_ring.slot_array(video_slot, shape, np.uint8)
+        for index, frame in enumerate(frames):
+            target[index] = frame
+        del target
+
+        tasks.put((
+            video_ring.describe(video_slot, shape, np.uint8),
+            audio_ring.write(audio_slot, audio)
+        ))
+        results.get()
+
+        video_ring.release(video_slot)
+        audio_ring.release(audio_slot)
+    elapsed = time.perf_counter() - start
+
+    tasks.put(None)
+    worker.join()
+
+    for ring in (video_ring, audio_ring):
+        ring.close()
+        ring.unlink()
+
+    return {"name": "shm", "ms_per_clip": 1000 * elapsed / len(clips)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clips', type=int, default=20, help='Clips to transfer')
+    parser.add_argument('--frames', type=int, default=120, help='Frames per clip')
+    parser.add_argument('--start-method', default='spawn', help='multiprocessing start method')
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context(args.start_method)
+    rng = np.random.default_rng(0)
+    clips = [_clip(rng, args.frames) for _ in range(args.clips)]
+
+    clip_mb = (args.frames * FRAME_HEIGHT * FRAME_WIDTH * 3 + AUDIO_SAMPLES * 4) / 1024 / 1024
+    print(f"{args.clips} clips of {args.frames} frames ({clip_mb:.1f}MB each)")
+    print(f"{'transfer':<12}{'ms/clip':>10}")
+
+    for result in (run_pickle(context, clips), run_shared(context, clips, args.frames)):
+        print(f"{result['name']:<12}{result['ms_per_clip']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+Admission Controller - Bounded in-flight budget for analysis requests
+Sheds load when the server falls behind instead of queueing without limit.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+ADMITTED = 'admitted'
+REJECTED = 'rejected'
+SUPERSEDED = 'superseded'
+
+
+class AdmissionTicket:
+    def __init__(self, controller: 'AdmissionController', device_id: str):
+        """Handle for an admitted analysis; release it when the work is done."""
+        self.controller = controller
+        self.device_id = device_id
+        self.released = False
+        self.started_at = time.monotonic()
+
+    def release(self):
+        """Return the slot to the budget (idempotent)."""
+        if not self.released:
+            self.released = True
+            self.controller._release(self)
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_in_flight: Optional[int] = None,
+        max_waiting: Optional[int] = None,
+        wait_timeout: Optional[float] = None
+    ):
+        """
+        Initialize admission controller.
+
+        Args:
+            max_in_flight: Analyses allowed to run concurrently
+            max_waiting: Requests allowed to wait for a slot before rejecting
+            wait_timeout: Seconds a request may wait for a slot
+        """
+        if max_in_flight is None:
+            max_in_flight = int(os.getenv('ANALYZE_MAX_IN_FLIGHT', 4))
+        if max_waiting is None:
+            max_waiting = int(os.getenv('ANALYZE_MAX_WAITING', max_in_flight * 2))
+        if wait_timeout is None:
+            wait_timeout = float(os.getenv('ANALYZE_WAIT_TIMEOUT', 2.0))
+
+        self.max_in_flight = max_in_flight
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+
+        self._cond = threading.Condition()
+        self._sequence = 0
+        self._latest: Dict[str, int] = {}
+        self._in_flight = 0
+        self._waiting = 0
+        self._totals = {ADMITTED: 0, REJECTED: 0, SUPERSEDED: 0}
+        self._latency_ema = 0.0
+
+    def admit(self, device_id: str):
+        """
+        Wait for an analysis slot.
+
+        Only the newest clip per device keeps waiting; an older waiting clip
+        from the same device is shed as soon as a newer one arrives.
+
+        Args:
+            device_id: Device that sent the clip
+
+        Returns:
+            Tuple of (outcome, ticket) where ticket is set only when admitted
+        """
+        with self._cond:
+            # A clip replacing this device's waiting clip takes its place in
+            # the queue, so only clips from devices not yet waiting can be
+            # turned away for a full queue
+            replacing = device_id in self._latest
+            if not replacing and self._in_flight >= self.max_in_flight and self._waiting >= self.max_waiting:
+                self._totals[REJECTED] += 1
+                return REJECTED, None
+
+            self._sequence += 1
+            sequence = self._sequence
+            self._latest[device_id] = sequence
+
+            # Wake older waiters from this device so they can step aside
+            self._cond.notify_all()
+
+            deadline = time.monotonic() + self.wait_timeout
+            self._waiting += 1
+
+            try:
+                while True:
+                    if self._latest.get(device_id) != sequence:
+                        self._totals[SUPERSEDED] += 1
+                        return SUPERSEDED, None
+
+                    if self._in_flight < self.max_in_flight:
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        del self._latest[device_id]
+                        self._totals[REJECTED] += 1
+                        return REJECTED, None
+
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+
+            self._in_flight += 1
+            self._totals[ADMITTED] += 1
+            del self._latest[device_id]
+
+            return ADMITTED, AdmissionTicket(self, device_id)
+
+    def _release(self, ticket: AdmissionTicket):
+        """Free a slot and record how long the analysis took."""
+        elapsed = time.monotonic() - ticket.started_at
+
+        with self._cond:
+            self._in_flight -= 1
+            self._latency_ema = elapsed if self._latency_ema == 0 else \
+                0.8 * self._latency_ema + 0.2 * elapsed
+            self._cond.notify_all()
+
+    def retry_after(self) -> int:
+        """Suggested Retry-After in seconds based on current backlog."""
+        with self._cond:
+            backlog = self._in_flight + self._waiting
+            per_slot = self._latency_ema or 1.0
+            seconds = per_slot * backlog / max(self.max_in_flight, 1)
+
+        return max(1, int(round(seconds)))
+
+    def get_state(self) -> Dict:
+        """Snapshot of the admission state for monitoring and autoscaling."""
+        with self._cond:
+            return {
+                "in_flight": self._in_flight,
+                "waiting": self._waiting,
+                "max_in_flight": self.max_in_flight,
+                "max_waiting": self.max_waiting,
+                "utilization": round(self._in_flight / max(self.max_in_flight, 1), 3),
+                "avg_analysis_seconds": round(self._latency_ema, 3),
+                "admitted_total": self._totals[ADMITTED],
+                "rejected_total": self._totals[REJECTED],
+                "superseded_total": self._totals[SUPERSEDED]
+            }
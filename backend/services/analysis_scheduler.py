@@ -0,0 +1,109 @@
+"""
+Analysis Scheduler - Per-device analysis fidelity based on recent state
+Drops to cheap gate checks while a device is stable and returns to full
+analysis as soon as something changes.
+"""
+
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+FULL = 'full'
+REDUCED = 'reduced'
+
+
+class AnalysisScheduler:
+    def __init__(self, stable_clips: Optional[int] = None, refresh_clips: Optional[int] = None):
+        """
+        Initialize analysis scheduler.
+
+        Args:
+            stable_clips: Consecutive identical outcomes before reducing fidelity
+            refresh_clips: Reduced clips between forced full analyses
+        """
+        if stable_clips is None:
+            stable_clips = int(os.getenv('ANALYSIS_STABLE_CLIPS', 15))  # ~1 minute
+        if refresh_clips is None:
+            refresh_clips = int(os.getenv('ANALYSIS_REFRESH_CLIPS', 10))
+
+        self.stable_clips = stable_clips
+        self.refresh_clips = refresh_clips
+        self._devices: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _state_key(response: Dict) -> Tuple:
+        """Reduce a combined result to the state that matters for scheduling."""
+        return response.get('status'), response.get('activity')
+
+    def plan(self, device_id: str) -> str:
+        """
+        Choose the fidelity for the next clip from a device.
+
+        Args:
+            device_id: Device that sent the clip
+
+        Returns:
+            FULL or REDUCED
+        """
+        with self._lock:
+            device = self._devices.get(device_id)
+
+            if device is None or self.stable_clips <= 0:
+                return FULL
+
+            # Never reduce while crying; alerts depend on full analysis
+            if device['state'][0] == 'cry':
+                return FULL
+
+            if device['stable_count'] < self.stable_clips:
+                return FULL
+
+            if device['since_full'] >= self.refresh_clips:
+                return FULL
+
+            return REDUCED
+
+    def is_state_change(self, device_id: str, response: Dict) -> bool:
+        """Whether a combined result differs from the device's last known state."""
+        with self._lock:
+            device = self._devices.get(device_id)
+            return device is None or device['state'] != self._state_key(response)
+
+    def record(self, device_id: str, response: Dict, fidelity: str):
+        """
+        Record the outcome of an analysis.
+
+        Args:
+            device_id: Device that sent the clip
+            response: Result of combine_results
+            fidelity: Fidelity the clip was analyzed at
+        """
+        state = self._state_key(response)
+
+        with self._lock:
+            device = self._devices.get(device_id)
+
+            if device is None or device['state'] != state:
+                self._devices[device_id] = {
+                    "state": state,
+                    "stable_count": 1,
+                    "since_full": 0 if fidelity == FULL else 1
+                }
+                return
+
+            device['stable_count'] += 1
+            device['since_full'] = 0 if fidelity == FULL else device['since_full'] + 1
+
+    def get_state(self) -> Dict:
+        """Snapshot of per-device scheduling state."""
+        with self._lock:
+            return {
+                device_id: {
+                    "status": device['state'][0],
+                    "activity": device['state'][1],
+                    "stable_count": device['stable_count'],
+                    "stable": device['stable_count'] >= self.stable_clips
+                }
+                for device_id, device in self._devices.items()
+            }
@@ -0,0 +1,370 @@
+"""
+Analysis Workers - Process pool for audio/video analysis past the GIL
+The calling process decodes clips directly into shared-memory rings and
+sends only slot descriptors to the workers, which analyze zero-copy views
+of the same memory. Slots are recycled once a worker has replied.
+"""
+
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from typing import Dict, Optional
+
+import cv2
+import librosa
+import numpy as np
+
+from utils.shared_frames import SharedFrameRing
+
+AUDIO = 'audio'
+VIDEO = 'video'
+
+NO_JOB = -1
+
+
+def _error_result(kind: str, reason: str) -> Dict:
+    """Analyzer-style error result for a clip that could not be analyzed."""
+    if kind == VIDEO:
+        return {"presence": False, "activity": None, "confidence": 0.0, "reason": reason}
+    return {"status": "error", "reason": None, "confidence": 0.0, "error": reason}
+
+
+def _worker_main(index: int, running, task_queue, result_queue, video_ring_name: str, audio_ring_name: str,
+                 video_slot_bytes: int, audio_slot_bytes: int, slots: int):
+    """Worker process loop: attach to the rings and analyze descriptors until told to stop."""
+    # Imported here so the parent does not load model sessions it never uses
+    from ai_modules.audio_analyzer import AudioAnalyzer
+    from ai_modules.feature_cache import FeatureCache
+    from ai_modules.video_analyzer import VideoAnalyzer
+
+    # Decoded arrays have no content hash, so workers skip the feature cache
+    no_cache = FeatureCache(max_entries=0, cache_dir='')
+    analyzers = {
+        AUDIO: AudioAnalyzer(feature_cache=no_cache),
+        VIDEO: VideoAnalyzer(feature_cache=no_cache)
+    }
+    rings = {
+        AUDIO: SharedFrameRing(slots, audio_slot_bytes, name=audio_ring_name),
+        VIDEO: SharedFrameRing(slots, video_slot_bytes, name=video_ring_name)
+    }
+
+    try:
+        while True:
+            task = task_queue.get()
+            if task is None:
+                break
+
+            job_id, kind, descriptor = task
+            # Written straight to shared memory, so the pool can reclaim the
+            # job's slot even if this process is killed before it replies
+            running[index] = job_id
+            data = rings[kind].view(descriptor)
+
+            if kind == VIDEO:
+                result = analyzers[VIDEO].analyze_frames(data)
+            else:
+                result = analyzers[AUDIO].analyze_samples(data)
+
+            # Drop the view before replying; the slot is reused as soon as we do
+            del data
+            result_queue.put((job_id, result))
+
+            # Cleared only after replying, so a crash in between cannot lose the job
+            running[index] = NO_JOB
+    finally:
+        for ring in rings.values():
+            ring.close()
+
+
+class AnalysisWorkerPool:
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        slots: Optional[int] = None,
+        frame_width: Optional[int] = None,
+        frame_height: Optional[int] = None,
+        max_frames: int = 120,
+        sample_rate: int = 16000,
+        audio_seconds: float = 4.0
+    ):
+        """
+        Start analysis worker processes and their shared-memory rings.
+
+        Args:
+            workers: Number of worker processes
+            slots: Clips of each kind that can be in flight at once
+            frame_width: Largest frame width a video slot holds
+            frame_height: Largest frame height a video slot holds
+            max_frames: Frames decoded per video clip
+            sample_rate: PCM sample rate handed to the audio analyzer
+            audio_seconds: Seconds of audio decoded per clip
+        """
+        if workers is None:
+            workers = int(os.getenv('ANALYSIS_WORKERS', 2))
+        if slots is None:
+            slots = int(os.getenv('ANALYSIS_SHM_SLOTS', workers))
+        if frame_width is None:
+            frame_width = int(os.getenv('ANALYSIS_FRAME_WIDTH', 640))
+        if frame_height is None:
+            frame_height = int(os.getenv('ANALYSIS_FRAME_HEIGHT', 480))
+
+        self.max_frames = max_frames
+        self.sample_rate = sample_rate
+        self.audio_seconds = audio_seconds
+        self.timeout = float(os.getenv('ANALYSIS_WORKER_TIMEOUT', 30.0))
+
+        # One slot holds a whole clip: ~110MB of frames at 640x480, ~256KB of PCM
+        video_slot_bytes = max_frames * frame_width * frame_height * 3
+        audio_slot_bytes = int(sample_rate * audio_seconds) * np.dtype(np.float32).itemsize
+        self.video_ring = SharedFrameRing(slots, video_slot_bytes)
+        self.audio_ring = SharedFrameRing(slots, audio_slot_bytes)
+
+        # spawn avoids forking a process that already runs server threads
+        context = multiprocessing.get_context(os.getenv('ANALYSIS_MP_START', 'spawn'))
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        self._pending: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        self._job_ids = itertools.count()
+
+        # Job each worker is analyzing, indexed by worker position
+        self._running = context.RawArray('q', [NO_JOB] * workers)
+        self._worker_args = (self._running, self._tasks, self._results, self.video_ring.name,
+                             self.audio_ring.name, video_slot_bytes, audio_slot_bytes, slots)
+        self._context = context
+        self._closing = False
+        self.liveness_interval = 1.0
+        self.restarts = 0
+        self._reclaiming = False
+        self._unclaimed: Dict[int, float] = {}
+
+        self._processes = [self._start_worker(index) for index in range(workers)]
+
+        self._collector = threading.Thread(target=self._collect, name='analysis-results', daemon=True)
+        self._collector.start()
+
+    def _start_worker(self, index: int):
+        """Start the worker process for one pool position."""
+        process = self._context.Process(
+            target=_worker_main,
+            args=(index,) + self._worker_args,
+            name=f'analysis-worker-{index}',
+            daemon=True
+        )
+        process.start()
+        return process
+
+    def _collect(self):
+        """Resolve pending jobs as workers reply, recycle their slots, and replace dead workers."""
+        while True:
+            try:
+                message = self._results.get(timeout=self.liveness_interval)
+            except queue.Empty:
+                message = ()
+
+            if message is None:
+                break
+
+            if message:
+                job_id, result = message
+                self._finish(job_id, result)
+
+            self._check_workers()
+
+    def _finish(self, job_id: int, result: Optional[Dict] = None, reason: Optional[str] = None):
+        """Release a job's slot and resolve its future with the result or an error."""
+        with self._lock:
+            entry = self._pending.pop(job_id, None)
+
+        # Already resolved, e.g. the reply arrived before the worker was found dead
+        if entry is None:
+            return
+
+        future, kind, ring, slot = entry
+        ring.release(slot)
+        if not future.done():
+            future.set_result(result if reason is None else _error_result(kind, reason))
+
+    def _check_workers(self):
+        """Fail the job of any worker that died, start a replacement, and then reclaim lost jobs."""
+        if self._closing:
+            return
+
+        for index, process in enumerate(self._processes):
+            if process.is_alive():
+                continue
+
+            print(f"Error: {process.name} exited with code {process.exitcode}, restarting")
+
+            # The process is gone, so nothing reads the slot any more
+            job_id = self._running[index]
+            self._running[index] = NO_JOB
+            if job_id != NO_JOB:
+                self._finish(job_id, reason="Analysis worker exited")
+
+            self._processes[index] = self._start_worker(index)
+            self.restarts += 1
+            self._reclaiming = True
+
+        if self._reclaiming:
+            self._reclaiming = not self._reclaim_lost_jobs()
+
+    def _reclaim_lost_jobs(self) -> bool:
+        """
+        Fail pending jobs that no worker holds after a restart.
+
+        A worker killed after taking a task but before recording it in
+        _running leaves a job nobody will reply to, and its slot would never
+        be released. Queued jobs and replies still in transit look the same
+        for a moment, so a job is only failed once it has gone unclaimed, with
+        both queues empty, for two liveness intervals.
+
+        Returns:
+            True once no unclaimed jobs remain
+        """
+        if not self._tasks.empty() or not self._results.empty():
+            self._unclaimed = {}
+            return False
+
+        now = time.monotonic()
+        with self._lock:
+            unclaimed = set(self._pending) - set(self._running)
+        self._unclaimed = {job_id: self._unclaimed.get(job_id, now) for job_id in unclaimed}
+
+        for job_id, since in list(self._unclaimed.items()):
+            if now - since >= 2 * self.liveness_interval:
+                del self._unclaimed[job_id]
+                self._finish(job_id, reason="Analysis worker exited")
+
+        return not self._unclaimed
+
+    def _wait(self, kind: str, job_id: int, future: Future) -> Dict:
+        """
+        Wait up to self.timeout for a job's result.
+
+        A worker still busy with the job after the timeout is assumed hung and
+        terminated; _check_workers then reclaims the slot and restarts it. A
+        job that has not started yet keeps its slot until a worker replies.
+        """
+        try:
+            return future.result(self.timeout)
+        except TimeoutError:
+            for index, running_job in enumerate(self._running):
+                if running_job == job_id:
+                    self._processes[index].terminate()
+
+            print(f"Error: {kind} analysis timed out after {self.timeout}s")
+            return _error_result(kind, f"Analysis timed out after {self.timeout}s")
+
+    def _submit(self, kind: str, ring: SharedFrameRing, slot: int, descriptor: Dict) -> Dict:
+        """Send a descriptor to the workers and wait for the result; the slot is released when they reply."""
+        future = Future()
+        job_id = next(self._job_ids)
+
+        with self._lock:
+            self._pending[job_id] = (future, kind, ring, slot)
+
+        self._tasks.put((job_id, kind, descriptor))
+        return self._wait(kind, job_id, future)
+
+    def _decode_video(self, video_path: str, slot: int) -> Optional[Dict]:
+        """
+        Decode a clip straight into a video slot.
+
+        Returns:
+            Descriptor of the decoded frames, or None if the video cannot be opened
+        """
+        cap = cv2.VideoCapture(video_path)
+
+        try:
+            if not cap.isOpened():
+                return None
+
+            ret, first = cap.read()
+            if not ret:
+                return self.video_ring.describe(slot, (0, 0, 0, 3), np.uint8)
+
+            # Clips larger than the configured frame size keep as many frames as fit
+            height, width = first.shape[:2]
+            capacity = min(self.max_frames, self.video_ring.slot_bytes // first.nbytes)
+            frames = self.video_ring.slot_array(slot, (capacity, height, width, 3), np.uint8)
+            frames[0] = first
+
+            count = 1
+            while count < capacity:
+                ret, _ = cap.read(frames[count])
+                if not ret:
+                    break
+                count += 1
+
+            return self.video_ring.describe(slot, (count, height, width, 3), np.uint8)
+
+        finally:
+            cap.release()
+
+    def analyze_video(self, video_path: str) -> Dict:
+        """
+        Decode a video clip here and analyze it in a worker process.
+
+        Returns:
+            Dict with presence, activity, and confidence
+        """
+        slot = self.video_ring.acquire(timeout=self.timeout)
+        if slot is None:
+            return {"presence": False, "activity": None, "confidence": 0.0,
+                    "reason": "No free shared-memory slot"}
+
+        try:
+            descriptor = self._decode_video(video_path, slot)
+        except Exception as e:
+            self.video_ring.release(slot)
+            print(f"Error decoding video: {e}")
+            return {"presence": False, "activity": None, "confidence": 0.0, "reason": str(e)}
+
+        if descriptor is None:
+            self.video_ring.release(slot)
+            return {"presence": False, "activity": None, "confidence": 0.85,
+                    "reason": "Could not open video"}
+
+        return self._submit(VIDEO, self.video_ring, slot, descriptor)
+
+    def analyze_audio(self, audio_path: str) -> Dict:
+        """
+        Decode an audio clip here and analyze it in a worker process.
+
+        Returns:
+            Dict with status, reason (if crying), and confidence
+        """
+        slot = self.audio_ring.acquire(timeout=self.timeout)
+        if slot is None:
+            return {"status": "error", "reason": None, "confidence": 0.0,
+                    "error": "No free shared-memory slot"}
+
+        try:
+            audio, _ = librosa.load(audio_path, sr=self.sample_rate, duration=self.audio_seconds)
+            descriptor = self.audio_ring.write(slot, audio.astype(np.float32, copy=False))
+        except Exception as e:
+            self.audio_ring.release(slot)
+            print(f"Error decoding audio: {e}")
+            return {"status": "error", "reason": None, "confidence": 0.0, "error": str(e)}
+
+        return self._submit(AUDIO, self.audio_ring, slot, descriptor)
+
+    def close(self):
+        """Stop the workers and free the shared memory."""
+        self._closing = True
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+
+        self._results.put(None)
+        self._collector.join(timeout=5)
+
+        for ring in (self.video_ring, self.audio_ring):
+            ring.close()
+            ring.unlink()
@@ -1,22 +1,66 @@
 """
 Database Service - Supabase integration for storing reports and alerts
+Set DATABASE_BACKEND=local to use the SQLite store instead of Supabase.
 """
 
 import os
-from datetime import datetime, timedelta
+from datetime import date as date_type, datetime, timedelta, timezone
 from typing import Dict, List, Optional
 from supabase import create_client, Client
 
+from services.local_store import CATEGORY_PREFIXES, LocalReportStore
+from services.report_codec import (
+    DEFAULT_DURATION_SECONDS,
+    decode_report,
+    encode_report,
+    summary_category
+)
+
+# Columns of the compact table, selected instead of '*'
+COMPACT_COLUMNS = (
+    'id,timestamp,device_id,status,audio_status,cry_reason,activity,presence,'
+    'audio_conf,video_conf,fidelity,notify_code,notify_sid,duration_seconds,created_at'
+)
+
 class DatabaseService:
-    def __init__(self):
-        """Initialize Supabase client."""
-        supabase_url = os.getenv('SUPABASE_URL')
-        supabase_key = os.getenv('SUPABASE_ANON_KEY')
+    def __init__(self, maintenance: bool = False):
+        """
+        Initialize Supabase client or local store.
+
+        Args:
+            maintenance: Prefer SUPABASE_SERVICE_ROLE_KEY, which the
+                retention functions require
+        """
+        self.client: Optional[Client] = None
+        self.local_store: Optional[LocalReportStore] = None
 
-        if not supabase_url or not supabase_key:
-            raise ValueError("Supabase credentials not found in environment")
+        if os.getenv('DATABASE_BACKEND', 'supabase').lower() == 'local':
+            self.local_store = LocalReportStore()
+        else:
+            supabase_url = os.getenv('SUPABASE_URL')
+            supabase_key = os.getenv('SUPABASE_ANON_KEY')
+            if maintenance:
+                supabase_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY') or supabase_key
 
-        self.client: Client = create_client(supabase_url, supabase_key)
+            if not supabase_url or not supabase_key:
+                raise ValueError("Supabase credentials not found in environment")
+
+            self.client = create_client(supabase_url, supabase_key)
+
+        # 'legacy' writes the verbose reports table, 'compact' writes reports_compact.
+        # The local store always holds compact rows.
+        self.compact_storage = self.local_store is not None or \
+            os.getenv('REPORT_STORAGE', 'legacy').lower() == 'compact'
+        self.table_name = 'reports_compact' if self.compact_storage else 'reports'
+        self.columns = COMPACT_COLUMNS if self.compact_storage else '*'
+
+    def _to_legacy(self, row: Dict) -> Dict:
+        """Expand a stored row into the legacy report shape."""
+        return decode_report(row) if self.compact_storage else row
+
+    def _to_compact(self, row: Dict) -> Dict:
+        """Convert a stored row into the compact report shape."""
+        return row if self.compact_storage else encode_report(row)
 
     def save_report(self, report_data: Dict) -> Dict:
         """
@@ -29,10 +73,15 @@ class DatabaseService:
             Saved report with ID
         """
         try:
-            result = self.client.table('reports').insert(report_data).execute()
+            row = encode_report(report_data) if self.compact_storage else report_data
+
+            if self.local_store:
+                return self._to_legacy(self.local_store.insert_report(row))
+
+            result = self.client.table(self.table_name).insert(row).execute()
 
             if result.data and len(result.data) > 0:
-                return result.data[0]
+                return self._to_legacy(result.data[0])
             else:
                 raise Exception("No data returned from insert")
 
@@ -40,117 +89,162 @@ class DatabaseService:
             print(f"Error saving report: {e}")
             raise
 
-    def get_reports(self, limit: int = 50, offset: int = 0) -> List[Dict]:
+    def get_reports(self, limit: int = 50, offset: int = 0, compact: bool = False) -> List[Dict]:
         """
         Get recent reports with pagination.
 
         Args:
             limit: Number of records to fetch
             offset: Number of records to skip
+            compact: Return compact rows instead of the legacy shape
 
         Returns:
             List of reports
         """
         try:
-            result = self.client.table('reports') \
-                .select('*') \
-                .order('timestamp', desc=True) \
-                .range(offset, offset + limit - 1) \
-                .execute()
+            if self.local_store:
+                rows = self.local_store.get_reports(limit, offset)
+            else:
+                result = self.client.table(self.table_name) \
+                    .select(self.columns) \
+                    .order('timestamp', desc=True) \
+                    .range(offset, offset + limit - 1) \
+                    .execute()
+
+                rows = result.data if result.data else []
 
-            return result.data if result.data else []
+            convert = self._to_compact if compact else self._to_legacy
+            return [convert(row) for row in rows]
 
         except Exception as e:
             print(f"Error fetching reports: {e}")
             return []
 
-    def get_report_by_id(self, report_id: str) -> Optional[Dict]:
+    def get_report_by_id(self, report_id: str, compact: bool = False) -> Optional[Dict]:
         """
         Get single report by ID.
 
         Args:
             report_id: Report UUID
+            compact: Return a compact row instead of the legacy shape
 
         Returns:
             Report data or None
         """
         try:
-            result = self.client.table('reports') \
-                .select('*') \
-                .eq('id', report_id) \
-                .maybeSingle() \
-                .execute()
+            if self.local_store:
+                row = self.local_store.get_report(report_id)
+            else:
+                result = self.client.table(self.table_name) \
+                    .select(self.columns) \
+                    .eq('id', report_id) \
+                    .maybeSingle() \
+                    .execute()
 
-            return result.data
+                row = result.data
+
+            if not row:
+                return None
+
+            return self._to_compact(row) if compact else self._to_legacy(row)
 
         except Exception as e:
             print(f"Error fetching report: {e}")
             return None
 
+    def _get_day_rows(self, start: datetime, end: datetime) -> List[Dict]:
+        """Compact rows with start <= timestamp < end."""
+        if self.local_store:
+            return self.local_store.get_reports_between(start, end)
+
+        result = self.client.table(self.table_name) \
+            .select(self.columns) \
+            .gte('timestamp', start.isoformat()) \
+            .lt('timestamp', end.isoformat()) \
+            .execute()
+
+        return [self._to_compact(row) for row in (result.data or [])]
+
+    def _get_day_summaries(self, start: datetime, end: datetime) -> List[Dict]:
+        """Downsampled summary buckets with start <= bucket_start < end."""
+        if self.local_store:
+            return self.local_store.get_summaries_between(start, end)
+
+        result = self.client.table('report_summaries') \
+            .select('*') \
+            .gte('bucket_start', start.isoformat()) \
+            .lt('bucket_start', end.isoformat()) \
+            .execute()
+
+        return result.data if result.data else []
+
     def get_daily_summary(self, date: Optional[datetime] = None) -> Dict:
         """
         Get daily summary of sleep vs cry time.
 
+        Combines raw reports with buckets already downsampled by the
+        retention job. Days are UTC days, like the dates of summary_delta
+        events.
+
         Args:
-            date: Date to summarize (defaults to today)
+            date: Date to summarize (defaults to today); a naive value
+                names a UTC day
 
         Returns:
             Dict with sleep_minutes, cry_minutes, total_detections
         """
         try:
             if date is None:
-                date = datetime.now()
+                date = datetime.now(timezone.utc)
+            elif date.tzinfo is None:
+                date = date.replace(tzinfo=timezone.utc)
 
-            # Start and end of day
-            start_of_day = date.replace(hour=0, minute=0, second=0, microsecond=0)
+            # Start and end of the UTC day
+            start_of_day = date.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
             end_of_day = start_of_day + timedelta(days=1)
 
-            # Query reports for the day
-            result = self.client.table('reports') \
-                .select('*') \
-                .gte('timestamp', start_of_day.isoformat()) \
-                .lt('timestamp', end_of_day.isoformat()) \
-                .execute()
-
-            reports = result.data if result.data else []
-
-            # Calculate summary
-            sleep_count = 0
-            cry_count = 0
-            sitting_count = 0
-            no_baby_count = 0
-
-            for report in reports:
-                video_result = report.get('video_result', {})
-                audio_result = report.get('audio_result', {})
-
-                if not video_result.get('presence'):
-                    no_baby_count += 1
-                elif audio_result.get('status') == 'cry':
-                    cry_count += 1
-                elif video_result.get('activity') == 'sleeping':
-                    sleep_count += 1
-                elif video_result.get('activity') == 'sitting':
-                    sitting_count += 1
-
-            # Each detection represents 4 seconds
-            sleep_minutes = (sleep_count * 4) / 60
-            cry_minutes = (cry_count * 4) / 60
-            active_minutes = (sitting_count * 4) / 60
+            # Calculate summary: reports and buckets per category, and the seconds they cover
+            counts = {"sleeping": 0, "crying": 0, "sitting": 0, "no_baby": 0}
+            seconds = dict.fromkeys(counts, 0)
+            total_detections = 0
+
+            for report in self._get_day_rows(start_of_day, end_of_day):
+                category = summary_category(report)
+                if category:
+                    counts[category] += 1
+                    seconds[category] += report.get('duration_seconds') or DEFAULT_DURATION_SECONDS
+                total_detections += 1
+
+            for summary in self._get_day_summaries(start_of_day, end_of_day):
+                for category, prefix in CATEGORY_PREFIXES.items():
+                    counts[category] += summary[f'{prefix}_count']
+                    seconds[category] += summary[f'{prefix}_seconds']
+                    total_detections += summary[f'{prefix}_count']
+
+            sleep_count = counts["sleeping"]
+            cry_count = counts["crying"]
+            sitting_count = counts["sitting"]
+            no_baby_count = counts["no_baby"]
+
+            # Reports cover their duration_seconds (one 4 second clip unless smoothed)
+            sleep_minutes = seconds["sleeping"] / 60
+            cry_minutes = seconds["crying"] / 60
+            active_minutes = seconds["sitting"] / 60
 
             return {
-                "date": date.strftime("%Y-%m-%d"),
+                "date": start_of_day.strftime("%Y-%m-%d"),
                 "sleep_minutes": round(sleep_minutes, 1),
                 "cry_minutes": round(cry_minutes, 1),
                 "active_minutes": round(active_minutes, 1),
-                "total_detections": len(reports),
+                "total_detections": total_detections,
                 "no_baby_detections": no_baby_count,
                 "breakdown": {
                     "sleeping": sleep_count,
                     "crying": cry_count,
                     "sitting": sitting_count,
                     "no_baby": no_baby_count
-                }
+                },
+                "breakdown_seconds": seconds
             }
 
         except Exception as e:
@@ -159,3 +253,57 @@ class DatabaseService:
                 "date": date.strftime("%Y-%m-%d") if date else None,
                 "error": str(e)
             }
+
+    def ensure_partitions(self, days_ahead: int = 7):
+        """Create daily report partitions from today through days_ahead."""
+        if self.local_store:
+            return  # SQLite is not partitioned; reads and retention use the ts_epoch index
+        if not self.compact_storage:
+            return  # The legacy reports table is not partitioned
+
+        today = date_type.today()
+        self.client.rpc('ensure_report_partitions', {
+            "from_day": today.isoformat(),
+            "to_day": (today + timedelta(days=days_ahead)).isoformat()
+        }).execute()
+
+    def downsample_batch(self, cutoff: datetime, batch_size: int, interval_seconds: int) -> int:
+        """
+        Fold one batch of raw reports older than cutoff into summary buckets.
+
+        Args:
+            cutoff: Raw reports before this time are downsampled
+            batch_size: Maximum raw rows per batch
+            interval_seconds: Summary bucket width
+
+        Returns:
+            Number of raw rows processed (0 when nothing is left)
+        """
+        if self.local_store:
+            return self.local_store.downsample_batch(cutoff, batch_size, interval_seconds)
+
+        # Legacy deployments keep growing the reports table, so it is downsampled too
+        function = 'downsample_reports_batch' if self.compact_storage else 'downsample_legacy_reports_batch'
+        result = self.client.rpc(function, {
+            "cutoff": cutoff.isoformat(),
+            "batch_size": batch_size,
+            "interval_seconds": interval_seconds
+        }).execute()
+
+        return int(result.data or 0)
+
+    def drop_partitions_before(self, cutoff: datetime) -> int:
+        """
+        Drop daily partitions that end before cutoff and are already empty.
+
+        Returns:
+            Number of partitions dropped
+        """
+        if self.local_store or not self.compact_storage:
+            return 0
+
+        result = self.client.rpc('drop_report_partitions_before', {
+            "cutoff_day": cutoff.date().isoformat()
+        }).execute()
+
+        return int(result.data or 0)
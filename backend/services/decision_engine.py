@@ -0,0 +1,325 @@
+"""
+Decision Engine - Per-device temporal smoothing of audio/video detections
+Each clip's scores are written into a small fixed-size history and folded
+into an exponential moving average in O(1). Hysteresis thresholds turn the
+averages into a state, and only changes of state (plus periodic heartbeats
+of an unchanged state, and the tail of a device that went idle) are passed
+on for notification and storage.
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.report_codec import CRY_REASON_CODES, CRY_REASON_NAMES
+
+# Columns of the score history
+CRY = 0
+PRESENCE = 1
+SITTING = 2
+
+NO_REASON = -1
+
+
+class DeviceTrack:
+    def __init__(self, history: int):
+        """Fixed-size score history and smoothed state for one device."""
+        self.scores = np.zeros((history, 3), dtype=np.float32)
+        self.reasons = np.full(history, NO_REASON, dtype=np.int8)
+        self.index = 0
+        # Every state starts off, so even a new device's first switch needs
+        # several clips of evidence
+        self.ema = np.zeros(3, dtype=np.float32)
+
+        self.present = False
+        self.crying = False
+        self.sitting = False
+        self.state: Optional[Dict] = None
+        self.unsaved_seconds = 0.0
+        self.unsaved_reduced = False  # Any unsaved clip analyzed at reduced fidelity
+        self.last_timestamp = None
+        self.last_seen = 0.0  # time.monotonic() of the last clip
+
+
+class DecisionEngine:
+    def __init__(
+        self,
+        alpha: Optional[float] = None,
+        history: Optional[int] = None,
+        on_threshold: Optional[float] = None,
+        off_threshold: Optional[float] = None,
+        clip_seconds: Optional[float] = None,
+        heartbeat_seconds: Optional[float] = None,
+        idle_seconds: Optional[float] = None
+    ):
+        """
+        Initialize decision engine.
+
+        Args:
+            alpha: Weight of the newest clip in the moving average
+            history: Clips of scores kept per device
+            on_threshold: Smoothed score that switches a state on
+            off_threshold: Smoothed score that switches a state back off
+            clip_seconds: Seconds of monitoring each clip covers
+            heartbeat_seconds: Unchanged time after which a state is saved again
+            idle_seconds: Time without clips after which a device's unsaved time is flushed
+        """
+        if alpha is None:
+            alpha = float(os.getenv('DECISION_ALPHA', 0.5))
+        if history is None:
+            history = int(os.getenv('DECISION_HISTORY', 8))
+        if on_threshold is None:
+            on_threshold = float(os.getenv('DECISION_ON_THRESHOLD', 0.6))
+        if off_threshold is None:
+            off_threshold = float(os.getenv('DECISION_OFF_THRESHOLD', 0.4))
+        if clip_seconds is None:
+            clip_seconds = float(os.getenv('DECISION_CLIP_SECONDS', 4))
+        if heartbeat_seconds is None:
+            heartbeat_seconds = float(os.getenv('DECISION_HEARTBEAT_SECONDS', 60))
+        if idle_seconds is None:
+            idle_seconds = float(os.getenv('DECISION_IDLE_SECONDS', 30))
+
+        self.alpha = alpha
+        self.history = history
+        self.on_threshold = on_threshold
+        self.off_threshold = off_threshold
+        self.clip_seconds = clip_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.idle_seconds = idle_seconds
+        self._devices: Dict[str, DeviceTrack] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _switch(self, active: bool, score: float) -> bool:
+        """Hysteresis: turn on above on_threshold, off below off_threshold."""
+        if active:
+            return score > self.off_threshold
+        return score >= self.on_threshold
+
+    @staticmethod
+    def _vote(detected: bool, confidence: float) -> float:
+        """
+        Score of one clip's detection: above 0.5 when detected, below otherwise.
+
+        The analyzers clamp confidences to [0.5, 0.95], so scoring a detection
+        by its confidence alone would leave a sustained low-confidence cry
+        below on_threshold forever. Here any detection scores at least 0.75,
+        further from 0.5 the more confident it is.
+        """
+        margin = min(max(confidence, 0.0), 1.0) / 2
+        return 0.5 + margin if detected else 0.5 - margin
+
+    def _clip_scores(self, track: DeviceTrack, audio_result: Dict, video_result: Dict) -> np.ndarray:
+        """
+        Cry, presence and sitting scores for one clip.
+
+        A signal the clip could not measure (audio error, activity without
+        presence) repeats the current average so it does not move.
+        """
+        scores = track.ema.copy()
+        audio_confidence = audio_result.get('confidence') or 0.0
+        video_confidence = video_result.get('confidence') or 0.0
+
+        if audio_result.get('status') in ('cry', 'no_cry'):
+            scores[CRY] = self._vote(audio_result['status'] == 'cry', audio_confidence)
+
+        scores[PRESENCE] = self._vote(bool(video_result.get('presence')), video_confidence)
+        if video_result.get('presence') and video_result.get('activity') in ('sitting', 'sleeping'):
+            scores[SITTING] = self._vote(video_result['activity'] == 'sitting', video_confidence)
+
+        return scores
+
+    def _cry_reason(self, track: DeviceTrack) -> Optional[str]:
+        """Most frequent cry reason in the history, so one odd clip does not relabel a cry."""
+        reasons = track.reasons[track.reasons != NO_REASON]
+        if len(reasons) == 0:
+            return None
+
+        return CRY_REASON_NAMES.get(int(np.bincount(reasons).argmax()))
+
+    def _state(self, track: DeviceTrack) -> Dict:
+        """Smoothed audio/video results for the device's current state."""
+        cry_score, presence_score, sitting_score = (float(score) for score in track.ema)
+
+        if track.crying:
+            audio_result = {
+                "status": "cry",
+                "reason": self._cry_reason(track),
+                "confidence": round(cry_score, 3)
+            }
+        else:
+            audio_result = {"status": "no_cry", "reason": None, "confidence": round(1.0 - cry_score, 3)}
+
+        if not track.present:
+            video_result = {"presence": False, "activity": None, "confidence": round(1.0 - presence_score, 3)}
+        elif track.sitting:
+            video_result = {"presence": True, "activity": "sitting", "confidence": round(sitting_score, 3)}
+        else:
+            video_result = {"presence": True, "activity": "sleeping", "confidence": round(1.0 - sitting_score, 3)}
+
+        return {"audio_result": audio_result, "video_result": video_result}
+
+    @staticmethod
+    def _state_key(state: Optional[Dict]) -> tuple:
+        """The part of a state whose change is a transition."""
+        if state is None:
+            return None, None, None
+
+        video_result = state['video_result']
+        crying = state['audio_result']['status'] == 'cry' and video_result['presence']
+        return video_result['presence'], crying, video_result['activity']
+
+    @staticmethod
+    def _segment(state: Dict, timestamp, duration_seconds: float, reduced: bool) -> Dict:
+        """A state to save, marked reduced when any clip behind it was analyzed at reduced fidelity."""
+        audio_result = dict(state['audio_result'])
+        video_result = dict(state['video_result'])
+        if reduced:
+            audio_result['fidelity'] = 'reduced'
+            video_result['fidelity'] = 'reduced'
+
+        return {
+            "audio_result": audio_result,
+            "video_result": video_result,
+            "timestamp": timestamp,
+            "duration_seconds": duration_seconds
+        }
+
+    def update(self, device_id: str, audio_result: Dict, video_result: Dict, timestamp) -> Dict:
+        """
+        Fold one clip into a device's state.
+
+        Args:
+            device_id: Device that sent the clip
+            audio_result: Per-clip AudioAnalyzer result
+            video_result: Per-clip VideoAnalyzer result
+            timestamp: Capture time of the clip
+
+        Returns:
+            Dict with the smoothed audio_result and video_result, changed
+            (whether the state differs from the previous clip), started_crying,
+            and segments: states to save, each with timestamp and
+            duration_seconds, and fidelity 'reduced' in its results when any
+            clip it covers was analyzed at reduced fidelity. Unchanged clips
+            are only saved once heartbeat_seconds of them have accumulated.
+        """
+        with self._lock:
+            track = self._devices.get(device_id)
+            if track is None:
+                track = DeviceTrack(self.history)
+                self._devices[device_id] = track
+
+            scores = self._clip_scores(track, audio_result, video_result)
+            reduced = 'reduced' in (audio_result.get('fidelity'), video_result.get('fidelity'))
+            reason = CRY_REASON_CODES.get(audio_result.get('reason')) if audio_result.get('status') == 'cry' else None
+
+            # Fixed-size ring of raw scores; the average itself is O(1) per clip
+            track.scores[track.index] = scores
+            track.reasons[track.index] = NO_REASON if reason is None else reason
+            track.index = (track.index + 1) % self.history
+
+            track.ema += self.alpha * (scores - track.ema)
+
+            track.present = self._switch(track.present, track.ema[PRESENCE])
+            track.crying = self._switch(track.crying, track.ema[CRY])
+            track.sitting = self._switch(track.sitting, track.ema[SITTING])
+
+            previous = track.state
+            state = self._state(track)
+            changed = self._state_key(state) != self._state_key(previous)
+            segments: List[Dict] = []
+
+            if changed:
+                # Close out the previous state's unsaved time before saving the new one
+                if previous is not None and track.unsaved_seconds > 0:
+                    segments.append(self._segment(previous, track.last_timestamp,
+                                                  track.unsaved_seconds, track.unsaved_reduced))
+                segments.append(self._segment(state, timestamp, self.clip_seconds, reduced))
+                track.unsaved_seconds = 0.0
+                track.unsaved_reduced = False
+            else:
+                track.unsaved_seconds += self.clip_seconds
+                track.unsaved_reduced = track.unsaved_reduced or reduced
+                if track.unsaved_seconds >= self.heartbeat_seconds:
+                    segments.append(self._segment(state, timestamp, track.unsaved_seconds, track.unsaved_reduced))
+                    track.unsaved_seconds = 0.0
+                    track.unsaved_reduced = False
+
+            track.state = state
+            track.last_timestamp = timestamp
+            track.last_seen = time.monotonic()
+
+            return dict(
+                state,
+                changed=changed,
+                started_crying=self._state_key(state)[1] and not self._state_key(previous)[1],
+                segments=segments
+            )
+
+    def flush(self, idle_seconds: Optional[float] = None) -> List[Tuple[str, Dict]]:
+        """
+        Take the unsaved time of devices that stopped sending clips.
+
+        Without this, up to heartbeat_seconds of a state is lost when
+        monitoring stops or the server shuts down.
+
+        Args:
+            idle_seconds: Only devices without a clip for this long (None for all devices)
+
+        Returns:
+            List of (device_id, segment) to save, each segment ending at the
+            device's last clip
+        """
+        now = time.monotonic()
+        flushed = []
+
+        with self._lock:
+            for device_id, track in self._devices.items():
+                if track.state is None or track.unsaved_seconds <= 0:
+                    continue
+                if idle_seconds is not None and now - track.last_seen < idle_seconds:
+                    continue
+
+                flushed.append((device_id, self._segment(track.state, track.last_timestamp,
+                                                         track.unsaved_seconds, track.unsaved_reduced)))
+                track.unsaved_seconds = 0.0
+                track.unsaved_reduced = False
+
+        return flushed
+
+    def start_idle_flush(self, save_segment: Callable[[str, Dict], object]):
+        """Pass idle devices' unsaved time to save_segment from a daemon thread."""
+        if self._thread is not None:
+            return
+
+        def loop():
+            while not self._stop.wait(max(self.idle_seconds / 2, 1.0)):
+                for device_id, segment in self.flush(self.idle_seconds):
+                    try:
+                        save_segment(device_id, segment)
+                    except Exception as e:
+                        print(f"Error saving idle segment: {e}")
+
+        self._thread = threading.Thread(target=loop, name='decision-idle-flush', daemon=True)
+        self._thread.start()
+
+    def get_state(self) -> Dict:
+        """Snapshot of per-device smoothed scores and states."""
+        with self._lock:
+            return {
+                device_id: {
+                    "present": track.present,
+                    "crying": track.crying,
+                    "sitting": track.sitting,
+                    "cry_score": round(float(track.ema[CRY]), 3),
+                    "presence_score": round(float(track.ema[PRESENCE]), 3),
+                    "sitting_score": round(float(track.ema[SITTING]), 3),
+                    "recent_cry_clips": int((track.scores[:, CRY] >= self.on_threshold).sum()),
+                    "unsaved_seconds": track.unsaved_seconds
+                }
+                for device_id, track in self._devices.items()
+            }
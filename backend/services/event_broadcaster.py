@@ -0,0 +1,162 @@
+"""
+Event Broadcaster - Server-sent event fan-out of detections to dashboards
+Each event is serialized once and appended to every subscriber's bounded
+queue; subscribers that fall too far behind are told to resync and dropped.
+"""
+
+import json
+import os
+import threading
+from collections import deque
+from typing import Dict, Iterator, Optional, Set
+
+ALL_DEVICES = '*'
+
+
+class Subscriber:
+    def __init__(self, device_id: str, max_queue: int):
+        """Bounded per-connection event queue."""
+        self.device_id = device_id
+        self.max_queue = max_queue
+        self.closed = False
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+
+    def push(self, payload: bytes, resync_payload: bytes) -> bool:
+        """
+        Queue a serialized event.
+
+        Returns:
+            True if this event overflowed the queue and closed the subscriber
+        """
+        with self._cond:
+            if self.closed:
+                return False
+
+            if len(self._queue) >= self.max_queue:
+                # Slow consumer: replace the backlog with a resync hint and disconnect
+                self._queue.clear()
+                self._queue.append(resync_payload)
+                self.closed = True
+                self._cond.notify()
+                return True
+
+            self._queue.append(payload)
+            self._cond.notify()
+            return False
+
+    def pop(self, timeout: float) -> Optional[bytes]:
+        """Next serialized event, or None after timeout with nothing queued."""
+        with self._cond:
+            if not self._queue and not self.closed:
+                self._cond.wait(timeout)
+
+            if self._queue:
+                return self._queue.popleft()
+
+            return None
+
+    def close(self):
+        """Stop the subscriber; a waiting pop returns immediately."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+
+def format_event(event_type: str, data: Dict) -> bytes:
+    """Serialize an event in text/event-stream format."""
+    body = json.dumps(data, separators=(',', ':'))
+    return f"event: {event_type}\ndata: {body}\n\n".encode('utf-8')
+
+
+class EventBroadcaster:
+    def __init__(self, max_queue: Optional[int] = None, keepalive_seconds: Optional[float] = None):
+        """
+        Initialize event broadcaster.
+
+        Args:
+            max_queue: Events buffered per subscriber before it is dropped
+            keepalive_seconds: Idle time before a keepalive comment is sent
+        """
+        if max_queue is None:
+            max_queue = int(os.getenv('SSE_MAX_QUEUE', 64))
+        if keepalive_seconds is None:
+            keepalive_seconds = float(os.getenv('SSE_KEEPALIVE_SECONDS', 15))
+
+        self.max_queue = max_queue
+        self.keepalive_seconds = keepalive_seconds
+        self._subscribers: Dict[str, Set[Subscriber]] = {}
+        self._lock = threading.Lock()
+        self._dropped_total = 0
+        self._published_total = 0
+        self._resync_payload = format_event('resync', {})
+
+    def subscribe(self, device_id: str = ALL_DEVICES) -> Subscriber:
+        """Register a subscriber for one device, or ALL_DEVICES."""
+        subscriber = Subscriber(device_id, self.max_queue)
+
+        with self._lock:
+            self._subscribers.setdefault(device_id, set()).add(subscriber)
+
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        """Close a subscriber and remove it from fan-out."""
+        subscriber.close()
+
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.device_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[subscriber.device_id]
+
+    def publish(self, device_id: str, event_type: str, data: Dict):
+        """
+        Broadcast an event to subscribers of the device and of all devices.
+
+        Args:
+            device_id: Device the event belongs to
+            event_type: SSE event name
+            data: JSON-serializable payload
+        """
+        with self._lock:
+            targets = tuple(self._subscribers.get(device_id, ())) + \
+                tuple(self._subscribers.get(ALL_DEVICES, ()))
+
+        if not targets:
+            return
+
+        payload = format_event(event_type, data)
+        dropped = [sub for sub in targets if sub.push(payload, self._resync_payload)]
+
+        with self._lock:
+            self._published_total += 1
+            self._dropped_total += len(dropped)
+
+    def stream(self, subscriber: Subscriber) -> Iterator[bytes]:
+        """Yield serialized events for a subscriber until it disconnects or overflows."""
+        try:
+            yield b": connected\n\n"
+
+            while True:
+                payload = subscriber.pop(self.keepalive_seconds)
+
+                if payload is not None:
+                    yield payload
+                elif subscriber.closed:
+                    break
+                else:
+                    yield b": keepalive\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def get_state(self) -> Dict:
+        """Snapshot of subscriber counts for monitoring."""
+        with self._lock:
+            return {
+                "subscribers": sum(len(subs) for subs in self._subscribers.values()),
+                "devices": {device_id: len(subs) for device_id, subs in self._subscribers.items()},
+                "published_total": self._published_total,
+                "dropped_subscribers_total": self._dropped_total
+            }
@@ -0,0 +1,282 @@
+"""
+Local Report Store - SQLite storage for running without Supabase
+Stores compact report rows and downsampled summaries in a single file.
+"""
+
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from services.report_codec import summary_category
+
+REPORT_COLUMNS = (
+    'id', 'timestamp', 'device_id', 'status', 'audio_status', 'cry_reason', 'activity',
+    'presence', 'audio_conf', 'video_conf', 'fidelity', 'notify_code', 'notify_sid', 'duration_seconds',
+    'created_at'
+)
+
+SUMMARY_COLUMNS = (
+    'device_id', 'bucket_start', 'interval_seconds', 'sleeping_count', 'sitting_count',
+    'cry_count', 'no_baby_count', 'notified_count', 'sleeping_seconds', 'sitting_seconds',
+    'cry_seconds', 'no_baby_seconds'
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports_compact (
+  id TEXT PRIMARY KEY,
+  timestamp TEXT NOT NULL,
+  ts_epoch REAL NOT NULL,
+  device_id TEXT NOT NULL DEFAULT 'default',
+  status INTEGER NOT NULL,
+  audio_status INTEGER NOT NULL DEFAULT 0,
+  cry_reason INTEGER,
+  activity INTEGER,
+  presence INTEGER NOT NULL DEFAULT 0,
+  audio_conf INTEGER NOT NULL DEFAULT 0,
+  video_conf INTEGER NOT NULL DEFAULT 0,
+  fidelity INTEGER NOT NULL DEFAULT 0,
+  notify_code INTEGER NOT NULL DEFAULT 0,
+  notify_sid TEXT,
+  duration_seconds INTEGER NOT NULL DEFAULT 4,
+  created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_reports_compact_epoch ON reports_compact(ts_epoch DESC);
+
+CREATE TABLE IF NOT EXISTS report_summaries (
+  device_id TEXT NOT NULL,
+  bucket_start TEXT NOT NULL,
+  bucket_epoch REAL NOT NULL,
+  interval_seconds INTEGER NOT NULL,
+  sleeping_count INTEGER NOT NULL DEFAULT 0,
+  sitting_count INTEGER NOT NULL DEFAULT 0,
+  cry_count INTEGER NOT NULL DEFAULT 0,
+  no_baby_count INTEGER NOT NULL DEFAULT 0,
+  notified_count INTEGER NOT NULL DEFAULT 0,
+  sleeping_seconds INTEGER NOT NULL DEFAULT 0,
+  sitting_seconds INTEGER NOT NULL DEFAULT 0,
+  cry_seconds INTEGER NOT NULL DEFAULT 0,
+  no_baby_seconds INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (device_id, bucket_start)
+);
+CREATE INDEX IF NOT EXISTS idx_report_summaries_epoch ON report_summaries(bucket_epoch);
+"""
+
+# Summary category -> report_summaries column prefix (<prefix>_count, <prefix>_seconds)
+CATEGORY_PREFIXES = {
+    "sleeping": "sleeping",
+    "sitting": "sitting",
+    "crying": "cry",
+    "no_baby": "no_baby"
+}
+
+# Columns added after the first release, for databases created before them
+ADDED_COLUMNS = {
+    "reports_compact": ("duration_seconds INTEGER NOT NULL DEFAULT 4",),
+    "report_summaries": (
+        "sleeping_seconds INTEGER NOT NULL DEFAULT 0",
+        "sitting_seconds INTEGER NOT NULL DEFAULT 0",
+        "cry_seconds INTEGER NOT NULL DEFAULT 0",
+        "no_baby_seconds INTEGER NOT NULL DEFAULT 0"
+    )
+}
+
+# Columns (and their indexes) dropped after the first release
+REMOVED_COLUMNS = {
+    "reports_compact": (("day", "idx_reports_compact_day"),)
+}
+
+
+def to_epoch(value) -> float:
+    """Epoch seconds for an ISO string or datetime (naive values are local time)."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return value.timestamp()
+
+
+class LocalReportStore:
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Initialize SQLite report store.
+
+        Args:
+            db_path: Database file path (LOCAL_DB_PATH, default baby_monitor.db)
+        """
+        self.db_path = db_path or os.getenv('LOCAL_DB_PATH', 'baby_monitor.db')
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+
+        with self._lock:
+            # WAL lets dashboard reads proceed while the retention job writes
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(SCHEMA)
+            self._add_missing_columns()
+            self._drop_removed_columns()
+            self._conn.commit()
+
+    def _add_missing_columns(self):
+        """Bring a database file created by an older version up to the current schema."""
+        for table, definitions in ADDED_COLUMNS.items():
+            existing = {row['name'] for row in self._conn.execute(f'PRAGMA table_info({table})')}
+
+            for definition in definitions:
+                column = definition.split()[0]
+                if column not in existing:
+                    self._conn.execute(f'ALTER TABLE {table} ADD COLUMN {definition}')
+                    if column.endswith('_seconds') and table == 'report_summaries':
+                        # Buckets downsampled before durations were stored hold 4 second clips
+                        prefix = column[:-len('_seconds')]
+                        self._conn.execute(f'UPDATE {table} SET {column} = {prefix}_count * 4')
+
+    def _drop_removed_columns(self):
+        """Drop columns an older version wrote but nothing reads."""
+        for table, columns in REMOVED_COLUMNS.items():
+            existing = {row['name'] for row in self._conn.execute(f'PRAGMA table_info({table})')}
+
+            for column, index in columns:
+                if column in existing:
+                    self._conn.execute(f'DROP INDEX IF EXISTS {index}')
+                    self._conn.execute(f'ALTER TABLE {table} DROP COLUMN {column}')
+
+    @staticmethod
+    def _report(row: sqlite3.Row) -> Dict:
+        report = {column: row[column] for column in REPORT_COLUMNS}
+        report['presence'] = bool(report['presence'])
+        return report
+
+    @staticmethod
+    def _summary(row: sqlite3.Row) -> Dict:
+        return {column: row[column] for column in SUMMARY_COLUMNS}
+
+    def insert_report(self, row: Dict) -> Dict:
+        """Insert a compact report row and return it with id and created_at."""
+        report = {column: row.get(column) for column in REPORT_COLUMNS}
+        report['id'] = report['id'] or str(uuid.uuid4())
+        report['created_at'] = report['created_at'] or datetime.now(timezone.utc).isoformat()
+        report['device_id'] = report['device_id'] or 'default'
+        report['presence'] = int(bool(report['presence']))
+
+        values = dict(report, ts_epoch=to_epoch(report['timestamp']))
+        columns = ', '.join(values)
+        placeholders = ', '.join(f':{column}' for column in values)
+
+        with self._lock:
+            self._conn.execute(f'INSERT INTO reports_compact ({columns}) VALUES ({placeholders})', values)
+            self._conn.commit()
+
+        report['presence'] = bool(report['presence'])
+        return report
+
+    def get_reports(self, limit: int, offset: int) -> List[Dict]:
+        """Most recent compact rows first."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT * FROM reports_compact ORDER BY ts_epoch DESC LIMIT ? OFFSET ?',
+                (limit, offset)
+            ).fetchall()
+
+        return [self._report(row) for row in rows]
+
+    def get_report(self, report_id: str) -> Optional[Dict]:
+        """Single compact row by id."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT * FROM reports_compact WHERE id = ?', (report_id,)
+            ).fetchone()
+
+        return self._report(row) if row else None
+
+    def get_reports_between(self, start: datetime, end: datetime) -> List[Dict]:
+        """Compact rows with start <= timestamp < end."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT * FROM reports_compact WHERE ts_epoch >= ? AND ts_epoch < ?',
+                (to_epoch(start), to_epoch(end))
+            ).fetchall()
+
+        return [self._report(row) for row in rows]
+
+    def get_summaries_between(self, start: datetime, end: datetime) -> List[Dict]:
+        """Summary buckets with start <= bucket_start < end."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT * FROM report_summaries WHERE bucket_epoch >= ? AND bucket_epoch < ?',
+                (to_epoch(start), to_epoch(end))
+            ).fetchall()
+
+        return [self._summary(row) for row in rows]
+
+    def downsample_batch(self, cutoff: datetime, batch_size: int, interval_seconds: int) -> int:
+        """
+        Fold the oldest raw rows before cutoff into summary buckets and delete them.
+
+        Each batch is one short transaction, so live inserts are only
+        blocked for the duration of a single batch.
+
+        Returns:
+            Number of raw rows processed
+        """
+        with self._lock:
+            try:
+                rows = self._conn.execute(
+                    'SELECT * FROM reports_compact WHERE ts_epoch < ? ORDER BY ts_epoch LIMIT ?',
+                    (to_epoch(cutoff), batch_size)
+                ).fetchall()
+
+                buckets: Dict = {}
+                for row in rows:
+                    bucket_epoch = (row['ts_epoch'] // interval_seconds) * interval_seconds
+                    key = (row['device_id'], bucket_epoch)
+                    counts = buckets.setdefault(key, dict.fromkeys(SUMMARY_COLUMNS[3:], 0))
+
+                    category = summary_category(self._report(row))
+                    if category:
+                        prefix = CATEGORY_PREFIXES[category]
+                        counts[f'{prefix}_count'] += 1
+                        counts[f'{prefix}_seconds'] += row['duration_seconds']
+                    if row['notify_code'] == 1:
+                        counts['notified_count'] += 1
+
+                for (device_id, bucket_epoch), counts in buckets.items():
+                    bucket_start = datetime.fromtimestamp(bucket_epoch, tz=timezone.utc).isoformat()
+                    self._conn.execute(
+                        '''
+                        INSERT INTO report_summaries (
+                          device_id, bucket_start, bucket_epoch, interval_seconds, sleeping_count,
+                          sitting_count, cry_count, no_baby_count, notified_count, sleeping_seconds,
+                          sitting_seconds, cry_seconds, no_baby_seconds
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (device_id, bucket_start) DO UPDATE SET
+                          sleeping_count = sleeping_count + excluded.sleeping_count,
+                          sitting_count = sitting_count + excluded.sitting_count,
+                          cry_count = cry_count + excluded.cry_count,
+                          no_baby_count = no_baby_count + excluded.no_baby_count,
+                          notified_count = notified_count + excluded.notified_count,
+                          sleeping_seconds = sleeping_seconds + excluded.sleeping_seconds,
+                          sitting_seconds = sitting_seconds + excluded.sitting_seconds,
+                          cry_seconds = cry_seconds + excluded.cry_seconds,
+                          no_baby_seconds = no_baby_seconds + excluded.no_baby_seconds
+                        ''',
+                        (
+                            device_id, bucket_start, bucket_epoch, interval_seconds,
+                            counts['sleeping_count'], counts['sitting_count'], counts['cry_count'],
+                            counts['no_baby_count'], counts['notified_count'],
+                            counts['sleeping_seconds'], counts['sitting_seconds'],
+                            counts['cry_seconds'], counts['no_baby_seconds']
+                        )
+                    )
+
+                self._conn.executemany(
+                    'DELETE FROM reports_compact WHERE id = ?',
+                    [(row['id'],) for row in rows]
+                )
+                self._conn.commit()
+
+            except Exception:
+                self._conn.rollback()
+                raise
+
+        return len(rows)
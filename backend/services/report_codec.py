@@ -0,0 +1,201 @@
+"""
+Report Codec - Compact report representation
+Converts between the legacy report shape (verbose audio/video JSON plus a
+stored message) and compact rows with enum-coded fields, quantized
+confidences and a message derived on read.
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+REPORT_SCHEMA_VERSION = 1
+
+STATUS_CODES = {"no_baby": 0, "present": 1, "cry": 2}
+AUDIO_STATUS_CODES = {"no_cry": 0, "cry": 1, "error": 2}
+CRY_REASON_CODES = {"hunger": 0, "pain": 1, "attention": 2, "gas": 3}
+ACTIVITY_CODES = {"sleeping": 0, "sitting": 1}
+FIDELITY_CODES = {"full": 0, "reduced": 1}
+
+# Notification outcome: not attempted, delivered, failed, provider not configured
+NOTIFY_NONE = 0
+NOTIFY_DELIVERED = 1
+NOTIFY_FAILED = 2
+NOTIFY_NOT_CONFIGURED = 3
+
+CONFIDENCE_LEVELS = 255
+
+# Seconds a report covers when it does not say (one clip)
+DEFAULT_DURATION_SECONDS = 4
+
+
+def _decode_map(codes: Dict[str, int]) -> Dict[int, str]:
+    return {code: name for name, code in codes.items()}
+
+
+STATUS_NAMES = _decode_map(STATUS_CODES)
+AUDIO_STATUS_NAMES = _decode_map(AUDIO_STATUS_CODES)
+CRY_REASON_NAMES = _decode_map(CRY_REASON_CODES)
+ACTIVITY_NAMES = _decode_map(ACTIVITY_CODES)
+FIDELITY_NAMES = _decode_map(FIDELITY_CODES)
+
+
+def quantize_confidence(confidence: Optional[float]) -> int:
+    """Map a 0-1 confidence to 0-255."""
+    confidence = min(max(confidence or 0.0, 0.0), 1.0)
+    return int(round(confidence * CONFIDENCE_LEVELS))
+
+
+def dequantize_confidence(level: Optional[int]) -> float:
+    """Map a 0-255 level back to a 0-1 confidence (within 0.002)."""
+    return round((level or 0) / CONFIDENCE_LEVELS, 3)
+
+
+def build_combined_message(cry_reason: Optional[str], activity: Optional[str]) -> str:
+    """Human-readable message for a cry detection."""
+    combined_message = f"Baby crying due to {cry_reason}"
+    if activity:
+        combined_message += f" while {activity}"
+    combined_message += "."
+    return combined_message
+
+
+def report_status(audio_result: Dict, video_result: Dict) -> str:
+    """Overall report status, using the same precedence as combine_results."""
+    if not video_result.get('presence'):
+        return 'no_baby'
+    if audio_result.get('status') == 'cry':
+        return 'cry'
+    return 'present'
+
+
+def summary_category(compact: Dict) -> Optional[str]:
+    """
+    Daily summary bucket of a compact row.
+
+    Returns:
+        'no_baby', 'crying', 'sleeping', 'sitting' or None
+    """
+    status = compact.get('status')
+
+    if status == STATUS_CODES['no_baby']:
+        return 'no_baby'
+    if status == STATUS_CODES['cry']:
+        return 'crying'
+    return ACTIVITY_NAMES.get(compact.get('activity'))
+
+
+def summary_day(timestamp: datetime) -> str:
+    """
+    UTC day a report counts toward in the daily summary.
+
+    Naive timestamps are taken as local time.
+    """
+    return timestamp.astimezone(timezone.utc).strftime("%Y-%m-%d")
+
+
+def _notify_code(notified: bool, notification_status: Optional[Dict]) -> int:
+    if not notification_status:
+        return NOTIFY_NONE
+    if notified or notification_status.get('delivered'):
+        return NOTIFY_DELIVERED
+    if 'not configured' in (notification_status.get('error') or ''):
+        return NOTIFY_NOT_CONFIGURED
+    return NOTIFY_FAILED
+
+
+def encode_report(report: Dict) -> Dict:
+    """
+    Convert a legacy-shaped report into a compact row.
+
+    Free-text error details are not kept; everything else round-trips
+    through decode_report.
+
+    Args:
+        report: Report with audio_result, video_result and notification fields
+
+    Returns:
+        Compact row suitable for the reports_compact table
+    """
+    audio_result = report.get('audio_result') or {}
+    video_result = report.get('video_result') or {}
+    notification_status = report.get('notification_status')
+
+    fidelity = audio_result.get('fidelity') or video_result.get('fidelity') or 'full'
+
+    compact = {
+        "timestamp": report.get('timestamp'),
+        "device_id": report.get('device_id') or 'default',
+        "status": STATUS_CODES[report_status(audio_result, video_result)],
+        "audio_status": AUDIO_STATUS_CODES.get(audio_result.get('status'), AUDIO_STATUS_CODES['error']),
+        "cry_reason": CRY_REASON_CODES.get(audio_result.get('reason')),
+        "activity": ACTIVITY_CODES.get(video_result.get('activity')),
+        "presence": bool(video_result.get('presence')),
+        "audio_conf": quantize_confidence(audio_result.get('confidence')),
+        "video_conf": quantize_confidence(video_result.get('confidence')),
+        "fidelity": FIDELITY_CODES.get(fidelity, FIDELITY_CODES['full']),
+        "notify_code": _notify_code(report.get('notified', False), notification_status),
+        "notify_sid": (notification_status or {}).get('sid'),
+        "duration_seconds": int(round(report.get('duration_seconds') or DEFAULT_DURATION_SECONDS))
+    }
+
+    for key in ('id', 'created_at'):
+        if report.get(key) is not None:
+            compact[key] = report[key]
+
+    return compact
+
+
+def decode_report(compact: Dict) -> Dict:
+    """
+    Expand a compact row into the legacy report JSON shape.
+
+    Args:
+        compact: Row from the reports_compact table
+
+    Returns:
+        Report with audio_result, video_result, combined_message and notification fields
+    """
+    cry_reason = CRY_REASON_NAMES.get(compact.get('cry_reason'))
+    activity = ACTIVITY_NAMES.get(compact.get('activity'))
+    status = STATUS_NAMES.get(compact.get('status'))
+    notify_code = compact.get('notify_code') or NOTIFY_NONE
+
+    audio_result = {
+        "status": AUDIO_STATUS_NAMES.get(compact.get('audio_status'), 'error'),
+        "reason": cry_reason,
+        "confidence": dequantize_confidence(compact.get('audio_conf'))
+    }
+    video_result = {
+        "presence": bool(compact.get('presence')),
+        "activity": activity,
+        "confidence": dequantize_confidence(compact.get('video_conf'))
+    }
+
+    if compact.get('fidelity') == FIDELITY_CODES['reduced']:
+        audio_result['fidelity'] = 'reduced'
+        video_result['fidelity'] = 'reduced'
+
+    notification_status = None
+    if notify_code != NOTIFY_NONE:
+        notification_status = {
+            "provider": "twilio",
+            "delivered": notify_code == NOTIFY_DELIVERED,
+            "sid": compact.get('notify_sid'),
+            "error": {
+                NOTIFY_FAILED: "Delivery failed",
+                NOTIFY_NOT_CONFIGURED: "Twilio not configured"
+            }.get(notify_code)
+        }
+
+    return {
+        "id": compact.get('id'),
+        "timestamp": compact.get('timestamp'),
+        "device_id": compact.get('device_id'),
+        "audio_result": audio_result,
+        "video_result": video_result,
+        "combined_message": build_combined_message(cry_reason, activity) if status == 'cry' else None,
+        "notified": notify_code == NOTIFY_DELIVERED,
+        "notification_status": notification_status,
+        "duration_seconds": compact.get('duration_seconds') or DEFAULT_DURATION_SECONDS,
+        "created_at": compact.get('created_at')
+    }
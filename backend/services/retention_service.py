@@ -0,0 +1,130 @@
+"""
+Retention Service - Downsamples and drops old raw reports
+Raw reports older than the retention window are folded into per-interval
+state summaries in small batches, then empty daily partitions are dropped.
+
+Run once from backend/ with:
+    python -m services.retention_service
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from services.database_service import DatabaseService
+
+
+class RetentionService:
+    def __init__(
+        self,
+        database_service: DatabaseService,
+        retention_days: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        interval_seconds: Optional[int] = None,
+        batch_pause: Optional[float] = None
+    ):
+        """
+        Initialize retention job.
+
+        Args:
+            database_service: Storage to maintain (Supabase or local)
+            retention_days: Days of raw reports to keep
+            batch_size: Raw rows downsampled per transaction
+            interval_seconds: Width of each summary bucket
+            batch_pause: Seconds to sleep between batches
+        """
+        if retention_days is None:
+            retention_days = int(os.getenv('RETENTION_DAYS', 7))
+        if batch_size is None:
+            batch_size = int(os.getenv('RETENTION_BATCH_SIZE', 500))
+        if interval_seconds is None:
+            interval_seconds = int(os.getenv('RETENTION_SUMMARY_INTERVAL', 300))
+        if batch_pause is None:
+            batch_pause = float(os.getenv('RETENTION_BATCH_PAUSE', 0.2))
+
+        self.database_service = database_service
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self.batch_pause = batch_pause
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def run_once(self, max_batches: Optional[int] = None) -> Dict:
+        """
+        Run one maintenance pass.
+
+        Args:
+            max_batches: Stop after this many batches (None for until caught up)
+
+        Returns:
+            Dict with cutoff, rows downsampled, batches and partitions dropped
+        """
+        # Keep upcoming partitions in place so inserts never land in the default partition.
+        # A failure here must not stop old reports from being downsampled.
+        try:
+            self.database_service.ensure_partitions()
+        except Exception as e:
+            print(f"Error creating report partitions: {e}")
+
+        # Align the cutoff to a bucket boundary so a bucket is never split across passes
+        now = datetime.now(timezone.utc) - timedelta(days=self.retention_days)
+        cutoff_epoch = (int(now.timestamp()) // self.interval_seconds) * self.interval_seconds
+        cutoff = datetime.fromtimestamp(cutoff_epoch, tz=timezone.utc)
+
+        rows = 0
+        batches = 0
+
+        while max_batches is None or batches < max_batches:
+            if self._stop.is_set():
+                break
+
+            processed = self.database_service.downsample_batch(
+                cutoff, self.batch_size, self.interval_seconds
+            )
+            rows += processed
+            batches += 1
+
+            if processed < self.batch_size:
+                break
+
+            # Yield between batches so live inserts and reads are never starved
+            time.sleep(self.batch_pause)
+
+        dropped = self.database_service.drop_partitions_before(cutoff)
+
+        return {
+            "cutoff": cutoff.isoformat(),
+            "rows_downsampled": rows,
+            "batches": batches,
+            "partitions_dropped": dropped
+        }
+
+    def start_background(self, period_seconds: float):
+        """Run maintenance passes on a daemon thread every period_seconds."""
+        if self._thread is not None:
+            return
+
+        def loop():
+            while not self._stop.wait(period_seconds):
+                try:
+                    result = self.run_once()
+                    print(f"Retention pass: {result}")
+                except Exception as e:
+                    print(f"Error in retention pass: {e}")
+
+        self._thread = threading.Thread(target=loop, name='retention', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread after the current batch."""
+        self._stop.set()
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    print(RetentionService(DatabaseService(maintenance=True)).run_once())
@@ -0,0 +1,66 @@
+"""
+Tests for admission control and per-device load shedding
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.admission_controller import ADMITTED, REJECTED, SUPERSEDED, AdmissionController
+
+
+def _wait_for_waiters(controller: AdmissionController, count: int):
+    deadline = time.monotonic() + 5
+    while controller.get_state()["waiting"] != count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_newer_clip_supersedes_waiting_clip_in_full_queue():
+    controller = AdmissionController(max_in_flight=1, max_waiting=1, wait_timeout=5)
+    _, running = controller.admit('nursery')
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        stale = executor.submit(controller.admit, 'crib')
+        _wait_for_waiters(controller, 1)
+        newest = executor.submit(controller.admit, 'crib')
+
+        assert stale.result(timeout=5) == (SUPERSEDED, None)
+        running.release()
+        outcome, ticket = newest.result(timeout=5)
+
+    assert outcome == ADMITTED
+    ticket.release()
+    assert controller.get_state()["superseded_total"] == 1
+
+
+def test_other_device_is_rejected_when_queue_is_full():
+    controller = AdmissionController(max_in_flight=1, max_waiting=1, wait_timeout=5)
+    _, running = controller.admit('nursery')
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        waiting = executor.submit(controller.admit, 'crib')
+        _wait_for_waiters(controller, 1)
+
+        assert controller.admit('playroom') == (REJECTED, None)
+
+        running.release()
+        outcome, ticket = waiting.result(timeout=5)
+
+    assert outcome == ADMITTED
+    ticket.release()
+
+
+def test_waiting_clip_is_rejected_after_timeout():
+    controller = AdmissionController(max_in_flight=1, max_waiting=1, wait_timeout=0.1)
+    _, running = controller.admit('nursery')
+
+    assert controller.admit('crib') == (REJECTED, None)
+
+    state = controller.get_state()
+    assert state["waiting"] == 0 and state["rejected_total"] == 1
+
+    # The timed-out clip no longer counts as waiting, so the device is not
+    # treated as replacing it
+    running.release()
+    outcome, ticket = controller.admit('crib')
+    assert outcome == ADMITTED
+    ticket.release()
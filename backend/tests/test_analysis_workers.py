@@ -0,0 +1,106 @@
+"""
+Tests for analysis worker timeouts and restarts
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import pytest
+
+from ai_modules.video_analyzer import VideoAnalyzer
+from services.analysis_workers import NO_JOB, AnalysisWorkerPool
+
+original_analyze_frames = VideoAnalyzer.analyze_frames
+
+
+def _write_clip(path: str, value: int):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (64, 48))
+    for _ in range(12):
+        writer.write(np.full((48, 64, 3), value, dtype=np.uint8))
+    writer.release()
+
+
+def _hang(self, frames):
+    if frames[0].mean() > 200:
+        time.sleep(60)
+    return original_analyze_frames(self, frames)
+
+
+def _crash(self, frames):
+    if frames[0].mean() > 200:
+        os._exit(1)
+    return original_analyze_frames(self, frames)
+
+
+@pytest.fixture
+def clips(tmp_path):
+    bad, good = str(tmp_path / "bad.avi"), str(tmp_path / "good.avi")
+    _write_clip(bad, 255)
+    _write_clip(good, 0)
+    return bad, good
+
+
+@pytest.fixture
+def pool_factory(monkeypatch):
+    # Forked workers inherit the patched analyzer
+    monkeypatch.setenv('ANALYSIS_MP_START', 'fork')
+    pools = []
+
+    def make(analyze_frames, timeout: float = 30.0):
+        monkeypatch.setattr(VideoAnalyzer, 'analyze_frames', analyze_frames)
+        monkeypatch.setenv('ANALYSIS_WORKER_TIMEOUT', str(timeout))
+        pool = AnalysisWorkerPool(workers=1, slots=1, frame_width=64, frame_height=48)
+        pool.liveness_interval = 0.1
+        pools.append(pool)
+        return pool
+
+    yield make
+
+    for pool in pools:
+        pool.close()
+
+
+def _wait_for_restart(pool: AnalysisWorkerPool):
+    deadline = time.monotonic() + 10
+    while pool.restarts == 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+
+@pytest.mark.parametrize("analyze_frames, timeout", [(_hang, 1.0), (_crash, 30.0)], ids=['hung', 'crashed'])
+def test_failed_worker_is_replaced_and_slot_reclaimed(pool_factory, clips, analyze_frames, timeout):
+    bad, good = clips
+    pool = pool_factory(analyze_frames, timeout)
+
+    result = pool.analyze_video(bad)
+    _wait_for_restart(pool)
+
+    assert result["presence"] is False and result["confidence"] == 0.0
+    assert pool.restarts == 1
+
+    # The only slot is free again and the replacement worker analyzes clips
+    result = pool.analyze_video(good)
+    assert "reason" not in result
+    assert result["confidence"] >= 0.6
+
+
+def test_job_lost_before_it_was_recorded_is_reclaimed(pool_factory, clips):
+    bad, good = clips
+    pool = pool_factory(_hang)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        call = executor.submit(pool.analyze_video, bad)
+        deadline = time.monotonic() + 10
+        while pool._running[0] == NO_JOB and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        # As if the worker had died after taking the task but before recording it
+        pool._running[0] = NO_JOB
+        pool._processes[0].terminate()
+        result = call.result(timeout=10)
+
+    assert result["reason"] == "Analysis worker exited"
+    assert pool.restarts == 1
+    assert "reason" not in pool.analyze_video(good)
@@ -0,0 +1,44 @@
+"""
+Tests for the reduced-fidelity audio gate
+"""
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from ai_modules.audio_analyzer import AudioAnalyzer
+from ai_modules.feature_cache import FeatureCache
+from ai_modules.model_backend import HeuristicBackend
+
+
+def _write_tone(path, sample_rate: int, frequency: float, rms: float):
+    t = np.arange(4 * sample_rate) / sample_rate
+    tone = rms * np.sqrt(2) * np.sin(2 * np.pi * frequency * t)
+    sf.write(path, tone.astype(np.float32), sample_rate)
+
+
+def _analyzer() -> AudioAnalyzer:
+    return AudioAnalyzer(feature_cache=FeatureCache(max_entries=0, cache_dir=''), model_backend=HeuristicBackend())
+
+
+@pytest.mark.parametrize("sample_rate", [16000, 48000])
+def test_quiet_high_zcr_clip_is_escalated(tmp_path, sample_rate):
+    path = str(tmp_path / "tone.wav")
+    _write_tone(path, sample_rate, 3000, 0.025)
+    analyzer = _analyzer()
+
+    assert analyzer.analyze(path)["status"] == "cry"
+    assert analyzer.analyze(path, reduced=True)["status"] == "cry"
+
+
+@pytest.mark.parametrize("sample_rate", [16000, 48000])
+def test_quiet_low_zcr_clip_passes_gate(tmp_path, sample_rate):
+    path = str(tmp_path / "hum.wav")
+    _write_tone(path, sample_rate, 100, 0.007)
+    analyzer = _analyzer()
+
+    result = analyzer.analyze(path, reduced=True)
+
+    assert result["status"] == "no_cry"
+    assert result["fidelity"] == "reduced"
+    assert analyzer.analyze(path)["status"] == "no_cry"
@@ -0,0 +1,113 @@
+"""
+Tests for per-device decision smoothing
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.decision_engine import DecisionEngine
+
+START = datetime(2026, 10, 19, 2, 0, 0)
+PRESENT = {"presence": True, "activity": "sleeping", "confidence": 0.8}
+QUIET = {"status": "no_cry", "reason": None, "confidence": 0.85}
+
+
+def _engine() -> DecisionEngine:
+    return DecisionEngine(alpha=0.5, history=8, on_threshold=0.6, off_threshold=0.4,
+                          clip_seconds=4, heartbeat_seconds=60, idle_seconds=30)
+
+
+def _cry(confidence: float) -> dict:
+    return {"status": "cry", "reason": "hunger", "confidence": confidence}
+
+
+def _feed(engine: DecisionEngine, audio_results, start: int = 0):
+    return [
+        engine.update('crib', audio_result, PRESENT, START + timedelta(seconds=4 * (start + index)))
+        for index, audio_result in enumerate(audio_results)
+    ]
+
+
+def _clips_until_crying(engine: DecisionEngine, confidence: float, limit: int = 30) -> int:
+    for clip in range(1, limit + 1):
+        if _feed(engine, [_cry(confidence)], start=10 + clip)[0]["started_crying"]:
+            return clip
+    return None
+
+
+# 0.55 lands exactly on on_threshold by the second clip, and the residue of the
+# off prior after 10 quiet clips keeps it just below
+@pytest.mark.parametrize("confidence, latency", [(0.5, 3), (0.55, 3), (0.6, 2), (0.95, 2)])
+def test_sustained_cry_starts_within_a_few_clips(confidence, latency):
+    engine = _engine()
+    _feed(engine, [QUIET] * 10)
+
+    assert _clips_until_crying(engine, confidence) == latency
+
+
+def test_single_cry_clip_does_not_switch():
+    engine = _engine()
+    _feed(engine, [QUIET] * 10)
+
+    decisions = _feed(engine, [_cry(0.95), QUIET, QUIET], start=10)
+
+    assert not any(decision["changed"] for decision in decisions)
+
+
+def test_first_clip_of_new_device_does_not_switch():
+    engine = _engine()
+
+    decision = engine.update('crib', _cry(0.6), {"presence": True, "activity": "sleeping", "confidence": 0.7}, START)
+
+    assert not decision["started_crying"]
+    assert decision["audio_result"]["status"] == "no_cry"
+    assert _clips_until_crying(engine, 0.6) == 1
+
+
+def test_cry_switches_off_after_quiet_clips():
+    engine = _engine()
+    _feed(engine, [QUIET] * 10 + [_cry(0.6)] * 5)
+
+    decisions = _feed(engine, [QUIET] * 3, start=15)
+
+    assert [decision["audio_result"]["status"] for decision in decisions] == ["cry", "no_cry", "no_cry"]
+
+
+def test_transition_closes_out_previous_state_time():
+    engine = _engine()
+    _feed(engine, [QUIET] * 10)
+
+    segments = [segment for decision in _feed(engine, [_cry(0.6)] * 3, start=10) for segment in decision["segments"]]
+
+    # Clip 1 (absent) and clip 2 (present) were saved as states; clips 3-11 are
+    # closed out when the cry starts on clip 12
+    assert [segment["duration_seconds"] for segment in segments] == [36, 4]
+    assert segments[1]["audio_result"]["status"] == "cry"
+
+
+def test_flush_saves_unsaved_time_once():
+    engine = _engine()
+    _feed(engine, [QUIET] * 5)
+
+    assert engine.flush(idle_seconds=30) == []
+
+    # Clips 1 and 2 were saved as states (absent, then present)
+    flushed = engine.flush()
+    assert [(device_id, segment["duration_seconds"]) for device_id, segment in flushed] == [('crib', 12)]
+    assert flushed[0][1]["timestamp"] == START + timedelta(seconds=16)
+    assert engine.flush() == []
+
+
+def test_segments_carry_reduced_fidelity_of_their_clips():
+    engine = _engine()
+    reduced = dict(QUIET, fidelity="reduced")
+    _feed(engine, [QUIET] * 2)
+
+    decisions = _feed(engine, [QUIET] * 7 + [reduced] + [QUIET] * 8, start=2)
+    heartbeat = next(segment for decision in decisions for segment in decision["segments"])
+
+    assert heartbeat["duration_seconds"] == 60
+    assert heartbeat["audio_result"]["fidelity"] == "reduced"
+    assert heartbeat["video_result"]["fidelity"] == "reduced"
+    assert "fidelity" not in engine.flush()[0][1]["audio_result"]
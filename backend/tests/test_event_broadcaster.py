@@ -0,0 +1,61 @@
+"""
+Tests for server-sent event fan-out
+"""
+
+import json
+
+from services.event_broadcaster import ALL_DEVICES, EventBroadcaster, format_event
+
+
+def _event(payload: bytes):
+    event_line, data_line = payload.decode('utf-8').strip().split('\n')
+    return event_line[len('event: '):], json.loads(data_line[len('data: '):])
+
+
+def test_event_reaches_device_and_all_device_subscribers():
+    broadcaster = EventBroadcaster(max_queue=4, keepalive_seconds=0.01)
+    crib = broadcaster.subscribe('crib')
+    dashboard = broadcaster.subscribe(ALL_DEVICES)
+    nursery = broadcaster.subscribe('nursery')
+
+    broadcaster.publish('crib', 'detection', {"status": "cry"})
+
+    assert _event(crib.pop(0)) == ('detection', {"status": "cry"})
+    assert _event(dashboard.pop(0)) == ('detection', {"status": "cry"})
+    assert nursery.pop(0) is None
+    assert broadcaster.get_state()["published_total"] == 1
+
+
+def test_slow_subscriber_is_told_to_resync_and_closed():
+    broadcaster = EventBroadcaster(max_queue=2, keepalive_seconds=0.01)
+    slow = broadcaster.subscribe('crib')
+    fast = broadcaster.subscribe(ALL_DEVICES)
+
+    for index in range(3):
+        broadcaster.publish('crib', 'detection', {"index": index})
+        if index < 2:
+            fast.pop(0)
+    # The fast subscriber keeps up, so only the third event is queued for it
+    assert _event(fast.pop(0)) == ('detection', {"index": 2})
+
+    # The backlog is replaced by a single resync hint, after which the stream ends
+    stream = broadcaster.stream(slow)
+    assert list(stream) == [b": connected\n\n", format_event('resync', {})]
+
+    state = broadcaster.get_state()
+    assert state["dropped_subscribers_total"] == 1
+    assert state["devices"] == {ALL_DEVICES: 1}
+
+
+def test_closed_subscriber_ignores_later_events():
+    broadcaster = EventBroadcaster(max_queue=1, keepalive_seconds=0.01)
+    subscriber = broadcaster.subscribe('crib')
+
+    broadcaster.publish('crib', 'detection', {"index": 0})
+    broadcaster.publish('crib', 'detection', {"index": 1})
+    broadcaster.publish('crib', 'detection', {"index": 2})
+
+    assert subscriber.closed
+    assert subscriber.pop(0) == format_event('resync', {})
+    assert subscriber.pop(0) is None
+    assert broadcaster.get_state()["dropped_subscribers_total"] == 1
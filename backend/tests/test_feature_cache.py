@@ -0,0 +1,38 @@
+"""
+Tests for the feature cache disk tier limit
+"""
+
+import os
+
+from ai_modules.feature_cache import FeatureCache
+
+
+def test_disk_tier_evicts_least_recently_used_files(tmp_path):
+    cache = FeatureCache(max_entries=0, cache_dir=str(tmp_path), max_disk_entries=10)
+
+    for index in range(10):
+        cache.put(f'video:{index}', {"presence_ratio": index / 10})
+        os.utime(cache._disk_path(f'video:{index}'), (index, index))
+
+    # A disk hit counts as recent use
+    assert cache.get('video:0') == {"presence_ratio": 0.0}
+
+    cache.put('video:10', {"presence_ratio": 1.0})
+
+    assert sorted(int(name[6:-5]) for name in os.listdir(tmp_path)) == [0, 3, 4, 5, 6, 7, 8, 9, 10]
+    assert cache.get('video:1') is None
+
+
+def test_existing_entries_count_toward_limit(tmp_path):
+    unlimited = FeatureCache(max_entries=0, cache_dir=str(tmp_path), max_disk_entries=0)
+    for name in 'abc':
+        unlimited.put(f'audio:{name}', {"rms": 0.1})
+
+    # A restarted process sees the 3 files already there, so its second new
+    # entry takes the tier over 4 and trims it to 3
+    cache = FeatureCache(max_entries=0, cache_dir=str(tmp_path), max_disk_entries=4)
+    cache.put('audio:d', {"rms": 0.1})
+    assert len(os.listdir(tmp_path)) == 4
+
+    cache.put('audio:e', {"rms": 0.1})
+    assert len(os.listdir(tmp_path)) == 3
@@ -0,0 +1,112 @@
+"""
+Tests for SQLite report storage and downsampling
+"""
+
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from services.database_service import DatabaseService
+from services.local_store import LocalReportStore
+
+DAY = datetime(2026, 10, 18, tzinfo=timezone.utc)
+
+
+def _row(minutes: float, status: int, activity=None, duration: int = 60, notify_code: int = 0) -> dict:
+    return {
+        "timestamp": (DAY + timedelta(minutes=minutes)).isoformat(),
+        "device_id": "crib",
+        "status": status,
+        "audio_status": 1 if status == 2 else 0,
+        "cry_reason": 0 if status == 2 else None,
+        "activity": activity,
+        "presence": status != 0,
+        "audio_conf": 200,
+        "video_conf": 200,
+        "fidelity": 0,
+        "notify_code": notify_code,
+        "duration_seconds": duration
+    }
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_BACKEND', 'local')
+    monkeypatch.setenv('LOCAL_DB_PATH', str(tmp_path / 'reports.db'))
+    return DatabaseService()
+
+
+def test_downsample_folds_rows_into_buckets_and_deletes_them(database):
+    store = database.local_store
+    for row in (_row(0, 1, 0), _row(1, 1, 0), _row(2, 2, 0, duration=4, notify_code=1), _row(7, 0), _row(60 * 12, 1, 1)):
+        store.insert_report(row)
+
+    processed = store.downsample_batch(DAY + timedelta(hours=1), batch_size=10, interval_seconds=300)
+
+    assert processed == 4
+    assert len(store.get_reports(limit=10, offset=0)) == 1
+
+    buckets = sorted(store.get_summaries_between(DAY, DAY + timedelta(days=1)), key=lambda b: b['bucket_start'])
+    assert [bucket['bucket_start'] for bucket in buckets] == [DAY.isoformat(), (DAY + timedelta(minutes=5)).isoformat()]
+    assert buckets[0]['sleeping_count'] == 2 and buckets[0]['sleeping_seconds'] == 120
+    assert buckets[0]['cry_count'] == 1 and buckets[0]['cry_seconds'] == 4
+    assert buckets[0]['notified_count'] == 1
+    assert buckets[1]['no_baby_count'] == 1
+
+
+def test_downsample_merges_into_existing_bucket(database):
+    store = database.local_store
+    store.insert_report(_row(0, 1, 0))
+    store.downsample_batch(DAY + timedelta(hours=1), batch_size=10, interval_seconds=300)
+    store.insert_report(_row(1, 1, 0))
+    store.downsample_batch(DAY + timedelta(hours=1), batch_size=10, interval_seconds=300)
+
+    [bucket] = store.get_summaries_between(DAY, DAY + timedelta(days=1))
+    assert bucket['sleeping_count'] == 2 and bucket['sleeping_seconds'] == 120
+
+
+def test_daily_summary_includes_downsampled_buckets(database):
+    store = database.local_store
+    for row in (_row(0, 1, 0), _row(1, 2, 0, duration=120), _row(60 * 12, 1, 0), _row(60 * 13, 1, 1)):
+        store.insert_report(row)
+    store.downsample_batch(DAY + timedelta(hours=1), batch_size=10, interval_seconds=300)
+
+    summary = database.get_daily_summary(DAY)
+
+    assert summary["sleep_minutes"] == 2.0
+    assert summary["cry_minutes"] == 2.0
+    assert summary["active_minutes"] == 1.0
+    assert summary["total_detections"] == 4
+    assert summary["breakdown"] == {"sleeping": 2, "crying": 1, "sitting": 1, "no_baby": 0}
+
+
+def test_daily_summary_uses_the_utc_day(database):
+    store = database.local_store
+    for row in (_row(-1, 1, 0), _row(0, 1, 0), _row(60 * 24 - 1, 2, 0), _row(60 * 24, 1, 1)):
+        store.insert_report(row)
+
+    summary = database.get_daily_summary(datetime(2026, 10, 18, 15))
+
+    assert summary["date"] == "2026-10-18"
+    assert summary["breakdown"] == {"sleeping": 1, "crying": 1, "sitting": 0, "no_baby": 0}
+
+
+def test_day_column_of_older_databases_is_dropped(tmp_path):
+    path = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE reports_compact (id TEXT PRIMARY KEY, timestamp TEXT NOT NULL, ts_epoch REAL NOT NULL,
+          day TEXT NOT NULL, device_id TEXT NOT NULL DEFAULT 'default', status INTEGER NOT NULL,
+          audio_status INTEGER NOT NULL DEFAULT 0, cry_reason INTEGER, activity INTEGER,
+          presence INTEGER NOT NULL DEFAULT 0, audio_conf INTEGER NOT NULL DEFAULT 0,
+          video_conf INTEGER NOT NULL DEFAULT 0, fidelity INTEGER NOT NULL DEFAULT 0,
+          notify_code INTEGER NOT NULL DEFAULT 0, notify_sid TEXT, created_at TEXT);
+        CREATE INDEX idx_reports_compact_day ON reports_compact(day, ts_epoch);
+    """)
+    conn.close()
+
+    store = LocalReportStore(path)
+    store.insert_report(_row(0, 1, 0))
+
+    assert len(store.get_reports(limit=10, offset=0)) == 1
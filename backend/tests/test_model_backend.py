@@ -0,0 +1,43 @@
+"""
+Tests for model backend selection and model paths
+"""
+
+import pytest
+
+from ai_modules import model_backend
+from ai_modules.model_backend import HeuristicBackend, OnnxBackend, get_model_backend, quantized_path
+
+
+@pytest.fixture
+def fresh_backend(monkeypatch):
+    monkeypatch.setattr(model_backend, '_shared_backend', None)
+
+
+def test_onnx_falls_back_to_heuristics_without_onnxruntime(fresh_backend, monkeypatch):
+    monkeypatch.setattr(model_backend, 'ort', None)
+    monkeypatch.setenv('MODEL_BACKEND', 'onnx')
+
+    backend = get_model_backend()
+
+    assert isinstance(backend, HeuristicBackend)
+    assert not backend.has_cry_model and not backend.has_presence_model
+    assert get_model_backend() is backend
+
+
+def test_quantized_path():
+    assert quantized_path('models/cry.onnx') == 'models/cry.int8.onnx'
+    assert quantized_path('presence') == 'presence.int8'
+
+
+@pytest.mark.parametrize("quantized, int8_exists, expected", [
+    (True, True, 'cry.int8.onnx'),
+    (True, False, 'cry.onnx'),
+    (False, True, 'cry.onnx')
+])
+def test_resolve_path_prefers_existing_int8_model(tmp_path, quantized, int8_exists, expected):
+    (tmp_path / 'cry.onnx').write_bytes(b'')
+    if int8_exists:
+        (tmp_path / 'cry.int8.onnx').write_bytes(b'')
+
+    assert OnnxBackend._resolve_path(str(tmp_path / 'cry.onnx'), quantized) == str(tmp_path / expected)
+    assert OnnxBackend._resolve_path(None, quantized) is None
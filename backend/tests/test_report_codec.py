@@ -0,0 +1,89 @@
+"""
+Tests for the compact report codec
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from services.report_codec import CONFIDENCE_LEVELS, CRY_REASON_CODES, decode_report, encode_report, summary_day
+
+TIMESTAMP = "2026-10-19T02:00:00+00:00"
+
+
+def _report(audio_result, video_result, **fields) -> dict:
+    return dict({
+        "timestamp": TIMESTAMP,
+        "device_id": "crib",
+        "audio_result": audio_result,
+        "video_result": video_result,
+        "notified": False,
+        "notification_status": None,
+        "duration_seconds": 4
+    }, **fields)
+
+
+@pytest.mark.parametrize("reason", sorted(CRY_REASON_CODES))
+def test_cry_round_trips_with_each_reason(reason):
+    report = _report(
+        {"status": "cry", "reason": reason, "confidence": 0.83},
+        {"presence": True, "activity": "sitting", "confidence": 0.71},
+        notified=True,
+        notification_status={"provider": "twilio", "delivered": True, "sid": "SM123"}
+    )
+
+    decoded = decode_report(encode_report(report))
+
+    assert decoded["audio_result"]["status"] == "cry"
+    assert decoded["audio_result"]["reason"] == reason
+    assert decoded["video_result"] == {"presence": True, "activity": "sitting", "confidence": pytest.approx(0.71, abs=0.002)}
+    assert decoded["combined_message"] == f"Baby crying due to {reason} while sitting."
+    assert decoded["notified"] is True
+    assert decoded["notification_status"]["sid"] == "SM123"
+
+
+@pytest.mark.parametrize("audio_result, video_result, activity", [
+    ({"status": "no_cry", "reason": None, "confidence": 0.9}, {"presence": True, "activity": "sleeping", "confidence": 0.8}, "sleeping"),
+    ({"status": "no_cry", "reason": None, "confidence": 0.9}, {"presence": False, "activity": None, "confidence": 0.6}, None),
+    ({"status": "error", "reason": None, "confidence": None, "error": "decode"}, {"presence": True, "activity": "sitting", "confidence": 0.7}, "sitting")
+], ids=['present', 'no_baby', 'audio_error'])
+def test_non_cry_statuses_round_trip(audio_result, video_result, activity):
+    decoded = decode_report(encode_report(_report(audio_result, video_result)))
+
+    assert decoded["audio_result"]["status"] == audio_result["status"]
+    assert decoded["audio_result"]["reason"] is None
+    assert decoded["video_result"]["presence"] == video_result["presence"]
+    assert decoded["video_result"]["activity"] == activity
+    assert decoded["combined_message"] is None
+    assert decoded["timestamp"] == TIMESTAMP and decoded["device_id"] == "crib"
+
+
+def test_null_confidence_decodes_as_zero():
+    compact = encode_report(_report(
+        {"status": "error", "reason": None, "confidence": None},
+        {"presence": False, "activity": None}
+    ))
+
+    assert compact["audio_conf"] == 0 and compact["video_conf"] == 0
+    assert decode_report(compact)["audio_result"]["confidence"] == 0.0
+
+
+def test_quantization_error_is_bounded():
+    for step in range(1001):
+        confidence = step / 1000
+        compact = encode_report(_report(
+            {"status": "no_cry", "reason": None, "confidence": confidence},
+            {"presence": True, "activity": "sleeping", "confidence": confidence}
+        ))
+
+        assert 0 <= compact["audio_conf"] <= CONFIDENCE_LEVELS
+        decoded = decode_report(compact)["audio_result"]["confidence"]
+        assert abs(decoded - confidence) <= 0.5 / CONFIDENCE_LEVELS + 0.0005
+
+
+def test_summary_day_is_the_utc_day():
+    evening = datetime(2026, 10, 18, 23, 30, tzinfo=timezone(timedelta(hours=-5)))
+    early = datetime(2026, 10, 19, 2, 0, tzinfo=timezone(timedelta(hours=5, minutes=30)))
+
+    assert summary_day(evening) == "2026-10-19"
+    assert summary_day(early) == "2026-10-18"
@@ -0,0 +1,53 @@
+"""
+Tests for msgpack and gzip response negotiation
+"""
+
+import gzip
+import json
+
+import pytest
+from flask import Flask
+
+from utils.response_encoding import GZIP_MIN_SIZE, encode_response
+
+app = Flask(__name__)
+
+PAYLOAD = {"reports": [{"id": str(index), "status": 1, "audio_conf": 200} for index in range(60)]}
+
+
+def _encode(headers: dict, payload: dict = PAYLOAD):
+    with app.test_request_context(headers=headers):
+        return encode_response(payload)
+
+
+def test_plain_json_by_default():
+    response = _encode({})
+
+    assert response.mimetype == 'application/json'
+    assert 'Content-Encoding' not in response.headers
+    assert json.loads(response.get_data()) == PAYLOAD
+
+
+def test_gzip_when_accepted_and_large_enough():
+    response = _encode({'Accept-Encoding': 'gzip, deflate'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.get_data())) == PAYLOAD
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+
+def test_small_bodies_are_not_gzipped():
+    response = _encode({'Accept-Encoding': 'gzip'}, {"ok": True})
+
+    assert len(response.get_data()) < GZIP_MIN_SIZE
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_msgpack_when_accepted():
+    msgpack = pytest.importorskip('msgpack')
+
+    response = _encode({'Accept': 'application/msgpack'})
+
+    assert response.mimetype == 'application/msgpack'
+    assert msgpack.unpackb(response.get_data(), raw=False) == PAYLOAD
+    assert 'Accept' in response.headers['Vary']
@@ -0,0 +1,65 @@
+"""
+Tests for streamed upload parsing
+"""
+
+import io
+
+import pytest
+from werkzeug.test import EnvironBuilder
+
+from utils import file_handler
+from utils.file_handler import UploadRequest
+
+WAV_HEADER = b'RIFF\x24\x00\x00\x00WAVEfmt '
+
+
+def _request(data) -> UploadRequest:
+    environ = EnvironBuilder(method='POST', data=data).get_environ()
+    return UploadRequest(environ)
+
+
+@pytest.fixture
+def upload_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_handler, 'UPLOAD_FOLDER', str(tmp_path))
+    return tmp_path
+
+
+@pytest.mark.parametrize("rejected", [
+    b'notamediafile...' * 4,
+    b'OggS' + b'\0' * (file_handler.MAX_FILE_SIZE + 1)
+], ids=['unsupported', 'too_large'])
+def test_rejected_part_cleans_up_earlier_parts(upload_folder, rejected):
+    request = _request({
+        'audio': (io.BytesIO(WAV_HEADER + b'\0' * 1024), 'audio.wav'),
+        'video': (io.BytesIO(rejected), 'video.webm')
+    })
+
+    with pytest.raises((file_handler.UploadTooLarge, file_handler.UnsupportedUpload)):
+        request.files
+
+    assert len(list(upload_folder.iterdir())) == 1
+
+    request.close()
+
+    assert list(upload_folder.iterdir()) == []
+
+
+def test_close_keeps_finalized_uploads(upload_folder):
+    request = _request({'audio': (io.BytesIO(WAV_HEADER + b'\0' * 1024), 'audio.wav')})
+
+    path, error = file_handler.save_uploaded_file(request.files['audio'], 'audio')
+    request.close()
+
+    assert error is None
+    assert [p.name for p in upload_folder.iterdir()] == [path.rsplit('/', 1)[1]]
+
+
+def test_refund_restores_budget_of_unread_request():
+    budget = file_handler.UploadBandwidthBudget(bytes_per_second=1, burst_bytes=1000)
+
+    assert budget.try_consume('crib', 1000) == 0
+    assert budget.try_consume('crib', 1000) > 0
+
+    budget.refund('crib', 1000)
+
+    assert budget.try_consume('crib', 1000) == 0
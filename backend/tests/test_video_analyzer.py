@@ -0,0 +1,77 @@
+"""
+Tests for multi-resolution presence detection
+"""
+
+import numpy as np
+
+from ai_modules.feature_cache import FeatureCache
+from ai_modules.model_backend import HeuristicBackend
+from ai_modules.video_analyzer import VideoAnalyzer
+
+
+def _analyzer(monkeypatch, downscaled_hits: int, full_res_hits: int) -> VideoAnalyzer:
+    """Analyzer whose cascade finds a face in the first N of every 10 frames, by scale."""
+    analyzer = VideoAnalyzer(feature_cache=FeatureCache(max_entries=0, cache_dir=''), model_backend=HeuristicBackend())
+    analyzer.presence_scale = 0.5
+    analyzer.presence_ambiguity = 0.15
+
+    def has_face(gray, scale):
+        hits = full_res_hits if scale >= 1.0 else downscaled_hits
+        return int(gray[0, 0]) % 10 < hits
+
+    monkeypatch.setattr(analyzer, '_has_face', has_face)
+    return analyzer
+
+
+def _frames(count: int = 20):
+    # Each frame's pixel value is its index, so the fake cascade can tell them apart
+    return [np.full((8, 8, 3), index, dtype=np.uint8) for index in range(count)]
+
+
+def test_ambiguous_ratio_is_confirmed_at_full_resolution(monkeypatch):
+    analyzer = _analyzer(monkeypatch, downscaled_hits=3, full_res_hits=6)
+
+    features = analyzer._extract_presence_features(_frames(), frame_step=1)
+
+    assert features == {"presence_ratio": 0.6, "full_res_checks": 20}
+    assert analyzer._detect_presence(features)[0]
+
+
+def test_confirm_can_reject_downscaled_hits(monkeypatch):
+    analyzer = _analyzer(monkeypatch, downscaled_hits=4, full_res_hits=0)
+
+    features = analyzer._extract_presence_features(_frames(), frame_step=1)
+
+    assert features == {"presence_ratio": 0.0, "full_res_checks": 20}
+    assert not analyzer._detect_presence(features)[0]
+
+
+def test_clear_ratio_skips_full_resolution(monkeypatch):
+    analyzer = _analyzer(monkeypatch, downscaled_hits=9, full_res_hits=0)
+
+    features = analyzer._extract_presence_features(_frames(), frame_step=1)
+
+    assert features == {"presence_ratio": 0.9, "full_res_checks": 0}
+
+
+def test_cache_tag_changes_with_threshold(monkeypatch):
+    analyzer = _analyzer(monkeypatch, downscaled_hits=0, full_res_hits=0)
+    tag = analyzer._presence_config_tag()
+
+    analyzer.presence_threshold = 0.5
+
+    assert analyzer._presence_config_tag() != tag
+
+
+def test_reduced_clip_needs_two_of_three_hits(monkeypatch):
+    one_hit = _analyzer(monkeypatch, downscaled_hits=1, full_res_hits=1)
+    two_hits = _analyzer(monkeypatch, downscaled_hits=4, full_res_hits=4)
+    threshold = one_hit._threshold(reduced=True)
+
+    # Frames 0, 3 and 6 are checked: a face in 1 of them, then in 2 of them
+    one = one_hit._extract_presence_features(_frames(9), 3, threshold)
+    two = two_hits._extract_presence_features(_frames(9), 3, threshold)
+
+    assert not one_hit._detect_presence(one, threshold)[0]
+    assert two_hits._detect_presence(two, threshold)[0]
+    assert one_hit._detect_presence(one)[0]
@@ -3,14 +3,239 @@ File handling utilities for uploaded audio and video files
 """
 
 import os
+import threading
+import time
 import uuid
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
 from werkzeug.utils import secure_filename
-from typing import Tuple
+from flask import Request
+from typing import Dict, Optional, Tuple
 
 UPLOAD_FOLDER = '/tmp/baby_monitor_uploads'
 ALLOWED_AUDIO_EXTENSIONS = {'wav', 'mp3', 'ogg', 'webm', 'm4a'}
 ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'webm', 'avi', 'mov'}
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+MAX_REQUEST_SIZE = 2 * MAX_FILE_SIZE + 64 * 1024  # audio + video + form fields
+COPY_CHUNK_SIZE = 64 * 1024
+SNIFF_BYTES = 12
+
+# Containers recognised by their header, and the extension each is saved with
+ALLOWED_AUDIO_CONTAINERS = {'webm', 'wav', 'ogg', 'mp3', 'mp4'}
+ALLOWED_VIDEO_CONTAINERS = {'webm', 'mp4', 'avi'}
+CONTAINER_EXTENSIONS = {
+    'webm': 'webm',
+    'wav': 'wav',
+    'ogg': 'ogg',
+    'mp3': 'mp3',
+    'mp4': 'mp4',
+    'avi': 'avi'
+}
+
+
+class UploadTooLarge(RequestEntityTooLarge):
+    description = f"File too large (max {MAX_FILE_SIZE // 1024 // 1024}MB)"
+
+
+class UnsupportedUpload(UnsupportedMediaType):
+    description = "Unrecognized media container"
+
+
+def sniff_container(header: bytes) -> Optional[str]:
+    """
+    Identify a media container from its first bytes.
+
+    Returns:
+        Container name or None if unrecognized
+    """
+    if header.startswith(b'\x1a\x45\xdf\xa3'):
+        return 'webm'  # EBML (WebM / Matroska)
+    if header.startswith(b'RIFF') and header[8:12] == b'WAVE':
+        return 'wav'
+    if header.startswith(b'RIFF') and header[8:12] == b'AVI ':
+        return 'avi'
+    if header.startswith(b'OggS'):
+        return 'ogg'
+    if header.startswith(b'ID3') or (len(header) > 1 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return 'mp3'
+    if header[4:8] in (b'ftyp', b'moov', b'mdat', b'wide', b'free'):
+        return 'mp4'  # ISO base media (MP4 / M4A / QuickTime)
+    return None
+
+
+class UploadStream:
+    """
+    Disk-backed stream that uploads are parsed into.
+
+    Counts bytes as the request body is read, aborting with 413 as soon as
+    MAX_FILE_SIZE is exceeded and with 415 if the header is not a known
+    container, so oversized or bogus uploads are never fully written.
+    """
+
+    def __init__(self, max_size: int = MAX_FILE_SIZE):
+        self.max_size = max_size
+        self.path = os.path.join(UPLOAD_FOLDER, f"upload_{uuid.uuid4()}.part")
+        self.bytes_written = 0
+        self.container = None
+        self.finalized = False
+        self._header = b''
+        self._file = open(self.path, 'w+b')
+
+    def write(self, data) -> int:
+        self.bytes_written += len(data)
+
+        if self.bytes_written > self.max_size:
+            self.close()
+            raise UploadTooLarge()
+
+        if len(self._header) < SNIFF_BYTES:
+            self._header += bytes(data[:SNIFF_BYTES - len(self._header)])
+
+            if len(self._header) >= SNIFF_BYTES:
+                self.container = sniff_container(self._header)
+                if self.container is None:
+                    self.close()
+                    raise UnsupportedUpload()
+
+        return self._file.write(data)
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def flush(self):
+        self._file.flush()
+
+    def readable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def detected_container(self) -> Optional[str]:
+        """Container sniffed from the header, including uploads shorter than SNIFF_BYTES."""
+        if self.container is None:
+            self.container = sniff_container(self._header)
+        return self.container
+
+    def finalize(self, file_type: str) -> str:
+        """Move the finished upload to its final name and keep it on disk."""
+        self._file.close()
+
+        ext = CONTAINER_EXTENSIONS.get(self.detected_container(), 'bin')
+        file_path = os.path.join(UPLOAD_FOLDER, f"{file_type}_{uuid.uuid4()}.{ext}")
+        os.replace(self.path, file_path)
+        self.finalized = True
+
+        return file_path
+
+    def close(self):
+        """Close and delete the upload unless it has been finalized."""
+        if not self._file.closed:
+            self._file.close()
+
+        if not self.finalized:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+class UploadRequest(Request):
+    """Flask request that parses uploaded files straight into UploadStreams."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        stream = UploadStream()
+
+        # A later part can abort parsing with 413/415 before request.files holds
+        # this stream, so keep our own list for close() to clean up
+        if not hasattr(self, '_upload_streams'):
+            self._upload_streams = []
+        self._upload_streams.append(stream)
+
+        return stream
+
+    def close(self):
+        """Close every upload stream, deleting the ones that were never finalized."""
+        try:
+            super().close()
+        finally:
+            for stream in getattr(self, '_upload_streams', ()):
+                stream.close()
+
+
+class UploadBandwidthBudget:
+    def __init__(self, bytes_per_second: Optional[float] = None, burst_bytes: Optional[int] = None):
+        """
+        Per-device token bucket on uploaded bytes.
+
+        Args:
+            bytes_per_second: Sustained upload rate allowed per device
+            burst_bytes: Bucket size (bytes a device may send at once)
+        """
+        if bytes_per_second is None:
+            bytes_per_second = float(os.getenv('UPLOAD_BANDWIDTH_BYTES_PER_SEC', 1024 * 1024))
+        if burst_bytes is None:
+            burst_bytes = int(os.getenv('UPLOAD_BANDWIDTH_BURST_BYTES', 2 * MAX_REQUEST_SIZE))
+
+        self.bytes_per_second = bytes_per_second
+        self.burst_bytes = burst_bytes
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def _refill(self, device_id: str, now: float) -> float:
+        tokens, updated_at = self._buckets.get(device_id, (self.burst_bytes, now))
+        return min(self.burst_bytes, tokens + (now - updated_at) * self.bytes_per_second)
+
+    def try_consume(self, device_id: str, nbytes: int) -> int:
+        """
+        Take nbytes from the device's budget if available.
+
+        Returns:
+            0 if consumed, otherwise seconds until the budget allows it
+        """
+        if self.bytes_per_second <= 0:
+            return 0
+
+        now = time.monotonic()
+
+        with self._lock:
+            tokens = self._refill(device_id, now)
+            needed = min(nbytes, self.burst_bytes)
+
+            if tokens < needed:
+                self._buckets[device_id] = (tokens, now)
+                return max(1, int((needed - tokens) / self.bytes_per_second + 0.999))
+
+            self._buckets[device_id] = (tokens - nbytes, now)
+            return 0
+
+    def refund(self, device_id: str, nbytes: int):
+        """Give back bytes taken by try_consume for a request whose body was never read."""
+        if self.bytes_per_second <= 0:
+            return
+
+        now = time.monotonic()
+
+        with self._lock:
+            self._buckets[device_id] = (min(self.burst_bytes, self._refill(device_id, now) + nbytes), now)
+
+    def charge(self, device_id: str, nbytes: int):
+        """Deduct bytes already received (e.g. chunked uploads without Content-Length)."""
+        if self.bytes_per_second <= 0:
+            return
+
+        now = time.monotonic()
+
+        with self._lock:
+            self._buckets[device_id] = (self._refill(device_id, now) - nbytes, now)
 
 def init_upload_folder():
     """Create upload folder if it doesn't exist."""
@@ -30,10 +255,23 @@ def allowed_file(filename: str, file_type: str) -> bool:
 
     return False
 
+def allowed_container(container: Optional[str], file_type: str) -> bool:
+    """Check if a sniffed container is allowed for the file type."""
+    if file_type == 'audio':
+        return container in ALLOWED_AUDIO_CONTAINERS
+    elif file_type == 'video':
+        return container in ALLOWED_VIDEO_CONTAINERS
+
+    return False
+
 def save_uploaded_file(file, file_type: str) -> Tuple[str, str]:
     """
     Save uploaded file with unique name.
 
+    Uploads parsed by UploadRequest are already on disk with their size and
+    container checked, and are only renamed. Other streams are copied in
+    chunks with the same checks applied while reading.
+
     Args:
         file: FileStorage object from Flask
         file_type: 'audio' or 'video'
@@ -47,22 +285,52 @@ def save_uploaded_file(file, file_type: str) -> Tuple[str, str]:
     if not allowed_file(file.filename, file_type):
         return None, f"Invalid {file_type} file type"
 
+    stream = file.stream
+
+    if isinstance(stream, UploadStream):
+        if not allowed_container(stream.detected_container(), file_type):
+            stream.close()
+            return None, f"Invalid {file_type} file type"
+
+        try:
+            return stream.finalize(file_type), None
+        except Exception as e:
+            stream.close()
+            return None, f"Error saving file: {str(e)}"
+
+    # Sniff the header before writing anything
+    header = stream.read(SNIFF_BYTES)
+    container = sniff_container(header)
+    if not allowed_container(container, file_type):
+        return None, f"Invalid {file_type} file type"
+
     # Generate unique filename
-    ext = file.filename.rsplit('.', 1)[1].lower()
-    unique_filename = f"{file_type}_{uuid.uuid4()}.{ext}"
+    unique_filename = f"{file_type}_{uuid.uuid4()}.{CONTAINER_EXTENSIONS[container]}"
     file_path = os.path.join(UPLOAD_FOLDER, unique_filename)
 
     try:
-        file.save(file_path)
+        size = len(header)
+
+        with open(file_path, 'wb') as f:
+            f.write(header)
+
+            for chunk in iter(lambda: stream.read(COPY_CHUNK_SIZE), b''):
+                size += len(chunk)
+
+                # Abort as soon as the limit is passed
+                if size > MAX_FILE_SIZE:
+                    break
+
+                f.write(chunk)
 
-        # Check file size
-        if os.path.getsize(file_path) > MAX_FILE_SIZE:
+        if size > MAX_FILE_SIZE:
             os.remove(file_path)
             return None, f"File too large (max {MAX_FILE_SIZE // 1024 // 1024}MB)"
 
         return file_path, None
 
     except Exception as e:
+        cleanup_file(file_path)
         return None, f"Error saving file: {str(e)}"
 
 def cleanup_file(file_path: str):
@@ -0,0 +1,54 @@
+"""
+Response encoding utilities - MessagePack and gzip for large API responses
+"""
+
+import gzip
+import json
+from flask import Response, request
+
+try:
+    import msgpack
+except ImportError:  # Optional dependency, JSON is used when missing
+    msgpack = None
+
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+GZIP_MIN_SIZE = 1024  # Smaller bodies are not worth compressing
+
+
+def wants_msgpack() -> bool:
+    """Whether the client asked for MessagePack and it is available."""
+    if msgpack is None:
+        return False
+
+    accept = request.headers.get('Accept', '')
+    return any(mimetype in accept for mimetype in MSGPACK_MIMETYPES)
+
+
+def encode_response(payload, status: int = 200) -> Response:
+    """
+    Serialize a payload as JSON or MessagePack, gzip-compressed when accepted.
+
+    Args:
+        payload: JSON-serializable data
+        status: HTTP status code
+
+    Returns:
+        Flask Response
+    """
+    if wants_msgpack():
+        body = msgpack.packb(payload, use_bin_type=True)
+        mimetype = 'application/msgpack'
+    else:
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        mimetype = 'application/json'
+
+    response = Response(body, status=status, mimetype=mimetype)
+    response.vary.add('Accept')
+    response.vary.add('Accept-Encoding')
+
+    accepts_gzip = 'gzip' in request.headers.get('Accept-Encoding', '')
+    if accepts_gzip and len(body) >= GZIP_MIN_SIZE:
+        response.set_data(gzip.compress(body, compresslevel=5))
+        response.headers['Content-Encoding'] = 'gzip'
+
+    return response
@@ -0,0 +1,114 @@
+"""
+Shared Frames - Shared-memory ring buffer for decoded frames and PCM samples
+The decoding process writes arrays straight into a fixed slot of one
+shared-memory segment; analysis processes map the same slot as a numpy
+view. Only a small descriptor (slot, shape, dtype) crosses the queue.
+"""
+
+import queue
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+class SharedFrameRing:
+    def __init__(self, slots: int, slot_bytes: int, name: Optional[str] = None):
+        """
+        Create a ring, or attach to an existing one by name.
+
+        Args:
+            slots: Number of arrays that can be in flight at once
+            slot_bytes: Capacity of each slot in bytes
+            name: Shared-memory name of an existing ring to attach to
+        """
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.owner = name is None
+
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+
+        # Only the creating process hands out slots
+        self._free: Optional[queue.Queue] = None
+        if self.owner:
+            self._free = queue.Queue()
+            for slot in range(slots):
+                self._free.put(slot)
+
+    @property
+    def name(self) -> str:
+        """Shared-memory name other processes attach with."""
+        return self.shm.name
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[int]:
+        """
+        Reserve a free slot.
+
+        Args:
+            timeout: Seconds to wait for a slot (None waits forever)
+
+        Returns:
+            Slot index, or None if no slot freed up in time
+        """
+        try:
+            return self._free.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def release(self, slot: int):
+        """Return a slot once the reader is done with it."""
+        self._free.put(slot)
+
+    def slot_array(self, slot: int, shape: Tuple[int, ...], dtype) -> np.ndarray:
+        """
+        Writable array backed by a slot, for decoding directly into shared memory.
+
+        Raises:
+            ValueError: If the array does not fit in a slot
+        """
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        if nbytes > self.slot_bytes:
+            raise ValueError(f"Array of {nbytes} bytes does not fit a {self.slot_bytes} byte slot")
+
+        return np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+
+    def write(self, slot: int, array: np.ndarray) -> Dict:
+        """
+        Copy an array into a slot.
+
+        Returns:
+            Descriptor to send to the reading process
+        """
+        self.slot_array(slot, array.shape, array.dtype)[...] = array
+        return self.describe(slot, array.shape, array.dtype)
+
+    def describe(self, slot: int, shape: Tuple[int, ...], dtype) -> Dict:
+        """Descriptor of an array already written to a slot."""
+        return {
+            "slot": slot,
+            "shape": tuple(int(dim) for dim in shape),
+            "dtype": np.dtype(dtype).str
+        }
+
+    def view(self, descriptor: Dict) -> np.ndarray:
+        """
+        Read-only zero-copy view of the array a descriptor points at.
+
+        The view must be dropped before the slot is released or the ring closed.
+        """
+        array = self.slot_array(descriptor["slot"], descriptor["shape"], descriptor["dtype"])
+        array.flags.writeable = False
+        return array
+
+    def close(self):
+        """Detach from the shared-memory segment."""
+        self.shm.close()
+
+    def unlink(self):
+        """Free the segment; call once, from the creating process, after close."""
+        if self.owner:
+            self.shm.unlink()
@@ -1,15 +1,53 @@
 import { useState, useEffect } from 'react';
 import { BarChart3, Moon, AlertTriangle, Activity } from 'lucide-react';
-import { getDailySummary } from '../services/api';
+import { getDailySummary, subscribeToEvents } from '../services/api';
+import type { SummaryDelta } from '../services/api';
 import type { DailySummary as DailySummaryType } from '../types';
 
+// Rounded like the backend summary
+const toMinutes = (seconds: number) => Math.round((seconds / 60) * 10) / 10;
+
+function applySummaryDelta(
+  summary: DailySummaryType | null,
+  delta: SummaryDelta
+): DailySummaryType | null {
+  if (!summary || summary.date !== delta.date) return summary;
+
+  const breakdown = {
+    ...summary.breakdown,
+    [delta.category]: summary.breakdown[delta.category] + delta.detections,
+  };
+  const breakdownSeconds = {
+    ...summary.breakdown_seconds,
+    [delta.category]: summary.breakdown_seconds[delta.category] + delta.seconds,
+  };
+
+  return {
+    ...summary,
+    breakdown,
+    breakdown_seconds: breakdownSeconds,
+    total_detections: summary.total_detections + delta.detections,
+    no_baby_detections: breakdown.no_baby,
+    sleep_minutes: toMinutes(breakdownSeconds.sleeping),
+    cry_minutes: toMinutes(breakdownSeconds.crying),
+    active_minutes: toMinutes(breakdownSeconds.sitting),
+  };
+}
+
 export default function DailySummary() {
   const [summary, setSummary] = useState<DailySummaryType | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
   useEffect(() => {
+    // Open the stream before the first fetch so reports saved in between are not missed
+    const unsubscribe = subscribeToEvents({
+      onSummaryDelta: (delta) => setSummary((current) => applySummaryDelta(current, delta)),
+      onResync: () => loadSummary(),
+    });
     loadSummary();
+
+    return unsubscribe;
   }, []);
 
   const loadSummary = async () => {
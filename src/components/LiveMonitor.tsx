@@ -1,7 +1,7 @@
 import { useState, useEffect, useRef } from 'react';
 import { Camera, CameraOff, AlertCircle, CheckCircle } from 'lucide-react';
 import { useMediaCapture } from '../hooks/useMediaCapture';
-import { analyzeMedia } from '../services/api';
+import { analyzeMedia, getDeviceId } from '../services/api';
 import type { AnalysisResponse } from '../types';
 import DetectionCard from './DetectionCard';
 
@@ -12,6 +12,7 @@ export default function LiveMonitor() {
   const [voiceAlertsEnabled, setVoiceAlertsEnabled] = useState(true);
   const [isAnalyzing, setIsAnalyzing] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const [deviceId] = useState(getDeviceId);
 
   const videoRef = useRef<HTMLVideoElement>(null);
   const intervalRef = useRef<NodeJS.Timeout | null>(null);
@@ -86,14 +87,14 @@ export default function LiveMonitor() {
 
       const { audioBlob, videoBlob } = await captureSegment(videoStream, audioStream);
 
-      const result = await analyzeMedia(audioBlob, videoBlob, new Date());
+      const result = await analyzeMedia(audioBlob, videoBlob, new Date(), deviceId);
 
       setCurrentDetection(result);
 
-      // Handle cry detection
-      if (result.status === 'cry') {
+      // Alert when the baby starts crying, the only time the backend sends an SMS
+      if (result.started_crying) {
         playVoiceAlert('Baby crying detected, please check.');
-        setLastSmsStatus('SMS alert sent');
+        setLastSmsStatus(result.notified ? 'SMS alert sent' : 'SMS alert not sent');
       }
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Analysis failed');
@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react';
 import { Clock, AlertCircle, CheckCircle, Baby } from 'lucide-react';
-import { getReports } from '../services/api';
+import { getReports, subscribeToEvents } from '../services/api';
 import type { Report } from '../types';
 
 export default function ReportHistory() {
@@ -9,7 +9,14 @@ export default function ReportHistory() {
   const [error, setError] = useState<string | null>(null);
 
   useEffect(() => {
+    // Open the stream before the first fetch so reports saved in between are not missed
+    const unsubscribe = subscribeToEvents({
+      onReport: (report) => setReports((current) => [report, ...current].slice(0, 50)),
+      onResync: () => loadReports(),
+    });
     loadReports();
+
+    return unsubscribe;
   }, []);
 
   const loadReports = async () => {
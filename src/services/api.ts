@@ -1,11 +1,25 @@
 import type { AnalysisResponse, Report, DailySummary } from '../types';
 
 const API_BASE_URL = 'http://localhost:5000/api';
+const DEVICE_ID_KEY = 'baby-monitor-device-id';
+
+// Stable per-browser camera ID; the backend tracks admission and state per device
+export function getDeviceId(): string {
+  let deviceId = localStorage.getItem(DEVICE_ID_KEY);
+
+  if (!deviceId) {
+    deviceId = crypto.randomUUID();
+    localStorage.setItem(DEVICE_ID_KEY, deviceId);
+  }
+
+  return deviceId;
+}
 
 export async function analyzeMedia(
   audioBlob: Blob,
   videoBlob: Blob,
-  timestamp: Date = new Date()
+  timestamp: Date = new Date(),
+  deviceId: string = getDeviceId()
 ): Promise<AnalysisResponse> {
   const formData = new FormData();
   formData.append('audio', audioBlob, 'audio.webm');
@@ -14,6 +28,9 @@ export async function analyzeMedia(
 
   const response = await fetch(`${API_BASE_URL}/analyze`, {
     method: 'POST',
+    headers: {
+      'X-Device-Id': deviceId,
+    },
     body: formData,
   });
 
@@ -76,3 +93,46 @@ export async function getDailySummary(date?: Date): Promise<DailySummary> {
 
   return response.json();
 }
+
+export interface SummaryDelta {
+  date: string;
+  category: 'sleeping' | 'crying' | 'sitting' | 'no_baby';
+  detections: number;
+  seconds: number;
+}
+
+interface EventHandlers {
+  onReport?: (report: Report) => void;
+  onSummaryDelta?: (delta: SummaryDelta) => void;
+  onResync?: () => void;
+}
+
+export function subscribeToEvents(
+  handlers: EventHandlers,
+  deviceId?: string
+): () => void {
+  const params = deviceId ? `?device_id=${encodeURIComponent(deviceId)}` : '';
+  const source = new EventSource(`${API_BASE_URL}/events${params}`);
+
+  source.addEventListener('report', (event) => {
+    handlers.onReport?.(JSON.parse((event as MessageEvent).data));
+  });
+  source.addEventListener('summary_delta', (event) => {
+    handlers.onSummaryDelta?.(JSON.parse((event as MessageEvent).data));
+  });
+  source.addEventListener('resync', () => {
+    handlers.onResync?.();
+  });
+
+  // Events published while the browser was reconnecting are not replayed,
+  // so every reconnect refetches like an explicit resync
+  let opened = false;
+  source.addEventListener('open', () => {
+    if (opened) {
+      handlers.onResync?.();
+    }
+    opened = true;
+  });
+
+  return () => source.close();
+}
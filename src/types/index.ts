@@ -29,6 +29,7 @@ export interface Report {
   combined_message?: string;
   notified: boolean;
   notification_status?: NotificationStatus;
+  duration_seconds?: number;
   created_at: string;
 }
 
@@ -41,7 +42,10 @@ export interface AnalysisResponse {
   cry_confidence?: number;
   combined_message?: string;
   timestamp: string;
-  report_id?: string;
+  changed?: boolean;
+  started_crying?: boolean;
+  notified?: boolean;
+  report_id?: string | null;
 }
 
 export interface DailySummary {
@@ -57,4 +61,10 @@ export interface DailySummary {
     sitting: number;
     no_baby: number;
   };
+  breakdown_seconds: {
+    sleeping: number;
+    crying: number;
+    sitting: number;
+    no_baby: number;
+  };
 }
@@ -0,0 +1,143 @@
+/*
+  # Compact report storage
+
+  1. Changes to `reports`
+    - `device_id` (text) - Device that sent the clip (legacy rows default to 'default')
+
+  2. New Tables
+    - `reports_compact`
+      - `id` (uuid, primary key) - Unique report identifier (same id as the legacy row when backfilled)
+      - `timestamp` (timestamptz) - When the detection occurred
+      - `device_id` (text) - Device that sent the clip
+      - `status` (smallint) - 0 no_baby, 1 present, 2 cry
+      - `audio_status` (smallint) - 0 no_cry, 1 cry, 2 error
+      - `cry_reason` (smallint) - 0 hunger, 1 pain, 2 attention, 3 gas (null when not crying)
+      - `activity` (smallint) - 0 sleeping, 1 sitting (null when no baby)
+      - `presence` (boolean) - Whether a baby was detected
+      - `audio_conf` (smallint) - Audio confidence quantized to 0-255
+      - `video_conf` (smallint) - Video confidence quantized to 0-255
+      - `fidelity` (smallint) - 0 full, 1 reduced analysis
+      - `notify_code` (smallint) - 0 none, 1 delivered, 2 failed, 3 not configured
+      - `notify_sid` (text) - Twilio message SID when delivered
+      - `created_at` (timestamptz) - Record creation time
+
+    The combined message is derived on read instead of stored.
+
+  3. Views
+    - `reports_legacy` - Expands `reports_compact` into the original `reports` JSON shape
+
+  4. Migration path
+    - Existing `reports` rows are backfilled into `reports_compact` (safe to re-run)
+    - The backend keeps writing `reports` until REPORT_STORAGE=compact is set
+    - Re-run the backfill statement after switching to pick up rows written in between
+*/
+
+ALTER TABLE reports ADD COLUMN IF NOT EXISTS device_id text NOT NULL DEFAULT 'default';
+
+CREATE TABLE IF NOT EXISTS reports_compact (
+  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  timestamp timestamptz NOT NULL,
+  device_id text NOT NULL DEFAULT 'default',
+  status smallint NOT NULL,
+  audio_status smallint NOT NULL DEFAULT 0,
+  cry_reason smallint,
+  activity smallint,
+  presence boolean NOT NULL DEFAULT false,
+  audio_conf smallint NOT NULL DEFAULT 0,
+  video_conf smallint NOT NULL DEFAULT 0,
+  fidelity smallint NOT NULL DEFAULT 0,
+  notify_code smallint NOT NULL DEFAULT 0,
+  notify_sid text,
+  created_at timestamptz DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_reports_compact_timestamp ON reports_compact(timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_reports_compact_device_timestamp ON reports_compact(device_id, timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_reports_compact_notified ON reports_compact(notify_code) WHERE notify_code = 1;
+
+ALTER TABLE reports_compact ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Public read access to compact reports"
+  ON reports_compact
+  FOR SELECT
+  TO anon, authenticated
+  USING (true);
+
+CREATE POLICY "Public insert access to compact reports"
+  ON reports_compact
+  FOR INSERT
+  TO anon, authenticated
+  WITH CHECK (true);
+
+-- Backfill from the legacy table
+INSERT INTO reports_compact (
+  id, timestamp, device_id, status, audio_status, cry_reason, activity, presence,
+  audio_conf, video_conf, fidelity, notify_code, notify_sid, created_at
+)
+SELECT
+  r.id,
+  r.timestamp,
+  r.device_id,
+  CASE
+    WHEN NOT COALESCE((r.video_result->>'presence')::boolean, false) THEN 0
+    WHEN r.audio_result->>'status' = 'cry' THEN 2
+    ELSE 1
+  END,
+  CASE r.audio_result->>'status' WHEN 'no_cry' THEN 0 WHEN 'cry' THEN 1 ELSE 2 END,
+  CASE r.audio_result->>'reason'
+    WHEN 'hunger' THEN 0 WHEN 'pain' THEN 1 WHEN 'attention' THEN 2 WHEN 'gas' THEN 3
+  END,
+  CASE r.video_result->>'activity' WHEN 'sleeping' THEN 0 WHEN 'sitting' THEN 1 END,
+  COALESCE((r.video_result->>'presence')::boolean, false),
+  round(LEAST(GREATEST(COALESCE((r.audio_result->>'confidence')::numeric, 0), 0), 1) * 255)::smallint,
+  round(LEAST(GREATEST(COALESCE((r.video_result->>'confidence')::numeric, 0), 0), 1) * 255)::smallint,
+  CASE WHEN r.audio_result->>'fidelity' = 'reduced' OR r.video_result->>'fidelity' = 'reduced' THEN 1 ELSE 0 END,
+  CASE
+    WHEN r.notification_status IS NULL THEN 0
+    WHEN r.notified OR COALESCE((r.notification_status->>'delivered')::boolean, false) THEN 1
+    WHEN r.notification_status->>'error' ILIKE '%not configured%' THEN 3
+    ELSE 2
+  END,
+  r.notification_status->>'sid',
+  r.created_at
+FROM reports r
+ON CONFLICT (id) DO NOTHING;
+
+-- Legacy JSON shape for clients and tools that read the table directly
+CREATE OR REPLACE VIEW reports_legacy AS
+SELECT
+  c.id,
+  c.timestamp,
+  c.device_id,
+  jsonb_build_object(
+    'status', CASE c.audio_status WHEN 0 THEN 'no_cry' WHEN 1 THEN 'cry' ELSE 'error' END,
+    'reason', CASE c.cry_reason WHEN 0 THEN 'hunger' WHEN 1 THEN 'pain' WHEN 2 THEN 'attention' WHEN 3 THEN 'gas' END,
+    'confidence', round(c.audio_conf / 255.0, 3)
+  ) AS audio_result,
+  jsonb_build_object(
+    'presence', c.presence,
+    'activity', CASE c.activity WHEN 0 THEN 'sleeping' WHEN 1 THEN 'sitting' END,
+    'confidence', round(c.video_conf / 255.0, 3)
+  ) AS video_result,
+  CASE WHEN c.status = 2 THEN
+    'Baby crying due to '
+    || CASE c.cry_reason WHEN 0 THEN 'hunger' WHEN 1 THEN 'pain' WHEN 2 THEN 'attention' WHEN 3 THEN 'gas' END
+    || COALESCE(' while ' || CASE c.activity WHEN 0 THEN 'sleeping' WHEN 1 THEN 'sitting' END, '')
+    || '.'
+  END AS combined_message,
+  c.notify_code = 1 AS notified,
+  CASE WHEN c.notify_code = 0 THEN NULL ELSE
+    jsonb_build_object(
+      'provider', 'twilio',
+      'delivered', c.notify_code = 1,
+      'sid', c.notify_sid
+    )
+  END AS notification_status,
+  c.created_at
+FROM reports_compact c;
+
+COMMENT ON TABLE reports_compact IS 'Compact baby monitoring reports with enum-coded fields and 0-255 quantized confidences';
+COMMENT ON COLUMN reports_compact.status IS '0 no_baby, 1 present, 2 cry';
+COMMENT ON COLUMN reports_compact.cry_reason IS '0 hunger, 1 pain, 2 attention, 3 gas';
+COMMENT ON COLUMN reports_compact.activity IS '0 sleeping, 1 sitting';
+COMMENT ON COLUMN reports_compact.notify_code IS '0 none, 1 delivered, 2 failed, 3 not configured';
@@ -0,0 +1,278 @@
+/*
+  # Daily partitioning and retention for compact reports
+
+  1. Changes
+    - `reports_compact` becomes a table partitioned by day on `timestamp` (UTC days),
+      with a default partition as a safety net. Existing rows are moved over.
+      The primary key becomes (id, timestamp), as required for partitioned tables.
+
+  2. New Tables
+    - `report_summaries` - Per-device, per-interval state counts for downsampled reports
+      - `device_id` (text) - Device that sent the clips
+      - `bucket_start` (timestamptz) - Start of the summary interval
+      - `interval_seconds` (integer) - Width of the interval
+      - `sleeping_count`, `sitting_count`, `cry_count`, `no_baby_count` (integer) - Clips per state
+      - `notified_count` (integer) - Clips that triggered a delivered SMS
+
+  3. Functions (service role only)
+    - `ensure_report_partitions(from_day, to_day)` - Create missing daily partitions
+    - `downsample_reports_batch(cutoff, batch_size, interval_seconds)` - Fold one batch of
+      raw rows older than cutoff into `report_summaries` and delete them, in one statement.
+      Rows are claimed with SKIP LOCKED so the job never waits on, or blocks, live inserts.
+    - `drop_report_partitions_before(cutoff_day)` - Drop empty daily partitions before cutoff
+*/
+
+-- Helper to create one UTC-day partition
+CREATE OR REPLACE FUNCTION create_report_partition(day date)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  partition_name text := 'reports_compact_p' || to_char(day, 'YYYYMMDD');
+BEGIN
+  IF to_regclass(partition_name) IS NULL THEN
+    EXECUTE format(
+      'CREATE TABLE %I PARTITION OF reports_compact FOR VALUES FROM (%L) TO (%L)',
+      partition_name,
+      (day::timestamp AT TIME ZONE 'UTC'),
+      ((day + 1)::timestamp AT TIME ZONE 'UTC')
+    );
+  END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION ensure_report_partitions(from_day date, to_day date)
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  day date := from_day;
+  created integer := 0;
+BEGIN
+  WHILE day <= to_day LOOP
+    IF to_regclass('reports_compact_p' || to_char(day, 'YYYYMMDD')) IS NULL THEN
+      PERFORM create_report_partition(day);
+      created := created + 1;
+    END IF;
+    day := day + 1;
+  END LOOP;
+  RETURN created;
+END;
+$$;
+
+-- Move the existing table aside and recreate it partitioned
+DROP VIEW IF EXISTS reports_legacy;
+ALTER TABLE reports_compact RENAME TO reports_compact_unpartitioned;
+ALTER INDEX IF EXISTS reports_compact_pkey RENAME TO reports_compact_unpartitioned_pkey;
+DROP INDEX IF EXISTS idx_reports_compact_timestamp;
+DROP INDEX IF EXISTS idx_reports_compact_device_timestamp;
+DROP INDEX IF EXISTS idx_reports_compact_notified;
+
+CREATE TABLE reports_compact (
+  id uuid NOT NULL DEFAULT gen_random_uuid(),
+  timestamp timestamptz NOT NULL,
+  device_id text NOT NULL DEFAULT 'default',
+  status smallint NOT NULL,
+  audio_status smallint NOT NULL DEFAULT 0,
+  cry_reason smallint,
+  activity smallint,
+  presence boolean NOT NULL DEFAULT false,
+  audio_conf smallint NOT NULL DEFAULT 0,
+  video_conf smallint NOT NULL DEFAULT 0,
+  fidelity smallint NOT NULL DEFAULT 0,
+  notify_code smallint NOT NULL DEFAULT 0,
+  notify_sid text,
+  created_at timestamptz DEFAULT now(),
+  PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+CREATE TABLE reports_compact_default PARTITION OF reports_compact DEFAULT;
+
+CREATE INDEX IF NOT EXISTS idx_reports_compact_timestamp ON reports_compact(timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_reports_compact_device_timestamp ON reports_compact(device_id, timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_reports_compact_notified ON reports_compact(notify_code) WHERE notify_code = 1;
+
+-- Partitions must exist before rows are moved, or they would land in the default partition
+SELECT ensure_report_partitions(
+  COALESCE((SELECT min(timestamp AT TIME ZONE 'UTC')::date FROM reports_compact_unpartitioned), current_date),
+  current_date + 7
+);
+
+INSERT INTO reports_compact SELECT * FROM reports_compact_unpartitioned;
+DROP TABLE reports_compact_unpartitioned;
+
+ALTER TABLE reports_compact ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Public read access to compact reports"
+  ON reports_compact
+  FOR SELECT
+  TO anon, authenticated
+  USING (true);
+
+CREATE POLICY "Public insert access to compact reports"
+  ON reports_compact
+  FOR INSERT
+  TO anon, authenticated
+  WITH CHECK (true);
+
+-- Recreate the legacy view against the partitioned table
+CREATE OR REPLACE VIEW reports_legacy AS
+SELECT
+  c.id,
+  c.timestamp,
+  c.device_id,
+  jsonb_build_object(
+    'status', CASE c.audio_status WHEN 0 THEN 'no_cry' WHEN 1 THEN 'cry' ELSE 'error' END,
+    'reason', CASE c.cry_reason WHEN 0 THEN 'hunger' WHEN 1 THEN 'pain' WHEN 2 THEN 'attention' WHEN 3 THEN 'gas' END,
+    'confidence', round(c.audio_conf / 255.0, 3)
+  ) AS audio_result,
+  jsonb_build_object(
+    'presence', c.presence,
+    'activity', CASE c.activity WHEN 0 THEN 'sleeping' WHEN 1 THEN 'sitting' END,
+    'confidence', round(c.video_conf / 255.0, 3)
+  ) AS video_result,
+  CASE WHEN c.status = 2 THEN
+    'Baby crying due to '
+    || CASE c.cry_reason WHEN 0 THEN 'hunger' WHEN 1 THEN 'pain' WHEN 2 THEN 'attention' WHEN 3 THEN 'gas' END
+    || COALESCE(' while ' || CASE c.activity WHEN 0 THEN 'sleeping' WHEN 1 THEN 'sitting' END, '')
+    || '.'
+  END AS combined_message,
+  c.notify_code = 1 AS notified,
+  CASE WHEN c.notify_code = 0 THEN NULL ELSE
+    jsonb_build_object(
+      'provider', 'twilio',
+      'delivered', c.notify_code = 1,
+      'sid', c.notify_sid
+    )
+  END AS notification_status,
+  c.created_at
+FROM reports_compact c;
+
+CREATE TABLE IF NOT EXISTS report_summaries (
+  device_id text NOT NULL,
+  bucket_start timestamptz NOT NULL,
+  interval_seconds integer NOT NULL,
+  sleeping_count integer NOT NULL DEFAULT 0,
+  sitting_count integer NOT NULL DEFAULT 0,
+  cry_count integer NOT NULL DEFAULT 0,
+  no_baby_count integer NOT NULL DEFAULT 0,
+  notified_count integer NOT NULL DEFAULT 0,
+  PRIMARY KEY (device_id, bucket_start)
+);
+
+CREATE INDEX IF NOT EXISTS idx_report_summaries_bucket_start ON report_summaries(bucket_start);
+
+ALTER TABLE report_summaries ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Public read access to report summaries"
+  ON report_summaries
+  FOR SELECT
+  TO anon, authenticated
+  USING (true);
+
+CREATE OR REPLACE FUNCTION downsample_reports_batch(
+  cutoff timestamptz,
+  batch_size integer DEFAULT 500,
+  interval_seconds integer DEFAULT 300
+)
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  processed integer;
+BEGIN
+  WITH batch AS (
+    SELECT id, timestamp
+    FROM reports_compact
+    WHERE timestamp < cutoff
+    ORDER BY timestamp
+    LIMIT batch_size
+    FOR UPDATE SKIP LOCKED
+  ),
+  removed AS (
+    DELETE FROM reports_compact r
+    USING batch b
+    WHERE r.id = b.id AND r.timestamp = b.timestamp
+    RETURNING r.device_id, r.timestamp, r.status, r.activity, r.notify_code
+  ),
+  buckets AS (
+    SELECT
+      device_id,
+      to_timestamp(floor(extract(epoch FROM timestamp) / interval_seconds) * interval_seconds) AS bucket_start,
+      count(*) FILTER (WHERE status = 1 AND activity = 0) AS sleeping_count,
+      count(*) FILTER (WHERE status = 1 AND activity = 1) AS sitting_count,
+      count(*) FILTER (WHERE status = 2) AS cry_count,
+      count(*) FILTER (WHERE status = 0) AS no_baby_count,
+      count(*) FILTER (WHERE notify_code = 1) AS notified_count
+    FROM removed
+    GROUP BY 1, 2
+  ),
+  merged AS (
+    INSERT INTO report_summaries AS s (
+      device_id, bucket_start, interval_seconds, sleeping_count, sitting_count,
+      cry_count, no_baby_count, notified_count
+    )
+    SELECT
+      device_id, bucket_start, interval_seconds, sleeping_count, sitting_count,
+      cry_count, no_baby_count, notified_count
+    FROM buckets
+    ON CONFLICT (device_id, bucket_start) DO UPDATE SET
+      sleeping_count = s.sleeping_count + EXCLUDED.sleeping_count,
+      sitting_count = s.sitting_count + EXCLUDED.sitting_count,
+      cry_count = s.cry_count + EXCLUDED.cry_count,
+      no_baby_count = s.no_baby_count + EXCLUDED.no_baby_count,
+      notified_count = s.notified_count + EXCLUDED.notified_count
+    RETURNING 1
+  )
+  SELECT count(*) INTO processed FROM removed;
+
+  RETURN processed;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION drop_report_partitions_before(cutoff_day date)
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  partition record;
+  is_empty boolean;
+  dropped integer := 0;
+BEGIN
+  FOR partition IN
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'reports_compact'::regclass
+      AND c.relname ~ '^reports_compact_p[0-9]{8}$'
+      AND to_date(substring(c.relname FROM '[0-9]{8}$'), 'YYYYMMDD') < cutoff_day
+  LOOP
+    EXECUTE format('SELECT NOT EXISTS (SELECT 1 FROM %I)', partition.relname) INTO is_empty;
+
+    -- Only drop partitions the downsampling job has already emptied
+    IF is_empty THEN
+      EXECUTE format('DROP TABLE %I', partition.relname);
+      dropped := dropped + 1;
+    END IF;
+  END LOOP;
+
+  RETURN dropped;
+END;
+$$;
+
+-- Maintenance functions delete data, so keep them away from the public API roles
+REVOKE EXECUTE ON FUNCTION create_report_partition(date) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION ensure_report_partitions(date, date) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION downsample_reports_batch(timestamptz, integer, integer) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION drop_report_partitions_before(date) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION ensure_report_partitions(date, date) TO service_role;
+GRANT EXECUTE ON FUNCTION downsample_reports_batch(timestamptz, integer, integer) TO service_role;
+GRANT EXECUTE ON FUNCTION drop_report_partitions_before(date) TO service_role;
+
+COMMENT ON TABLE report_summaries IS 'Per-device, per-interval state counts for reports past the raw retention window';
@@ -0,0 +1,134 @@
+/*
+  # Report durations for state-transition reporting
+
+  1. Changes
+    - `reports.duration_seconds`, `reports_compact.duration_seconds` (integer, default 4) -
+      Seconds of monitoring a report covers. Reports are now written on state changes and
+      periodic heartbeats rather than for every 4 second clip. Existing rows keep 4.
+    - `report_summaries` gains `sleeping_seconds`, `sitting_seconds`, `cry_seconds` and
+      `no_baby_seconds`, backfilled as 4 seconds per counted report.
+    - `reports_legacy` exposes `duration_seconds`.
+    - `downsample_reports_batch` also sums durations into the summary buckets.
+*/
+
+ALTER TABLE reports ADD COLUMN IF NOT EXISTS duration_seconds integer NOT NULL DEFAULT 4;
+ALTER TABLE reports_compact ADD COLUMN IF NOT EXISTS duration_seconds integer NOT NULL DEFAULT 4;
+
+ALTER TABLE report_summaries
+  ADD COLUMN IF NOT EXISTS sleeping_seconds integer NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS sitting_seconds integer NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS cry_seconds integer NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS no_baby_seconds integer NOT NULL DEFAULT 0;
+
+UPDATE report_summaries SET
+  sleeping_seconds = sleeping_count * 4,
+  sitting_seconds = sitting_count * 4,
+  cry_seconds = cry_count * 4,
+  no_baby_seconds = no_baby_count * 4;
+
+CREATE OR REPLACE VIEW reports_legacy AS
+SELECT
+  c.id,
+  c.timestamp,
+  c.device_id,
+  jsonb_build_object(
+    'status', CASE c.audio_status WHEN 0 THEN 'no_cry' WHEN 1 THEN 'cry' ELSE 'error' END,
+    'reason', CASE c.cry_reason WHEN 0 THEN 'hunger' WHEN 1 THEN 'pain' WHEN 2 THEN 'attention' WHEN 3 THEN 'gas' END,
+    'confidence', round(c.audio_conf / 255.0, 3)
+  ) AS audio_result,
+  jsonb_build_object(
+    'presence', c.presence,
+    'activity', CASE c.activity WHEN 0 THEN 'sleeping' WHEN 1 THEN 'sitting' END,
+    'confidence', round(c.video_conf / 255.0, 3)
+  ) AS video_result,
+  CASE WHEN c.status = 2 THEN
+    'Baby crying due to '
+    || CASE c.cry_reason WHEN 0 THEN 'hunger' WHEN 1 THEN 'pain' WHEN 2 THEN 'attention' WHEN 3 THEN 'gas' END
+    || COALESCE(' while ' || CASE c.activity WHEN 0 THEN 'sleeping' WHEN 1 THEN 'sitting' END, '')
+    || '.'
+  END AS combined_message,
+  c.notify_code = 1 AS notified,
+  CASE WHEN c.notify_code = 0 THEN NULL ELSE
+    jsonb_build_object(
+      'provider', 'twilio',
+      'delivered', c.notify_code = 1,
+      'sid', c.notify_sid
+    )
+  END AS notification_status,
+  c.created_at,
+  c.duration_seconds
+FROM reports_compact c;
+
+CREATE OR REPLACE FUNCTION downsample_reports_batch(
+  cutoff timestamptz,
+  batch_size integer DEFAULT 500,
+  interval_seconds integer DEFAULT 300
+)
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  processed integer;
+BEGIN
+  WITH batch AS (
+    SELECT id, timestamp
+    FROM reports_compact
+    WHERE timestamp < cutoff
+    ORDER BY timestamp
+    LIMIT batch_size
+    FOR UPDATE SKIP LOCKED
+  ),
+  removed AS (
+    DELETE FROM reports_compact r
+    USING batch b
+    WHERE r.id = b.id AND r.timestamp = b.timestamp
+    RETURNING r.device_id, r.timestamp, r.status, r.activity, r.notify_code, r.duration_seconds
+  ),
+  buckets AS (
+    SELECT
+      device_id,
+      to_timestamp(floor(extract(epoch FROM timestamp) / interval_seconds) * interval_seconds) AS bucket_start,
+      count(*) FILTER (WHERE status = 1 AND activity = 0) AS sleeping_count,
+      count(*) FILTER (WHERE status = 1 AND activity = 1) AS sitting_count,
+      count(*) FILTER (WHERE status = 2) AS cry_count,
+      count(*) FILTER (WHERE status = 0) AS no_baby_count,
+      count(*) FILTER (WHERE notify_code = 1) AS notified_count,
+      COALESCE(sum(duration_seconds) FILTER (WHERE status = 1 AND activity = 0), 0) AS sleeping_seconds,
+      COALESCE(sum(duration_seconds) FILTER (WHERE status = 1 AND activity = 1), 0) AS sitting_seconds,
+      COALESCE(sum(duration_seconds) FILTER (WHERE status = 2), 0) AS cry_seconds,
+      COALESCE(sum(duration_seconds) FILTER (WHERE status = 0), 0) AS no_baby_seconds
+    FROM removed
+    GROUP BY 1, 2
+  ),
+  merged AS (
+    INSERT INTO report_summaries AS s (
+      device_id, bucket_start, interval_seconds, sleeping_count, sitting_count,
+      cry_count, no_baby_count, notified_count, sleeping_seconds, sitting_seconds,
+      cry_seconds, no_baby_seconds
+    )
+    SELECT
+      device_id, bucket_start, interval_seconds, sleeping_count, sitting_count,
+      cry_count, no_baby_count, notified_count, sleeping_seconds, sitting_seconds,
+      cry_seconds, no_baby_seconds
+    FROM buckets
+    ON CONFLICT (device_id, bucket_start) DO UPDATE SET
+      sleeping_count = s.sleeping_count + EXCLUDED.sleeping_count,
+      sitting_count = s.sitting_count + EXCLUDED.sitting_count,
+      cry_count = s.cry_count + EXCLUDED.cry_count,
+      no_baby_count = s.no_baby_count + EXCLUDED.no_baby_count,
+      notified_count = s.notified_count + EXCLUDED.notified_count,
+      sleeping_seconds = s.sleeping_seconds + EXCLUDED.sleeping_seconds,
+      sitting_seconds = s.sitting_seconds + EXCLUDED.sitting_seconds,
+      cry_seconds = s.cry_seconds + EXCLUDED.cry_seconds,
+      no_baby_seconds = s.no_baby_seconds + EXCLUDED.no_baby_seconds
+    RETURNING 1
+  )
+  SELECT count(*) INTO processed FROM removed;
+
+  RETURN processed;
+END;
+$$;
+
+COMMENT ON COLUMN reports_compact.duration_seconds IS 'Seconds of monitoring the report covers (state held since the previous report)';
@@ -0,0 +1,143 @@
+/*
+  # Retention for legacy reports, and partitions over default-partition rows
+
+  1. Changes
+    - `create_report_partition(day)` no longer fails when rows for that day already sit in
+      `reports_compact_default` (e.g. the retention job did not run for a week). Those rows
+      are moved into a new table that is then attached as the day's partition.
+
+  2. Functions (service role only)
+    - `downsample_legacy_reports_batch(cutoff, batch_size, interval_seconds)` - Same as
+      `downsample_reports_batch`, for deployments still writing the legacy `reports` table
+      (REPORT_STORAGE=legacy, the default). States are derived from the JSON results with
+      the same precedence as the backend: no presence, then cry, then activity.
+*/
+
+CREATE OR REPLACE FUNCTION create_report_partition(day date)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  partition_name text := 'reports_compact_p' || to_char(day, 'YYYYMMDD');
+  day_start timestamptz := day::timestamp AT TIME ZONE 'UTC';
+  day_end timestamptz := (day + 1)::timestamp AT TIME ZONE 'UTC';
+BEGIN
+  IF to_regclass(partition_name) IS NOT NULL THEN
+    RETURN;
+  END IF;
+
+  IF NOT EXISTS (
+    SELECT 1 FROM reports_compact_default WHERE timestamp >= day_start AND timestamp < day_end
+  ) THEN
+    EXECUTE format(
+      'CREATE TABLE %I PARTITION OF reports_compact FOR VALUES FROM (%L) TO (%L)',
+      partition_name, day_start, day_end
+    );
+    RETURN;
+  END IF;
+
+  -- Attaching a range that the default partition still holds rows for is an error,
+  -- so move the day's rows out of the default partition first
+  EXECUTE format(
+    'CREATE TABLE %I (LIKE reports_compact INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+    partition_name
+  );
+  EXECUTE format(
+    'WITH moved AS (
+       DELETE FROM reports_compact_default WHERE timestamp >= %L AND timestamp < %L RETURNING *
+     )
+     INSERT INTO %I SELECT * FROM moved',
+    day_start, day_end, partition_name
+  );
+  EXECUTE format(
+    'ALTER TABLE reports_compact ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+    partition_name, day_start, day_end
+  );
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION downsample_legacy_reports_batch(
+  cutoff timestamptz,
+  batch_size integer DEFAULT 500,
+  interval_seconds integer DEFAULT 300
+)
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  processed integer;
+BEGIN
+  WITH batch AS (
+    SELECT id
+    FROM reports
+    WHERE timestamp < cutoff
+    ORDER BY timestamp
+    LIMIT batch_size
+    FOR UPDATE SKIP LOCKED
+  ),
+  removed AS (
+    DELETE FROM reports r
+    USING batch b
+    WHERE r.id = b.id
+    RETURNING
+      r.device_id,
+      r.timestamp,
+      CASE
+        WHEN NOT COALESCE((r.video_result->>'presence')::boolean, false) THEN 'no_baby'
+        WHEN r.audio_result->>'status' = 'cry' THEN 'crying'
+        ELSE r.video_result->>'activity'
+      END AS category,
+      COALESCE(r.notified, false)
+        OR COALESCE((r.notification_status->>'delivered')::boolean, false) AS delivered,
+      r.duration_seconds
+  ),
+  buckets AS (
+    SELECT
+      device_id,
+      to_timestamp(floor(extract(epoch FROM timestamp) / interval_seconds) * interval_seconds) AS bucket_start,
+      count(*) FILTER (WHERE category = 'sleeping') AS sleeping_count,
+      count(*) FILTER (WHERE category = 'sitting') AS sitting_count,
+      count(*) FILTER (WHERE category = 'crying') AS cry_count,
+      count(*) FILTER (WHERE category = 'no_baby') AS no_baby_count,
+      count(*) FILTER (WHERE delivered) AS notified_count,
+      COALESCE(sum(duration_seconds) FILTER (WHERE category = 'sleeping'), 0) AS sleeping_seconds,
+      COALESCE(sum(duration_seconds) FILTER (WHERE category = 'sitting'), 0) AS sitting_seconds,
+      COALESCE(sum(duration_seconds) FILTER (WHERE category = 'crying'), 0) AS cry_seconds,
+      COALESCE(sum(duration_seconds) FILTER (WHERE category = 'no_baby'), 0) AS no_baby_seconds
+    FROM removed
+    GROUP BY 1, 2
+  ),
+  merged AS (
+    INSERT INTO report_summaries AS s (
+      device_id, bucket_start, interval_seconds, sleeping_count, sitting_count,
+      cry_count, no_baby_count, notified_count, sleeping_seconds, sitting_seconds,
+      cry_seconds, no_baby_seconds
+    )
+    SELECT
+      device_id, bucket_start, interval_seconds, sleeping_count, sitting_count,
+      cry_count, no_baby_count, notified_count, sleeping_seconds, sitting_seconds,
+      cry_seconds, no_baby_seconds
+    FROM buckets
+    ON CONFLICT (device_id, bucket_start) DO UPDATE SET
+      sleeping_count = s.sleeping_count + EXCLUDED.sleeping_count,
+      sitting_count = s.sitting_count + EXCLUDED.sitting_count,
+      cry_count = s.cry_count + EXCLUDED.cry_count,
+      no_baby_count = s.no_baby_count + EXCLUDED.no_baby_count,
+      notified_count = s.notified_count + EXCLUDED.notified_count,
+      sleeping_seconds = s.sleeping_seconds + EXCLUDED.sleeping_seconds,
+      sitting_seconds = s.sitting_seconds + EXCLUDED.sitting_seconds,
+      cry_seconds = s.cry_seconds + EXCLUDED.cry_seconds,
+      no_baby_seconds = s.no_baby_seconds + EXCLUDED.no_baby_seconds
+    RETURNING 1
+  )
+  SELECT count(*) INTO processed FROM removed;
+
+  RETURN processed;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION create_report_partition(date) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION downsample_legacy_reports_batch(timestamptz, integer, integer) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION downsample_legacy_reports_batch(timestamptz, integer, integer) TO service_role;
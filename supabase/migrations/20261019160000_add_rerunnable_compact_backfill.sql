@@ -0,0 +1,71 @@
+/*
+  # Re-runnable backfill of compact reports
+
+  1. Functions (service role only)
+    - `backfill_reports_compact()` - Copy `reports` rows that are not yet in `reports_compact`
+      and return how many were copied. Replaces re-running the backfill `INSERT` from
+      20261019120000, whose `ON CONFLICT (id)` no longer matches the (id, timestamp) primary
+      key of the partitioned table. Rows older than the newest `report_summaries` bucket of
+      their device are skipped, since the retention job has already counted that range.
+      Rows for days without a partition land in `reports_compact_default`, which
+      `create_report_partition` moves out when the day's partition is created.
+*/
+
+CREATE OR REPLACE FUNCTION backfill_reports_compact()
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  copied integer;
+BEGIN
+  INSERT INTO reports_compact (
+    id, timestamp, device_id, status, audio_status, cry_reason, activity, presence,
+    audio_conf, video_conf, fidelity, notify_code, notify_sid, created_at, duration_seconds
+  )
+  SELECT
+    r.id,
+    r.timestamp,
+    r.device_id,
+    CASE
+      WHEN NOT COALESCE((r.video_result->>'presence')::boolean, false) THEN 0
+      WHEN r.audio_result->>'status' = 'cry' THEN 2
+      ELSE 1
+    END,
+    CASE r.audio_result->>'status' WHEN 'no_cry' THEN 0 WHEN 'cry' THEN 1 ELSE 2 END,
+    CASE r.audio_result->>'reason'
+      WHEN 'hunger' THEN 0 WHEN 'pain' THEN 1 WHEN 'attention' THEN 2 WHEN 'gas' THEN 3
+    END,
+    CASE r.video_result->>'activity' WHEN 'sleeping' THEN 0 WHEN 'sitting' THEN 1 END,
+    COALESCE((r.video_result->>'presence')::boolean, false),
+    round(LEAST(GREATEST(COALESCE((r.audio_result->>'confidence')::numeric, 0), 0), 1) * 255)::smallint,
+    round(LEAST(GREATEST(COALESCE((r.video_result->>'confidence')::numeric, 0), 0), 1) * 255)::smallint,
+    CASE WHEN r.audio_result->>'fidelity' = 'reduced' OR r.video_result->>'fidelity' = 'reduced' THEN 1 ELSE 0 END,
+    CASE
+      WHEN r.notification_status IS NULL THEN 0
+      WHEN r.notified OR COALESCE((r.notification_status->>'delivered')::boolean, false) THEN 1
+      WHEN r.notification_status->>'error' ILIKE '%not configured%' THEN 3
+      ELSE 2
+    END,
+    r.notification_status->>'sid',
+    r.created_at,
+    r.duration_seconds
+  FROM reports r
+  WHERE r.timestamp >= COALESCE(
+    (
+      SELECT max(s.bucket_start + make_interval(secs => s.interval_seconds))
+      FROM report_summaries s
+      WHERE s.device_id = r.device_id
+    ),
+    '-infinity'::timestamptz
+  )
+  ON CONFLICT (id, timestamp) DO NOTHING;
+
+  GET DIAGNOSTICS copied = ROW_COUNT;
+  RETURN copied;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION backfill_reports_compact() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION backfill_reports_compact() TO service_role;